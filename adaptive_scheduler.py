@@ -0,0 +1,106 @@
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = Gauge("bot_poll_interval_seconds", "Текущий интервал адаптивного опроса", ["job"])
+POLL_RATE = Gauge("bot_poll_items_per_hour", "Оценка частоты новых элементов источника", ["job"])
+
+
+@dataclass
+class PollPolicy:
+    """Границы и параметры адаптивного опроса источника"""
+    min_interval: float
+    max_interval: float
+    initial: float
+    target_items: float = 1.0  # Сколько новых элементов в среднем ждать между опросами
+    backoff: float = 2.0
+    jitter: float = 0.1
+    smoothing: float = 0.3
+
+
+class AdaptiveInterval:
+    """Интервал опроса по наблюдаемой частоте новых элементов.
+
+    Частота сглаживается экспоненциально; если опрос принёс новые элементы,
+    интервал подбирается так, чтобы за него набиралось target_items, иначе
+    увеличивается в backoff раз. Интервал всегда в пределах [min, max].
+    """
+
+    def __init__(self, policy, rng=random):
+        self.policy = policy
+        self.rng = rng
+        self.interval = policy.initial
+        self.rate = None  # Элементов в секунду
+
+    def observe(self, new_items, elapsed):
+        policy = self.policy
+        sample = new_items / elapsed if elapsed > 0 else 0.0
+        if self.rate is None:
+            self.rate = sample
+        else:
+            self.rate = policy.smoothing * sample + (1 - policy.smoothing) * self.rate
+
+        if new_items and self.rate > 0:
+            interval = policy.target_items / self.rate
+        else:
+            interval = self.interval * policy.backoff
+        self.interval = min(policy.max_interval, max(policy.min_interval, interval))
+        return self.interval
+
+    def next_delay(self):
+        """Интервал со случайным разбросом, чтобы опросы не совпадали по времени"""
+        jitter = self.policy.jitter
+        delay = self.interval * self.rng.uniform(1 - jitter, 1 + jitter)
+        return min(self.policy.max_interval, max(self.policy.min_interval, delay))
+
+
+class AdaptivePoller:
+    """Задача APScheduler с адаптивным интервалом.
+
+    func — корутина без аргументов, возвращающая число новых элементов (None
+    при ошибке). Следующий запуск планируется одноразовым заданием только
+    после завершения текущего, поэтому задача не перекрывается сама с собой.
+    """
+
+    def __init__(self, scheduler, job_id, func, policy, clock=time.monotonic):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.func = func
+        self.interval = AdaptiveInterval(policy)
+        self.clock = clock
+        self.last_run = None
+        self.stats = {"runs": 0, "items": 0}
+
+    def start(self):
+        self.last_run = self.clock()
+        self._schedule(self.interval.next_delay())
+
+    def _schedule(self, delay):
+        POLL_INTERVAL.set(self.interval.interval, job=self.job_id)
+        self.scheduler.add_job(
+            self._run, 'date', id=self.job_id, replace_existing=True,
+            run_date=datetime.now(timezone.utc) + timedelta(seconds=delay),
+            # Пока планировщик на паузе, запуск не теряется, а выполняется позже
+            misfire_grace_time=None,
+        )
+
+    async def _run(self):
+        started = self.clock()
+        new_items = None
+        try:
+            new_items = await self.func()
+        finally:
+            elapsed = started - self.last_run
+            self.last_run = started
+            self.stats["runs"] += 1
+            if new_items is not None:
+                self.stats["items"] += new_items
+                self.interval.observe(new_items, elapsed)
+                POLL_RATE.set(self.interval.rate * 3600, job=self.job_id)
+            self._schedule(self.interval.next_delay())
@@ -0,0 +1,235 @@
+"""Фикстуры для стенда: синтетические (детерминированные) или записанные с реальных источников.
+
+Структура каталога записанных фикстур:
+    rss/<slug>.xml
+    channels/<channel>.html
+    binance/ticker.json
+    binance/klines_<interval>.json
+    coingecko/global.json
+"""
+import json
+import random
+import re
+import time
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from pathlib import Path
+
+NEWS_FEEDS = {
+    "CoinDesk": "coindesk",
+    "The Block": "theblock",
+    "CoinTelegraph": "cointelegraph",
+    "Decrypt": "decrypt",
+    "CryptoSlate": "cryptoslate",
+    "ETHHub": "ethhub",
+}
+
+CHANNELS = {
+    "liquidations": "BinanceLiquidations",
+    "whale_alert": "whale_alert_io",
+}
+
+INTERVALS = {"1m": 60_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000, "1w": 604_800_000}
+
+_WORDS = ("ethereum validator staking rollup blob fee market liquidity bridge upgrade "
+          "protocol exchange whale treasury governance layer network mainnet").split()
+_POST_SPLIT = re.compile(r'(?=<div class="tgme_widget_message_wrap)')
+_POST_ID = re.compile(r'data-post="[^"/]+/(\d+)"')
+
+
+class ChannelFixture:
+    """Посты канала, отдаваемые страницами как t.me/s (с поддержкой ?after=)"""
+
+    def __init__(self, channel, posts, page_size=20):
+        self.channel = channel
+        self.posts = sorted(posts)  # [(id, html)]
+        self.page_size = page_size
+
+    def page(self, after=None):
+        if after is None:
+            selected = self.posts[-self.page_size:]
+        else:
+            selected = [post for post in self.posts if post[0] > after][:self.page_size]
+        body = "".join(html for _, html in selected)
+        return (f'<!DOCTYPE html><html><head><title>{self.channel}</title></head><body>'
+                f'<section class="tgme_channel_history js-message_history">{body}</section>'
+                f'</body></html>').encode()
+
+    def append(self, html_factory, count=1):
+        next_id = (self.posts[-1][0] if self.posts else 0) + 1
+        for message_id in range(next_id, next_id + count):
+            self.posts.append((message_id, html_factory(self.channel, message_id)))
+
+
+class Fixtures:
+    def __init__(self, feeds, channels, ticker, klines, global_data):
+        self.feeds = feeds            # slug -> bytes
+        self.channels = channels      # channel -> ChannelFixture
+        self.ticker = ticker          # dict
+        self.klines = klines          # interval -> list
+        self.global_data = global_data
+
+
+# ===== Синтетические фикстуры =====
+def rss_feed(name, items=50, words=400, rng=None):
+    rng = rng or random.Random(name)
+    now = time.time()
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" '
+        'xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel>'
+        f'<title>{name}</title><link>https://example.com/{name}</link>'
+        f'<atom:link href="https://example.com/{name}/feed" rel="self"/>'
+    ]
+    for i in range(items):
+        title = " ".join(rng.choice(_WORDS) for _ in range(8)).capitalize()
+        body = " ".join(rng.choice(_WORDS) for _ in range(words))
+        published = datetime.fromtimestamp(now - i * 1800, timezone.utc)
+        parts.append(
+            f"<item><title><![CDATA[{title} #{i}]]></title>"
+            f"<link>https://example.com/{name}/{i}</link>"
+            f"<pubDate>{format_datetime(published, usegmt=True)}</pubDate>"
+            f"<description><![CDATA[{body[:300]}]]></description>"
+            f"<content:encoded><![CDATA[<p>{body}</p>]]></content:encoded></item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode()
+
+
+def liquidation_post(channel, message_id, rng=None):
+    rng = rng or random.Random(message_id)
+    side = rng.choice(["Long", "Short"])
+    size = rng.uniform(5, 900)
+    price = 3000 + rng.uniform(-150, 150)
+    text = f"Binance: Liquidated on #ETH {side} ${size:.1f}K at ${price:,.2f}"
+    return channel_post(channel, message_id, text)
+
+
+def whale_post(channel, message_id, rng=None):
+    rng = rng or random.Random(message_id)
+    amount = rng.uniform(1_000, 40_000)
+    text = (f"🚨 {amount:,.0f} #ETH ({amount * 3000:,.0f} USD) transferred from "
+            f"{rng.choice(['#Binance', 'unknown wallet', '#Coinbase'])} to "
+            f"{rng.choice(['unknown wallet', '#Kraken', '#OKX'])}")
+    return channel_post(channel, message_id, text)
+
+
+def channel_post(channel, message_id, text):
+    """HTML одного поста в разметке t.me/s"""
+    stamp = datetime.fromtimestamp(1_700_000_000 + message_id * 60, timezone.utc).isoformat()
+    return (
+        f'<div class="tgme_widget_message_wrap js-widget_message_wrap">'
+        f'<div class="tgme_widget_message text_not_supported_wrap js-widget_message" '
+        f'data-post="{channel}/{message_id}" data-view="x">'
+        f'<div class="tgme_widget_message_bubble">'
+        f'<div class="tgme_widget_message_author accent_color"><a class="tgme_widget_message_owner_name" '
+        f'href="https://t.me/{channel}"><span dir="auto">{channel}</span></a></div>'
+        f'<div class="tgme_widget_message_text js-message_text" dir="auto">{text}<br/>'
+        f'<a href="https://t.me/{channel}">@{channel}</a></div>'
+        f'<div class="tgme_widget_message_footer compact js-message_footer">'
+        f'<div class="tgme_widget_message_info short js-message_info">'
+        f'<span class="tgme_widget_message_views">1.2K</span>'
+        f'<span class="tgme_widget_message_meta"><a class="tgme_widget_message_date" '
+        f'href="https://t.me/{channel}/{message_id}"><time datetime="{stamp}" class="time">00:00</time>'
+        f'</a></span></div></div></div></div></div>'
+    )
+
+
+def klines(interval, count=1000, end_ms=None, start_price=3000.0, seed=1):
+    rng = random.Random(seed)
+    step = INTERVALS[interval]
+    end_ms = end_ms or int(time.time() * 1000) // step * step + step
+    price = start_price
+    rows = []
+    for i in range(count):
+        open_time = end_ms - (count - i) * step
+        close = max(1.0, price * (1 + rng.gauss(0, 0.01)))
+        high = max(price, close) * (1 + abs(rng.gauss(0, 0.003)))
+        low = min(price, close) * (1 - abs(rng.gauss(0, 0.003)))
+        rows.append([open_time, f"{price:.2f}", f"{high:.2f}", f"{low:.2f}", f"{close:.2f}",
+                     f"{rng.uniform(1e3, 1e5):.3f}", open_time + step - 1, "0", 100, "0", "0", "0"])
+        price = close
+    return rows
+
+
+def synthetic(posts_per_channel=200):
+    channels = {}
+    for name, channel in CHANNELS.items():
+        factory = liquidation_post if name == "liquidations" else whale_post
+        fixture = ChannelFixture(channel, [])
+        fixture.append(factory, posts_per_channel)
+        channels[channel] = fixture
+    return Fixtures(
+        feeds={slug: rss_feed(slug) for slug in NEWS_FEEDS.values()},
+        channels=channels,
+        ticker={"symbol": "ETHUSDT", "price": "3012.34000000"},
+        klines={interval: klines(interval, seed=i) for i, interval in enumerate(INTERVALS)},
+        global_data={"data": {"market_cap_percentage": {"btc": 54.2, "eth": 16.8}}},
+    )
+
+
+# ===== Записанные фикстуры =====
+def load(directory):
+    """Загрузка записанных фикстур; отсутствующие части заменяются синтетическими"""
+    root = Path(directory)
+    base = synthetic()
+
+    for slug in NEWS_FEEDS.values():
+        path = root / "rss" / f"{slug}.xml"
+        if path.exists():
+            base.feeds[slug] = path.read_bytes()
+
+    for channel in CHANNELS.values():
+        path = root / "channels" / f"{channel}.html"
+        if path.exists():
+            posts = []
+            for chunk in _POST_SPLIT.split(path.read_text(encoding="utf-8")):
+                match = _POST_ID.search(chunk)
+                if match:
+                    posts.append((int(match.group(1)), chunk))
+            base.channels[channel] = ChannelFixture(channel, posts)
+
+    ticker = root / "binance" / "ticker.json"
+    if ticker.exists():
+        base.ticker = json.loads(ticker.read_text())
+    for interval in INTERVALS:
+        path = root / "binance" / f"klines_{interval}.json"
+        if path.exists():
+            base.klines[interval] = json.loads(path.read_text())
+    global_path = root / "coingecko" / "global.json"
+    if global_path.exists():
+        base.global_data = json.loads(global_path.read_text())
+    return base
+
+
+async def record(directory, news_sources, channel_urls):
+    """Запись ответов реальных источников в каталог фикстур"""
+    import aiohttp
+
+    root = Path(directory)
+    for sub in ("rss", "channels", "binance", "coingecko"):
+        (root / sub).mkdir(parents=True, exist_ok=True)
+
+    async def save(session, url, path):
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                if response.status == 200:
+                    path.write_bytes(await response.read())
+                    print(f"записано {path}")
+                else:
+                    print(f"{url}: статус {response.status}")
+        except Exception as e:
+            print(f"{url}: {e}")
+
+    async with aiohttp.ClientSession() as session:
+        for source, url in news_sources.items():
+            await save(session, url, root / "rss" / f"{NEWS_FEEDS.get(source, source)}.xml")
+        for url in channel_urls:
+            channel = url.rstrip("/").rsplit("/", 1)[-1]
+            await save(session, url, root / "channels" / f"{channel}.html")
+        await save(session, "https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT",
+                   root / "binance" / "ticker.json")
+        for interval in INTERVALS:
+            await save(session, f"https://api.binance.com/api/v3/klines?symbol=ETHUSDT&interval={interval}&limit=1000",
+                       root / "binance" / f"klines_{interval}.json")
+        await save(session, "https://api.coingecko.com/api/v3/global", root / "coingecko" / "global.json")
@@ -0,0 +1,489 @@
+"""Ускоренное воспроизведение рыночного события через настоящий конвейер бота.
+
+    python -m benchmarks.replay                                # синтетический обвал на 10% за 6 ч
+    python -m benchmarks.replay --speed 1000 --hours 12 --crash 15
+    python -m benchmarks.replay --prices klines_1m.json        # минутные свечи Binance (/api/v3/klines)
+    python -m benchmarks.replay --price-path stream --json replay.json
+
+События идут по виртуальным часам, которые спешат в speed раз относительно
+реального времени. Цены, свечи, ленты и посты каналов попадают в те же
+функции, что и в работе: monitor_price_changes (или обработчик потока
+цен), append_closed и send_candle_analysis, publish_eth_news,
+publish_liquidations, publish_whale_alerts, flush_digests. Сообщения уходят
+через SendQueue в фейковый Bot API стенда, лимиты Telegram ускорены
+вместе с часами. Число ликвидаций и whale-переводов в минуту растёт с
+величиной движения цены.
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from benchmarks import fixtures as fixture_data
+from benchmarks.run import import_bot, percentile
+from benchmarks.standin import StandIn
+
+# Интервалы задач как в setup_scheduler (режим fixed), сек
+JOB_INTERVALS = {
+    "monitor_price_changes": 60,
+    "flush_digests": 30,
+    "publish_liquidations": 600,
+    "publish_whale_alerts": 900,
+    "publish_eth_news": 7200,
+}
+
+# Задержка анализа свечи после её закрытия, как в CANDLE_SCHEDULES
+CANDLE_ANALYSIS_DELAY = 10
+
+# Виды сообщений в фейковом Bot API по фрагменту текста; порядок важен
+SINK_KINDS = (
+    ("price_alert", "РЕЗКОЕ ИЗМЕНЕНИЕ ЦЕНЫ"),
+    ("liquidation_digest", "ЛИКВИДАЦИИ "),
+    ("liquidation", "ЛИКВИДАЦИЯ "),
+    ("whale_digest", "WHALE ALERT ЗА"),
+    ("whale", "WHALE ALERT!"),
+    ("candle", "свечи"),
+)
+
+CRASH_HEADLINES = (
+    "Ethereum price plunges {pct}% as long liquidations top ${size}M",
+    "ETH price plunges {pct}% as long liquidations top ${size}M",
+    "Ether price plunges {pct}%, long liquidations top ${size}M",
+)
+
+
+class VirtualClock:
+    """Виртуальное время: start + прошедшее реальное время × speed"""
+
+    def __init__(self, start, speed):
+        self.start = start
+        self.speed = speed
+        self._real_start = time.monotonic()
+
+    def time(self):
+        return self.start + (time.monotonic() - self._real_start) * self.speed
+
+    def real_delay(self, ts):
+        """Реальных секунд до виртуального момента ts"""
+        return max(0.0, (ts - self.time()) / self.speed)
+
+
+# ===== Сценарий =====
+def synthetic_prices(start, hours, crash_pct, crash_at=0.5, crash_minutes=10, base=3000.0, seed=1):
+    """Секундные цены: случайное блуждание, обвал на crash_pct% за crash_minutes и отскок на 40% падения"""
+    rng = random.Random(seed)
+    crash_start = start + hours * 3600 * crash_at
+    crash_end = crash_start + crash_minutes * 60
+    fall = math.log(1 - crash_pct / 100) / (crash_minutes * 60)
+    rebound = -0.4 * math.log(1 - crash_pct / 100) / 1800
+    price = base
+    ticks = []
+    for second in range(int(hours * 3600)):
+        ts = start + second
+        drift = fall if crash_start <= ts < crash_end else rebound if crash_end <= ts < crash_end + 1800 else 0.0
+        price *= math.exp(drift + rng.gauss(0, 0.0002))
+        ticks.append((ts, price))
+    return ticks
+
+
+def recorded_prices(path, start):
+    """Цены закрытия минутных свечей Binance, сдвинутые так, чтобы первая пришлась на start"""
+    with open(path, encoding="utf-8") as f:
+        rows = json.load(f)
+    offset = start - rows[0][6] / 1000
+    return [(row[6] / 1000 + offset, float(row[4])) for row in rows]
+
+
+def minute_moves(ticks):
+    """[(начало минуты, изменение цены за минуту в %, цена закрытия)]"""
+    moves = []
+    for minute, group in itertools.groupby(ticks, key=lambda tick: int(tick[0] // 60) * 60):
+        group = list(group)
+        first, last = group[0][1], group[-1][1]
+        moves.append((minute, (last - first) / first * 100, last))
+    return moves
+
+
+def news_feed(name, items):
+    """RSS-лента из [(заголовок, ссылка, время публикации)], свежие сверху"""
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel><title>{name}</title>']
+    for title, link, ts in sorted(items, key=lambda item: item[2], reverse=True):
+        published = format_datetime(datetime.fromtimestamp(ts, timezone.utc), usegmt=True)
+        parts.append(f"<item><title><![CDATA[{title}]]></title><link>{link}</link>"
+                     f"<pubDate>{published}</pubDate></item>")
+    parts.append("</channel></rss>")
+    return "".join(parts).encode()
+
+
+def news_items(start, hours, moves, crash_pct, seed=1):
+    """Обычные новости раз в час на источник и заметки трёх источников об обвале"""
+    rng = random.Random(seed)
+    items = {source: [] for source in fixture_data.NEWS_FEEDS}
+    for source, slug in fixture_data.NEWS_FEEDS.items():
+        for hour in range(int(hours)):
+            title = " ".join(rng.choice(fixture_data._WORDS) for _ in range(8)).capitalize()
+            items[source].append((title, f"https://example.com/{slug}/{hour}", start + hour * 3600 + rng.uniform(0, 3600)))
+
+    # Об обвале пишут через несколько минут после самой резкой минуты
+    worst = min(moves, key=lambda move: move[1])
+    if crash_pct and worst[1] < 0:
+        for i, source in enumerate(list(fixture_data.NEWS_FEEDS)[:len(CRASH_HEADLINES)]):
+            title = CRASH_HEADLINES[i].format(pct=round(crash_pct), size=250)
+            slug = fixture_data.NEWS_FEEDS[source]
+            items[source].append((title, f"https://example.com/{slug}/crash", worst[0] + 300 + 240 * i))
+    return items
+
+
+def liquidation_text(side, size_k, price):
+    return f"Binance: Liquidated on #ETH {side} ${size_k:.1f}K at ${price:,.2f}"
+
+
+def whale_text(amount, price, rng):
+    return (f"🚨 {amount:,.0f} #ETH ({amount * price:,.0f} USD) transferred from "
+            f"{rng.choice(['#Binance', 'unknown wallet', '#Coinbase'])} to "
+            f"{rng.choice(['unknown wallet', '#Kraken', '#OKX'])}")
+
+
+def channel_posts(moves, liquidations_per_pct, seed=1):
+    """Посты каналов по минутам: [(минута, [текст ликвидации], [текст whale])]"""
+    rng = random.Random(seed)
+    minutes = []
+    for minute, change, price in moves:
+        # Базовый поток плюс всплеск, пропорциональный движению: падение ликвидирует лонги, рост — шорты
+        count = rng.randint(0, 3) + int(abs(change) * liquidations_per_pct)
+        side = "Long" if change < 0 else "Short"
+        liquidations = [
+            liquidation_text(side if rng.random() < 0.9 else ("Short" if side == "Long" else "Long"),
+                             rng.lognormvariate(3.5, 1.2), price * (1 + rng.gauss(0, 0.001)))
+            for _ in range(count)
+        ]
+        whales = [whale_text(rng.uniform(1_000, 40_000), price, rng)
+                  for _ in range((rng.random() < 0.1) + int(abs(change) * 5))]
+        minutes.append((minute, liquidations, whales))
+    return minutes
+
+
+# ===== Воспроизведение =====
+class Replay:
+    def __init__(self, bot, standin, data, clock, symbol, price_path):
+        self.bot = bot
+        self.standin = standin
+        self.data = data
+        self.clock = clock
+        self.symbol = symbol
+        self.price_path = price_path
+        self.stages = {}
+        self.peak_depth = 0
+        self._events = []
+        self._seq = itertools.count()
+
+    def at(self, ts, stage, func):
+        heapq.heappush(self._events, (ts, next(self._seq), stage, func))
+
+    def every(self, start, end, interval, stage, func):
+        ts = start + interval
+        while ts <= end:
+            self.at(ts, stage, func)
+            ts += interval
+
+    # ----- Источники -----
+    def schedule_prices(self, ticks):
+        stream = f"{self.symbol.lower()}@miniTicker"
+        for ts, price in ticks:
+            if self.price_path == "stream":
+                payload = json.dumps({"stream": stream, "data": {
+                    "e": "24hrMiniTicker", "E": int(ts * 1000), "s": self.symbol, "c": f"{price:.2f}",
+                }})
+                self.at(ts, "tick", lambda payload=payload: self.bot.price_stream._handle_message(payload))
+            else:
+                self.at(ts, "tick", lambda price=price: self._set_ticker(price))
+
+    async def _set_ticker(self, price):
+        # monitor_price_changes заберёт цену через /api/v3/ticker/price стенда
+        self.data.ticker["price"] = f"{price:.8f}"
+
+    def schedule_klines(self, ticks, intervals):
+        for interval in intervals:
+            step = fixture_data.INTERVALS[interval] // 1000
+            for open_time, group in itertools.groupby(ticks, key=lambda tick: int(tick[0] // step) * step):
+                prices = [price for _, price in group]
+                close_ts = open_time + step
+                if close_ts > ticks[-1][0]:
+                    break
+                row = [open_time * 1000, f"{prices[0]:.2f}", f"{max(prices):.2f}", f"{min(prices):.2f}",
+                       f"{prices[-1]:.2f}", f"{len(prices):.3f}", close_ts * 1000 - 1, "0", len(prices), "0", "0", "0"]
+                self.at(close_ts, "kline", lambda interval=interval, row=row: self._close_kline(interval, row))
+                self.at(close_ts + CANDLE_ANALYSIS_DELAY, "send_candle_analysis",
+                        lambda interval=interval: self.bot.send_candle_analysis(interval, self.symbol))
+
+    async def _close_kline(self, interval, row):
+        # Свеча становится видна и REST стенда, и хранилищу — как из потока Binance
+        self.data.klines[interval].append(row)
+        self.bot.candle_store.append_closed(self.symbol, interval, row)
+
+    def schedule_posts(self, minutes):
+        liquidations = self.data.channels[fixture_data.CHANNELS["liquidations"]]
+        whales = self.data.channels[fixture_data.CHANNELS["whale_alert"]]
+        for minute, liquidation_texts, whale_texts in minutes:
+            if liquidation_texts or whale_texts:
+                self.at(minute + 60, "channel_posts", lambda l=liquidation_texts, w=whale_texts: self._post(
+                    (liquidations, l), (whales, w)))
+
+    async def _post(self, *batches):
+        for fixture, texts in batches:
+            for text in texts:
+                fixture.append(lambda channel, message_id, text=text: fixture_data.channel_post(channel, message_id, text))
+
+    def schedule_news(self, items, start, end):
+        async def publish_feeds_and_news():
+            now = self.clock.time()
+            for source, slug in fixture_data.NEWS_FEEDS.items():
+                self.standin.set_feed(slug, news_feed(source, [item for item in items[source] if item[2] <= now]))
+            return await self.bot.publish_eth_news()
+        self.every(start, end, JOB_INTERVALS["publish_eth_news"], "publish_eth_news", publish_feeds_and_news)
+
+    def schedule_jobs(self, start, end):
+        for name in ("monitor_price_changes", "flush_digests", "publish_liquidations", "publish_whale_alerts"):
+            self.every(start, end, JOB_INTERVALS[name], name, getattr(self.bot, name))
+
+    # ----- Выполнение -----
+    async def run(self):
+        send_queue = self.bot.send_queue
+        while self._events:
+            ts, _, stage, func = heapq.heappop(self._events)
+            await asyncio.sleep(self.clock.real_delay(ts))
+            stats = self.stages.setdefault(stage, {"durations": [], "lags": [], "errors": 0})
+            stats["lags"].append(max(0.0, self.clock.time() - ts))
+            started = time.perf_counter()
+            try:
+                await func()
+            except Exception as e:
+                stats["errors"] += 1
+                logging.error(f"Воспроизведение: ошибка {stage}: {e}")
+            stats["durations"].append(time.perf_counter() - started)
+            self.peak_depth = max(self.peak_depth, send_queue.depth)
+
+    def stage_report(self, wall):
+        report = {}
+        for stage, stats in sorted(self.stages.items()):
+            durations, lags = sorted(stats["durations"]), sorted(stats["lags"])
+            busy = sum(durations)
+            report[stage] = {
+                "count": len(durations),
+                "errors": stats["errors"],
+                "p50_ms": round(percentile(durations, 0.50) * 1000, 3),
+                "p99_ms": round(percentile(durations, 0.99) * 1000, 3),
+                "max_ms": round(durations[-1] * 1000, 3),
+                "ops_per_sec": round(len(durations) / busy, 1) if busy else None,
+                "busy_share": round(busy / wall, 3),
+                "lag_p99_s": round(percentile(lags, 0.99), 1),
+                "lag_max_s": round(lags[-1], 1),
+            }
+        return report
+
+
+def use_clock(bot, clock):
+    """Виртуальное время для окон цен, сводок и кэша рыночных данных"""
+    for engine in bot.price_engines.values():
+        engine.clock = clock.time
+    for digest in (bot.liquidation_digest, bot.whale_digest):
+        digest.clock = clock.time
+    bot.market_cache.clock = clock.time
+
+
+def classify(texts):
+    counts = {}
+    for text in texts:
+        kind = next((kind for kind, marker in SINK_KINDS if marker in text), "news")
+        counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+async def replay(args):
+    speed = args.speed
+    # Окно заканчивается в текущем часе, чтобы свечи стенда и хранилища не опережали реальное время
+    end = int(time.time() // 3600) * 3600
+    start = end - int(args.hours * 3600)
+
+    ticks = recorded_prices(args.prices, start) if args.prices else synthetic_prices(
+        start, args.hours, args.crash, crash_at=args.crash_at, crash_minutes=args.crash_minutes, seed=args.seed)
+    end = ticks[-1][0]
+    moves = minute_moves(ticks)
+
+    data = fixture_data.synthetic(posts_per_channel=20)
+    standin = StandIn(data)
+    await standin.start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = import_bot(standin, workdir)
+        symbol = bot.SYMBOLS[0].symbol
+        intervals = bot.SYMBOL_CONFIG[symbol].timeframes
+        for interval in intervals:
+            step = fixture_data.INTERVALS[interval]
+            data.klines[interval] = fixture_data.klines(
+                interval, count=500, end_ms=start * 1000 // step * step, start_price=ticks[0][1], seed=args.seed)
+
+        # Лимиты Telegram ускорены вместе с часами
+        from send_queue import TokenBucket
+        bot.send_queue.global_bucket = TokenBucket(25 * speed, 25)
+        bot.send_queue.chat_rate = 20 / 60 * speed
+        bot.send_queue.chat_burst = 3
+
+        await bot.http.start()
+        await bot.send_queue.start()
+        try:
+            # Прогрев: история свечей, курсоры каналов; опубликованное до начала окна не учитывается
+            for interval in intervals:
+                await bot.candle_store.sync(symbol, interval)
+            for url in (bot.LIQUIDATIONS_CHANNEL_URL, bot.WHALE_ALERT_CHANNEL_URL):
+                await bot.fetch_telegram_channel(url)
+            await bot.send_queue.join()
+            sent_before = len(standin.sent)
+            stats_before = dict(bot.send_queue.stats)
+            bot.send_queue.latencies.clear()
+
+            clock = VirtualClock(start, speed)
+            use_clock(bot, clock)
+            # В режиме stream monitor_price_changes молчит, как при живом WebSocket
+            bot.price_stream.connected = args.price_path == "stream"
+
+            runner = Replay(bot, standin, data, clock, symbol, args.price_path)
+            runner.schedule_prices(ticks)
+            runner.schedule_klines(ticks, intervals)
+            posts = channel_posts(moves, args.liquidations_per_pct, seed=args.seed)
+            runner.schedule_posts(posts)
+            runner.schedule_news(news_items(start, args.hours, moves, args.crash if not args.prices else 0,
+                                            seed=args.seed), start, end)
+            runner.schedule_jobs(start, end)
+
+            print(f"Воспроизведение {args.hours} ч x{speed:g}: тиков {len(ticks)}, "
+                  f"ликвидаций {sum(len(m[1]) for m in posts)}, whale {sum(len(m[2]) for m in posts)}", flush=True)
+            real_started = time.perf_counter()
+            await runner.run()
+            wall = time.perf_counter() - real_started
+
+            # Остаток очереди отправки досылается в том же ускоренном темпе
+            drain_started = clock.time()
+            try:
+                await asyncio.wait_for(bot.send_queue.join(), args.drain_timeout)
+                drained = True
+            except asyncio.TimeoutError:
+                drained = False
+            drain = clock.time() - drain_started
+            backlog = bot.send_queue.depth
+        finally:
+            await bot.send_queue.stop(timeout=0)
+            await bot.http.close()
+            bot.parse_pool.close()
+            bot.candle_store.close()
+            bot.message_cache.close()
+            bot.news_clusters.close()
+            await bot.bot.session.close()
+            await standin.stop()
+
+    sent = standin.sent[sent_before:]
+    latencies = sorted(latency * speed for latency in bot.send_queue.latencies)
+    stats = {key: value - stats_before.get(key, 0) for key, value in bot.send_queue.stats.items()}
+    channel_backlog = {
+        name: (data.channels[channel].posts[-1][0] - bot.channel_scraper.cursors.get(url, 0))
+        for name, channel, url in (
+            ("liquidations", fixture_data.CHANNELS["liquidations"], bot.LIQUIDATIONS_CHANNEL_URL),
+            ("whale_alert", fixture_data.CHANNELS["whale_alert"], bot.WHALE_ALERT_CHANNEL_URL),
+        )
+    }
+    prices = [price for _, price in ticks]
+    return {
+        "virtual_hours": args.hours,
+        "speed": speed,
+        "effective_speed": round((end - start) / wall, 1),
+        "wall_seconds": round(wall, 2),
+        "price_path": args.price_path,
+        "price_range": [round(min(prices), 2), round(max(prices), 2)],
+        "input": {
+            "ticks": len(ticks),
+            "liquidation_posts": sum(len(m[1]) for m in posts),
+            "whale_posts": sum(len(m[2]) for m in posts),
+        },
+        "alerts": {
+            "price": sum(engine.stats["alerts"] for engine in bot.price_engines.values()),
+            "liquidations": bot.liquidation_digest.stats,
+            "whales": bot.whale_digest.stats,
+        },
+        "channel_backlog_posts": channel_backlog,
+        "send": {
+            "enqueued": stats["enqueued"],
+            "sent": stats["sent"],
+            "failed": stats["failed"],
+            "peak_depth": runner.peak_depth,
+            "backlog_after_drain": backlog,
+            "drained": drained,
+            "drain_virtual_seconds": round(drain, 1),
+            "latency_virtual_s": {
+                "p50": round(percentile(latencies, 0.50), 1),
+                "p95": round(percentile(latencies, 0.95), 1),
+                "max": round(latencies[-1], 1),
+            } if latencies else None,
+            "bytes": sum(len(text.encode()) for text in sent),
+            "by_kind": classify(sent),
+        },
+        "stages": runner.stage_report(wall),
+    }
+
+
+def print_report(report):
+    print(f"Окно {report['virtual_hours']} ч за {report['wall_seconds']} с "
+          f"(x{report['effective_speed']}), цены {report['price_range'][0]}–{report['price_range'][1]}")
+    print(f"Вход: {report['input']}")
+    alerts = report["alerts"]
+    print(f"Сигналы: цена {alerts['price']}, ликвидации {alerts['liquidations']}, whale {alerts['whales']}")
+    print(f"Непрочитанных постов каналов: {report['channel_backlog_posts']}")
+    send = report["send"]
+    print(f"Отправка: поставлено {send['enqueued']}, отправлено {send['sent']}, ошибок {send['failed']}, "
+          f"пик очереди {send['peak_depth']}, остаток {send['backlog_after_drain']}, "
+          f"дослано за {send['drain_virtual_seconds']} вирт. с, {send['bytes'] // 1024} KB")
+    print(f"  задержка (вирт. с): {send['latency_virtual_s']}")
+    print(f"  по видам: {send['by_kind']}")
+    for stage, result in report["stages"].items():
+        ops = f"{result['ops_per_sec']:>10.1f} op/s" if result["ops_per_sec"] else f"{'—':>15}"
+        print(f"{stage:<24} n {result['count']:>6}  p50 {result['p50_ms']:>8.3f} ms  p99 {result['p99_ms']:>8.3f}  "
+              f"max {result['max_ms']:>8.3f}  {ops}  отставание p99 {result['lag_p99_s']:>6.1f} с  "
+              f"ошибок {result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ускоренное воспроизведение рыночного события")
+    parser.add_argument("--speed", type=float, default=1000, help="во сколько раз виртуальное время быстрее реального")
+    parser.add_argument("--hours", type=float, default=6, help="длительность окна, виртуальных часов")
+    parser.add_argument("--crash", type=float, default=10, help="глубина синтетического обвала, %%")
+    parser.add_argument("--crash-at", type=float, default=0.5, help="начало обвала, доля окна")
+    parser.add_argument("--crash-minutes", type=float, default=10, help="длительность обвала, мин")
+    parser.add_argument("--prices", metavar="PATH", help="минутные свечи Binance в JSON вместо синтетических цен")
+    parser.add_argument("--price-path", choices=("rest", "stream"), default="rest",
+                        help="rest: monitor_price_changes раз в минуту; stream: каждый тик через обработчик потока")
+    parser.add_argument("--liquidations-per-pct", type=float, default=400,
+                        help="ликвидаций в минуту на 1%% движения цены за минуту")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="ожидание отправки остатка очереди, реальных с")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="сохранить отчёт в JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if any(result["errors"] for result in report["stages"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Офлайн-бенчмарк горячих путей бота на локальном стенде.
+
+    python -m benchmarks.run                          # синтетические фикстуры
+    python -m benchmarks.run --fixtures fixtures/     # записанные фикстуры
+    python -m benchmarks.run --record fixtures/       # записать ответы реальных источников
+    python -m benchmarks.run --save-baseline base.json
+    python -m benchmarks.run --compare base.json      # код выхода 1 при регрессии
+    python -m benchmarks.run --loop-lag --only none   # задержка event loop при разборе: inline и пулы
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import fixtures as fixture_data
+from benchmarks.standin import StandIn
+
+# Метрики, по которым сравнивается с базовой линией
+COMPARED = ("p50_ms", "p90_ms", "alloc_peak_kb")
+
+# Период проверки задержки event loop в замере --loop-lag, сек
+LAG_INTERVAL = 0.005
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS отдаёт байты, Linux — килобайты
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def import_bot(standin, workdir):
+    """Импорт bot.py с окружением, направленным на стенд"""
+    os.environ.update({
+        "API_TOKEN": "123456:benchmark",
+        "ADMIN_CHAT_ID": "1",
+        "CHANNEL_ID": "-1001",
+        "BINANCE_API_URL": standin.base_url,
+        "COINGECKO_API_URL": standin.base_url,
+        "TELEGRAM_API_URL": standin.base_url,
+        "CANDLE_DB_PATH": os.path.join(workdir, "candles.db"),
+        "DEDUP_DB_PATH": os.path.join(workdir, "dedup.db"),
+        "PRICE_STREAM": "0",
+        "CHANNEL_INGEST_MODE": "scrape",
+    })
+    import bot
+    logging.getLogger().setLevel(logging.WARNING)
+
+    bot.NEWS_SOURCES = {
+        source: standin.feed_url(slug) for source, slug in fixture_data.NEWS_FEEDS.items()
+    }
+    bot.LIQUIDATIONS_CHANNEL_URL = standin.channel_url(fixture_data.CHANNELS["liquidations"])
+    bot.WHALE_ALERT_CHANNEL_URL = standin.channel_url(fixture_data.CHANNELS["whale_alert"])
+
+    # Лимиты Bot API не должны влиять на замер
+    from send_queue import TokenBucket
+    bot.send_queue.global_bucket = TokenBucket(1e9, 1e9)
+    bot.send_queue.chat_rate = 1e9
+    bot.send_queue.chat_burst = 1e9
+    return bot
+
+
+def scenarios(bot, standin, data):
+    """Сценарии: имя -> (подготовка перед итерацией, замеряемая корутина)"""
+    from indicators import compute_indicators
+
+    liquidations = data.channels[fixture_data.CHANNELS["liquidations"]]
+    whales = data.channels[fixture_data.CHANNELS["whale_alert"]]
+    history = {}
+
+    def reset_feeds():
+        bot.feed_validators.clear()
+
+    def reset_cursors():
+        bot.channel_scraper.cursors.clear()
+
+    def new_posts():
+        liquidations.append(fixture_data.liquidation_post, 5)
+        whales.append(fixture_data.whale_post, 5)
+
+    async def job(func, *args):
+        await func(*args)
+        await bot.send_queue.join()
+
+    async def analyze():
+        candles = history.get("1h")
+        if candles is None:
+            candles = history["1h"] = await bot.get_candle_history("1h", "ETHUSDT")
+        last = [candles[name][-1] for name in ("open_time", "open", "high", "low", "close")]
+        bot.analyze_candle(last, compute_indicators(candles))
+
+    items = [
+        ("fetch_crypto_news:cold", reset_feeds, bot.fetch_crypto_news),
+        ("fetch_crypto_news:304", None, bot.fetch_crypto_news),
+        ("fetch_telegram_channel:cold", reset_cursors,
+         lambda: bot.fetch_telegram_channel(bot.LIQUIDATIONS_CHANNEL_URL)),
+        ("fetch_telegram_channel:incremental", new_posts,
+         lambda: bot.fetch_telegram_channel(bot.LIQUIDATIONS_CHANNEL_URL)),
+        ("analyze_candle", None, analyze),
+        ("job:publish_eth_news", reset_feeds, lambda: job(bot.publish_eth_news)),
+    ]
+    for timeframe in ("1h", "4h", "1d", "1w"):
+        items.append((f"job:send_candle_analysis:{timeframe}", None,
+                      lambda timeframe=timeframe: job(bot.send_candle_analysis, timeframe, "ETHUSDT")))
+    items += [
+        ("job:send_altseason_indicator", None, lambda: job(bot.send_altseason_indicator)),
+        ("job:monitor_price_changes", None, lambda: job(bot.monitor_price_changes)),
+        ("job:publish_liquidations", new_posts, lambda: job(bot.publish_liquidations)),
+        ("job:publish_whale_alerts", new_posts, lambda: job(bot.publish_whale_alerts)),
+        ("job:flush_digests", None, lambda: job(bot.flush_digests)),
+        ("job:compact_message_cache", None, lambda: job(bot.compact_message_cache)),
+    ]
+    return items
+
+
+async def measure(prepare, func, iterations, alloc_iterations):
+    # Прогрев: соединения, кэши форматов дат, первичная загрузка свечей
+    if prepare:
+        prepare()
+    await func()
+
+    durations = []
+    for _ in range(iterations):
+        if prepare:
+            prepare()
+        started = time.perf_counter()
+        await func()
+        durations.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for _ in range(alloc_iterations):
+        if prepare:
+            prepare()
+        await func()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ordered = sorted(durations)
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "ops_per_sec": round(len(durations) / sum(durations), 1),
+        "alloc_peak_kb": round(alloc_peak / 1024, 1),
+        "rss_kb": peak_rss_kb(),
+    }
+
+
+async def loop_lag(data, kinds, duration, concurrency):
+    """Задержка event loop, пока concurrency задач непрерывно разбирают полные страницы и ленты"""
+    from channel_scraper import parse_channel_page
+    from parse_pool import ParsePool
+    from rss_parser import parse_feed
+
+    channel = data.channels[fixture_data.CHANNELS["liquidations"]]
+    page = fixture_data.ChannelFixture(channel.channel, channel.posts, page_size=len(channel.posts)).page()
+    feed = max(data.feeds.values(), key=len)
+    results = {}
+
+    for kind in kinds:
+        # inline_below=0: в пул уходит каждый разбор
+        pool = ParsePool(kind, workers=2, inline_below=0)
+        # Прогрев: запуск потоков или процессов пула
+        await pool.run("channel", parse_channel_page, page)
+        lags = []
+        parses = 0
+        stop = asyncio.Event()
+
+        async def sampler():
+            loop = asyncio.get_running_loop()
+            while not stop.is_set():
+                expected = loop.time() + LAG_INTERVAL
+                await asyncio.sleep(LAG_INTERVAL)
+                lags.append(max(0.0, loop.time() - expected))
+
+        async def worker():
+            nonlocal parses
+            while not stop.is_set():
+                await pool.run("channel", parse_channel_page, page)
+                await pool.run("rss", parse_feed, feed, 1000)
+                parses += 2
+                # Без этого inline-разбор никогда не отдаёт управление
+                await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(sampler())]
+        tasks += [asyncio.create_task(worker()) for _ in range(concurrency)]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        pool.close()
+
+        ordered = sorted(lags)
+        results[kind] = {
+            "samples": len(ordered),
+            "lag_p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "lag_p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "lag_max_ms": round(ordered[-1] * 1000, 3),
+            "parses_per_sec": round(parses / duration, 1),
+        }
+        print(f"{'loop_lag:' + kind:<42} lag p50 {results[kind]['lag_p50_ms']:>8.3f} ms  "
+              f"p99 {results[kind]['lag_p99_ms']:>8.3f}  max {results[kind]['lag_max_ms']:>8.3f}  "
+              f"{results[kind]['parses_per_sec']:>8.1f} разборов/с (страница {len(page) // 1024} KB, "
+              f"лента {len(feed) // 1024} KB)", flush=True)
+    return results
+
+
+async def run(args):
+    data = fixture_data.load(args.fixtures) if args.fixtures else fixture_data.synthetic()
+    standin = StandIn(data, latency=args.latency / 1000)
+    await standin.start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = import_bot(standin, workdir)
+        await bot.http.start()
+        await bot.send_queue.start()
+        results = {}
+        try:
+            for name, prepare, func in scenarios(bot, standin, data):
+                if args.only and not any(part in name for part in args.only):
+                    continue
+                results[name] = await measure(prepare, func, args.iterations, args.alloc_iterations)
+                print(format_row(name, results[name]), flush=True)
+            lag = await loop_lag(data, args.loop_lag, args.lag_duration, args.lag_concurrency) if args.loop_lag else {}
+        finally:
+            await bot.send_queue.stop()
+            await bot.http.close()
+            bot.parse_pool.close()
+            bot.candle_store.close()
+            bot.message_cache.close()
+            bot.news_clusters.close()
+            await bot.bot.session.close()
+            await standin.stop()
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fixtures": args.fixtures or "synthetic",
+        "latency_ms": args.latency,
+        "http_reuse_ratio": bot.http.reuse_ratio,
+        "messages_sent": len(standin.sent),
+        "peak_rss_kb": peak_rss_kb(),
+        "scenarios": results,
+        "loop_lag": lag,
+    }
+
+
+def format_row(name, result):
+    return (f"{name:<42} p50 {result['p50_ms']:>9.3f} ms  p90 {result['p90_ms']:>9.3f}  "
+            f"p99 {result['p99_ms']:>9.3f}  max {result['max_ms']:>9.3f}  "
+            f"{result['ops_per_sec']:>9.1f} op/s  alloc {result['alloc_peak_kb']:>8.1f} KB")
+
+
+def compare(report, baseline, threshold):
+    """Регрессии относительно базовой линии: рост метрики больше threshold (доля)"""
+    regressions = []
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for key in COMPARED:
+            old, new = base.get(key), result.get(key)
+            # Доли миллисекунды и килобайта — шум, а не регрессия
+            if not old or new is None or new - old < 0.05:
+                continue
+            change = new / old - 1
+            if change > threshold:
+                regressions.append(f"{name} {key}: {old} -> {new} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк бота на локальном стенде")
+    parser.add_argument("--fixtures", help="каталог записанных фикстур (по умолчанию синтетические)")
+    parser.add_argument("--record", metavar="DIR", help="записать ответы реальных источников и выйти")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--alloc-iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа стенда, мс")
+    parser.add_argument("--only", nargs="*", help="запускать только сценарии, содержащие подстроку")
+    parser.add_argument("--loop-lag", nargs="*", choices=("inline", "thread", "process"),
+                        help="замерить задержку event loop при разборе (по умолчанию все способы)")
+    parser.add_argument("--lag-duration", type=float, default=3.0, help="длительность замера задержки, с")
+    parser.add_argument("--lag-concurrency", type=int, default=4, help="одновременных разборов в замере")
+    parser.add_argument("--json", metavar="PATH", help="сохранить отчёт в JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="сохранить отчёт как базовую линию")
+    parser.add_argument("--compare", metavar="PATH", help="сравнить с базовой линией")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимый рост метрики (доля)")
+    args = parser.parse_args()
+    if args.loop_lag == []:
+        args.loop_lag = ["inline", "thread", "process"]
+
+    if args.record:
+        # Для записи нужны только адреса источников из bot.py
+        for name, value in (("API_TOKEN", "123456:record"), ("ADMIN_CHAT_ID", "1"), ("CHANNEL_ID", "-1001")):
+            os.environ.setdefault(name, value)
+        import bot
+        urls = [bot.LIQUIDATIONS_CHANNEL_URL, bot.WHALE_ALERT_CHANNEL_URL]
+        asyncio.run(fixture_data.record(args.record, bot.NEWS_SOURCES, urls))
+        return
+
+    report = asyncio.run(run(args))
+    print(f"HTTP reuse: {report['http_reuse_ratio']}, сообщений отправлено: {report['messages_sent']}, "
+          f"пиковый RSS: {report['peak_rss_kb']} KB")
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("Регрессии:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Локальный aiohttp-сервер, подменяющий RSS, t.me/s, Binance (REST и WebSocket), CoinGecko и Bot API"""
+import asyncio
+import hashlib
+import json
+import time
+
+from aiohttp import web
+
+
+class StandIn:
+    def __init__(self, fixtures, host="127.0.0.1", port=0, latency=0.0):
+        self.fixtures = fixtures
+        self.host = host
+        self.port = port
+        self.latency = latency  # Искусственная задержка ответа, сек
+        self.sent = []          # Вызовы sendMessage фейкового Bot API
+        self.subscriptions = []  # Потоки из SUBSCRIBE, по списку на каждое WebSocket-подключение
+        self._sockets = set()
+        self.requests = 0
+        self._runner = None
+        self._message_id = 0
+        self._etags = {
+            slug: f'"{hashlib.md5(body).hexdigest()}"' for slug, body in fixtures.feeds.items()
+        }
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def feed_url(self, slug):
+        return f"{self.base_url}/rss/{slug}"
+
+    def channel_url(self, channel):
+        return f"{self.base_url}/s/{channel}"
+
+    @property
+    def ws_url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def set_feed(self, slug, body):
+        """Замена содержимого ленты (с новым ETag) во время работы стенда"""
+        self.fixtures.feeds[slug] = body
+        self._etags[slug] = f'"{hashlib.md5(body).hexdigest()}"'
+
+    async def start(self):
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/rss/{slug}", self.rss)
+        app.router.add_get("/s/{channel}", self.channel)
+        app.router.add_get("/api/v3/ticker/price", self.ticker)
+        app.router.add_get("/api/v3/klines", self.klines)
+        app.router.add_get("/api/v3/global", self.global_data)
+        app.router.add_get("/stream", self.stream)
+        app.router.add_post("/bot{token}/{method}", self.bot_api)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.drop_streams()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    async def rss(self, request):
+        slug = request.match_info["slug"]
+        body = self.fixtures.feeds.get(slug)
+        if body is None:
+            raise web.HTTPNotFound()
+        etag = self._etags[slug]
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, content_type="application/rss+xml", charset="utf-8",
+                            headers={"ETag": etag})
+
+    async def channel(self, request):
+        fixture = self.fixtures.channels.get(request.match_info["channel"])
+        if fixture is None:
+            raise web.HTTPNotFound()
+        after = request.query.get("after")
+        page = fixture.page(int(after) if after else None)
+        return web.Response(body=page, content_type="text/html", charset="utf-8")
+
+    async def ticker(self, request):
+        symbols = request.query.get("symbols")
+        if symbols:
+            # Пакетный запрос: одна и та же записанная цена для каждой пары
+            price = self.fixtures.ticker["price"]
+            return web.json_response([{"symbol": symbol, "price": price} for symbol in json.loads(symbols)])
+        return web.json_response(self.fixtures.ticker)
+
+    async def klines(self, request):
+        rows = self.fixtures.klines.get(request.query.get("interval"))
+        if rows is None:
+            raise web.HTTPBadRequest()
+        start = request.query.get("startTime")
+        if start:
+            rows = [row for row in rows if row[0] >= int(start)]
+        limit = int(request.query.get("limit", 500))
+        # Без startTime Binance отдаёт последние limit свечей
+        rows = rows[:limit] if start else rows[-limit:]
+        return web.json_response(rows)
+
+    async def stream(self, request):
+        """Combined stream Binance: принимает SUBSCRIBE, события рассылает push()"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        try:
+            async for msg in ws:
+                try:
+                    payload = json.loads(msg.data)
+                except (TypeError, ValueError):
+                    continue
+                if payload.get("method") == "SUBSCRIBE":
+                    self.subscriptions.append(list(payload.get("params", [])))
+                    await ws.send_json({"result": None, "id": payload.get("id")})
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+    @property
+    def stream_clients(self):
+        return len(self._sockets)
+
+    async def push(self, stream, data):
+        """Событие потока всем подключённым клиентам в формате combined stream"""
+        for ws in list(self._sockets):
+            await ws.send_json({"stream": stream, "data": data})
+
+    async def drop_streams(self):
+        """Разрыв всех WebSocket-подключений со стороны сервера"""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def global_data(self, request):
+        return web.json_response(self.fixtures.global_data)
+
+    async def bot_api(self, request):
+        method = request.match_info["method"]
+        data = await request.post()
+        if method == "sendMessage":
+            self._message_id += 1
+            self.sent.append(data.get("text", ""))
+            chat_id = int(data.get("chat_id", 0))
+            result = {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "channel" if chat_id < 0 else "private"},
+                "text": data.get("text", ""),
+            }
+        elif method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        else:
+            result = True
+        return web.Response(text=json.dumps({"ok": True, "result": result}), content_type="application/json")
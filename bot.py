@@ -1,11 +1,21 @@
 import os
 import asyncio
+import functools
+import hmac
 import logging
-import aiohttp
+import math
 import re
 import json
+import signal
+import socket
 import sys
+import time
+from types import SimpleNamespace
 from datetime import datetime, timezone, timedelta
+
+# Отсчёт времени запуска: импорты ниже — заметная его часть
+STARTUP_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
 
 # Импорт всех необходимых классов
@@ -13,13 +23,37 @@ from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
 from aiogram.exceptions import TelegramForbiddenError
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from bs4 import BeautifulSoup
-from cachetools import TTLCache
+from apscheduler.triggers.interval import IntervalTrigger
 from aiohttp import web
 
+from http_client import HttpClient, SourcePolicy, deadline
+from circuit_breaker import BreakerPolicy, CircuitOpenError
+from rss_parser import parse_feed
+from price_engine import PriceEngine, PriceStream, parse_windows
+from symbols import load_symbols
+from candle_store import CandleStore
+from send_queue import SendQueue, PRIORITY_ALERT, PRIORITY_NORMAL, PRIORITY_NEWS
+from dedup_store import DedupStore
+from news_clusters import NewsClusterIndex
+from coordination import LeaderElector, open_backend
+from adaptive_scheduler import AdaptivePoller, PollPolicy
+from channel_scraper import ChannelScraper
+from channel_ingest import ChannelIngest, TelethonChannelSource
+from market_events import DigestAggregator, format_usd, parse_liquidation, parse_whale
+from market_cache import MarketDataCache
+from parse_pool import ParsePool
+from metrics import REGISTRY, Counter, Histogram, monitor_loop_lag
+from profiling import SamplingProfiler, SlowCallbackMonitor, StartupTimer, dump_tasks
+
+startup = StartupTimer(STARTUP_STARTED)
+startup.mark("imports")
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -43,19 +77,172 @@ except KeyError as e:
 LIQUIDATIONS_CHANNEL_URL = "https://t.me/s/BinanceLiquidations"
 WHALE_ALERT_CHANNEL_URL = "https://t.me/s/whale_alert_io"
 
+# Сводки ликвидаций и whale-переводов: окно, максимум событий, порог немедленной публикации
+DIGEST_INTERVAL = int(os.environ.get("DIGEST_INTERVAL", 600))
+DIGEST_MAX_EVENTS = int(os.environ.get("DIGEST_MAX_EVENTS", 50))
+LIQUIDATION_IMMEDIATE_USD = float(os.environ.get("LIQUIDATION_IMMEDIATE_USD", 1_000_000))
+WHALE_IMMEDIATE_USD = float(os.environ.get("WHALE_IMMEDIATE_USD", 20_000_000))
+
+# Получение сообщений каналов: "scrape" (t.me/s) или "mtproto" (подписка через Telethon)
+CHANNEL_INGEST_MODE = os.environ.get("CHANNEL_INGEST_MODE", "scrape")
+
+# Binance: REST API и combined stream цен и свечей всех пар
+BINANCE_API_URL = os.environ.get("BINANCE_API_URL", "https://api.binance.com")
+BINANCE_WS_URL = os.environ.get("BINANCE_WS_URL", "wss://stream.binance.com:9443/stream")
+
+# CoinGecko API
+COINGECKO_API_URL = os.environ.get("COINGECKO_API_URL", "https://api.coingecko.com")
+
+# Адрес Bot API (локальный сервер или заглушка); по умолчанию api.telegram.org
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL")
+
+# Мониторинг цены: порог в процентах и скользящие окна
+PRICE_STREAM_ENABLED = os.environ.get("PRICE_STREAM", "1") != "0"
+PRICE_ALERT_THRESHOLD = float(os.environ.get("PRICE_ALERT_THRESHOLD", 3))
+PRICE_WINDOWS = os.environ.get("PRICE_WINDOWS", "1m,5m,15m,1h")
+PRICE_HISTORY_SIZE = int(os.environ.get("PRICE_HISTORY_SIZE", 86400))  # Сутки секундных тиков
+
+# Отслеживаемые пары: список через запятую или JSON-файл с порогами, окнами и таймфреймами каждой пары
+SYMBOLS = load_symbols(
+    os.environ.get("SYMBOLS", "ETHUSDT"),
+    path=os.environ.get("SYMBOLS_FILE"),
+    threshold=PRICE_ALERT_THRESHOLD,
+    windows=parse_windows(PRICE_WINDOWS),
+)
+SYMBOL_CONFIG = {config.symbol: config for config in SYMBOLS}
+TRACKED_ASSETS = {config.asset for config in SYMBOLS}
+
+# Расписание анализа свечей по таймфреймам (время UTC)
+CANDLE_SCHEDULES = {
+    "1h": {"hour": "*/1", "minute": 0, "second": 10},  # Каждый час; закрытая свеча успевает прийти из потока
+    "4h": {"hour": "*/4", "minute": 0, "second": 10},  # Каждые 4 часа
+    "1d": {"hour": 0, "minute": 5},  # Ежедневно в 00:05
+    "1w": {"day_of_week": "sun", "hour": 23, "minute": 55},  # Воскресенье 23:55
+}
+
+# Кэш рыночных данных: срок свежести и срок, пока устаревшее значение отдаётся с фоновым обновлением
+PRICE_CACHE_TTL = 5
+PRICE_STALE_TTL = 300
+GLOBAL_CACHE_TTL = 600
+GLOBAL_STALE_TTL = 6 * 3600
+
+# Локальное хранилище свечей
+CANDLE_DB_PATH = os.environ.get("CANDLE_DB_PATH", "candles.db")
+CANDLE_HISTORY_LIMIT = 500  # Свечей для расчёта индикаторов
+
+# Постоянный индекс опубликованных сообщений
+DEDUP_DB_PATH = os.environ.get("DEDUP_DB_PATH", "dedup.db")
+
+# Похожие новости разных источников публикуются одним сообщением; индекс по умолчанию в той же базе
+NEWS_CLUSTER_DB_PATH = os.environ.get("NEWS_CLUSTER_DB_PATH", DEDUP_DB_PATH)
+NEWS_CLUSTER_THRESHOLD = float(os.environ.get("NEWS_CLUSTER_THRESHOLD", 0.7))  # Сходство заголовков (Жаккар)
+NEWS_CLUSTER_TTL_HOURS = float(os.environ.get("NEWS_CLUSTER_TTL_HOURS", 12))  # Сколько опубликованное событие подавляет похожие
+
+# Координация реплик: пусто — одна реплика, иначе sqlite:///path/locks.db (один хост) или redis://host:6379/0
+COORDINATION_URL = os.environ.get("COORDINATION_URL", "")
+INSTANCE_ID = os.environ.get("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+LEADER_LEASE_TTL = float(os.environ.get("LEADER_LEASE_TTL", 10))  # Время перехода на другую реплику, сек
+
+# Получение обновлений Bot API: "polling" (getUpdates) или "webhook" (POST-запросы на HTTP-сервер бота)
+UPDATES_MODE = os.environ.get("UPDATES_MODE", "polling")
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")  # Публичный адрес HTTP-сервера, например https://bot.example.com
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")  # Общий для всех реплик, символы A-Z a-z 0-9 _ -
+WEBHOOK_MAX_CONNECTIONS = int(os.environ.get("WEBHOOK_MAX_CONNECTIONS", 40))  # Одновременных запросов от Telegram
+
+# Профилирование на ходу через /debug/profile; без токена эндпоинт не регистрируется
+DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 60))
+
+# Разбор лент и страниц каналов: "thread", "process" или "inline" (в event loop)
+PARSE_POOL_KIND = os.environ.get("PARSE_POOL", "thread")
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", 2))
+PARSE_MAX_PENDING = int(os.environ.get("PARSE_MAX_PENDING", 8))  # Больше — сбор данных ждёт освобождения пула
+PARSE_INLINE_BELOW = int(os.environ.get("PARSE_INLINE_BELOW", 16 * 1024))  # Ответы меньше, байт, разбираются сразу
+
+# Опрос источников: "fixed" (постоянные интервалы) или "adaptive" (по частоте новых элементов)
+SCHEDULER_MODE = os.environ.get("SCHEDULER_MODE", "fixed")
+
+# Границы адаптивного опроса, сек: минимум, максимум, первый запуск, новых элементов на опрос
+POLL_POLICIES = {
+    "publish_eth_news": PollPolicy(min_interval=600, max_interval=4 * 3600, initial=1800, target_items=3),
+    "publish_liquidations": PollPolicy(min_interval=60, max_interval=1800, initial=300, target_items=10),
+    "publish_whale_alerts": PollPolicy(min_interval=120, max_interval=3600, initial=300, target_items=3),
+}
+
+# Таймауты, повторы и предохранители для каждого источника данных
+SOURCE_POLICIES = {
+    "binance": SourcePolicy(timeout=5, retries=2, backoff=0.5,
+                            breaker=BreakerPolicy(slow_call=3.0, cool_down=15.0, max_cool_down=120.0)),
+    "coingecko": SourcePolicy(timeout=10, retries=2, backoff=2.0, max_backoff=10.0,
+                              breaker=BreakerPolicy(min_calls=3, cool_down=60.0)),
+    # Ленты опрашиваются редко: уже 2 сбоя подряд отключают ленту, мёртвая лента проверяется раз в час
+    "rss": SourcePolicy(timeout=10, retries=1, backoff=1.0,
+                        breaker=BreakerPolicy(window=4, min_calls=2, cool_down=600.0, max_cool_down=3600.0)),
+    "telegram": SourcePolicy(timeout=10, retries=1, backoff=1.0,
+                             breaker=BreakerPolicy(window=10, min_calls=3, cool_down=120.0)),
+}
+
+# Бюджет времени задачи, сек: по его истечении HTTP-запросы задачи завершаются сразу,
+# и задача публикует то, что успела собрать; через JOB_BUDGET_GRACE она прерывается
+JOB_BUDGETS = {
+    "publish_eth_news": 30,
+    "publish_liquidations": 20,
+    "publish_whale_alerts": 20,
+    "send_candle_analysis": 15,
+    "send_altseason_indicator": 15,
+    "monitor_price_changes": 10,
+    "flush_digests": 10,
+}
+JOB_BUDGET_DEFAULT = 60
+JOB_BUDGET_GRACE = 5
+
 # Инициализация бота aiogram
 bot = Bot(
     token=API_TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None,
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 dp = Dispatcher()
-scheduler = AsyncIOScheduler()
+# Пропущенные запуски объединяются в один, задача не запускается поверх самой себя
+scheduler = AsyncIOScheduler(job_defaults={"coalesce": True, "max_instances": 1})
+
+# Выбор ведущей реплики: задачи, подписки и команды выполняет только она (запускается в main())
+leader = LeaderElector(
+    open_backend(COORDINATION_URL), "leader", INSTANCE_ID, ttl=LEADER_LEASE_TTL
+) if COORDINATION_URL else None
+
+# Очередь исходящих сообщений с лимитами Telegram (запускается в main());
+# при нескольких репликах перед отправкой проверяется токен аренды ведущей
+send_queue = SendQueue(bot, fence=leader)
+
+# Общий HTTP-клиент для всех исходящих запросов (создаётся в main())
+http = HttpClient(SOURCE_POLICIES, limit_per_host=8)
+
+# Пул разбора HTML/XML, чтобы крупные ответы не останавливали event loop
+parse_pool = ParsePool(PARSE_POOL_KIND, workers=PARSE_WORKERS, max_pending=PARSE_MAX_PENDING,
+                       inline_below=PARSE_INLINE_BELOW)
+
+# Общий кэш цен и глобальных данных рынка
+market_cache = MarketDataCache()
+
+# Свечи синхронизируются инкрементально, история хранится локально
+candle_store = CandleStore(CANDLE_DB_PATH, http, BINANCE_API_URL)
+
+# Каналы опрашиваются инкрементально: только посты после последнего известного ID
+channel_scraper = ChannelScraper(http, parse_pool)
+
+# Push-подписки на каналы (скрапинг остаётся резервом)
+channel_ingest = ChannelIngest()
 
 # Кэш для предотвращения дублирования сообщений
-message_cache = TTLCache(maxsize=1000, ttl=3600)  # 1 час
+# (хранится на диске и переживает перезапуск, срок жизни зависит от префикса ключа)
+message_cache = DedupStore(DEDUP_DB_PATH)
 
-# Глобальные переменные для отслеживания цены
-PREVIOUS_PRICE = None
+# Опубликованные новостные события для поиска похожих заголовков
+news_clusters = NewsClusterIndex(
+    NEWS_CLUSTER_DB_PATH, threshold=NEWS_CLUSTER_THRESHOLD, ttl=NEWS_CLUSTER_TTL_HOURS * 3600,
+)
 
 # Middleware для приватного доступа
 class AccessMiddleware(BaseMiddleware):
@@ -75,94 +262,180 @@ class AccessMiddleware(BaseMiddleware):
 dp.update.outer_middleware(AccessMiddleware())
 
 # ===== ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ =====
+# Источники новостей
+NEWS_SOURCES = {
+    "CoinDesk": "https://www.coindesk.com/tag/ethereum/feed",
+    "The Block": "https://www.theblock.co/rss/ethereum",
+    "CoinTelegraph": "https://cointelegraph.com/rss/tag/ethereum",
+    "Decrypt": "https://decrypt.co/feed/ethereum",
+    "CryptoSlate": "https://cryptoslate.com/categories/ethereum/feed/",
+    "ETHHub": "https://ethhub.io/feed.xml"
+}
+
+# Эмодзи для разных источников
+SOURCE_EMOJI = {
+    "CoinDesk": "📰",
+    "The Block": "🔗",
+    "CoinTelegraph": "📢",
+    "Decrypt": "🔓",
+    "CryptoSlate": "🧩",
+    "ETHHub": "⚙️"
+}
+
+# Ключевые слова важных новостей
+NEWS_KEYWORDS = [
+    "hack", "exploit", "vulnerability", "critical",
+    "emergency", "vitalik", "upgrade", "hard fork",
+    "security", "exploit", "bug", "attack"
+]
+
+NEWS_ITEMS_PER_SOURCE = 5
+NEWS_FETCH_DEADLINE = 15  # Общий лимит времени на сбор всех лент, сек
+
+# ETag / Last-Modified каждой ленты для условных запросов
+feed_validators = {}
+
+# Статистика последнего сбора новостей
+news_stats = {}
+
+def parse_feed_items(source, entries):
+    """Новости из разобранных записей ленты"""
+    items = []
+    
+    for entry in entries:
+        title, link, pub_date = entry["title"], entry["link"], entry["pub_date"]
+        # Обработка даты
+        timestamp = entry["timestamp"] or datetime.now(timezone.utc)
+        
+        # Определяем важность новости
+        importance = "❗️"
+        if any(kw in title.lower() for kw in NEWS_KEYWORDS):
+            importance = "❗️❗️❗️"
+        
+        items.append({
+            "source": f"{SOURCE_EMOJI.get(source, '📌')} {source}",
+            "title": f"{importance} {title}",
+            "headline": title,
+            "link": link,
+            "pub_date": pub_date,
+            "timestamp": timestamp
+        })
+    
+    return items
+
+async def fetch_feed(source, url):
+    """Условный GET одной ленты: (байт получено, новости) или None, если лента не изменилась"""
+    headers = {}
+    validators = feed_validators.get(url, {})
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    
+    response = await http.get(url, source="rss", headers=headers)
+    if response.status == 304:
+        return None
+    if response.status != 200:
+        raise RuntimeError(f"статус {response.status}")
+    
+    entries = await parse_pool.run("rss", parse_feed, response.body, NEWS_ITEMS_PER_SOURCE, source)
+    items = parse_feed_items(source, entries)
+    
+    # Запоминаем валидаторы только после успешного разбора
+    feed_validators[url] = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return len(response.body), items
+
 async def fetch_crypto_news():
     """Получение новостей о ETH из различных источников"""
-    sources = {
-        "CoinDesk": "https://www.coindesk.com/tag/ethereum/feed",
-        "The Block": "https://www.theblock.co/rss/ethereum",
-        "CoinTelegraph": "https://cointelegraph.com/rss/tag/ethereum",
-        "Decrypt": "https://decrypt.co/feed/ethereum",
-        "CryptoSlate": "https://cryptoslate.com/categories/ethereum/feed/",
-        "ETHHub": "https://ethhub.io/feed.xml"
+    started = time.monotonic()
+    tasks = {
+        asyncio.create_task(fetch_feed(source, url)): source
+        for source, url in NEWS_SOURCES.items()
+    }
+    done, pending = await asyncio.wait(tasks, timeout=NEWS_FETCH_DEADLINE)
+    
+    # Медленные ленты не задерживают остальные
+    for task in pending:
+        task.cancel()
+        logging.error(f"Error fetching news from {tasks[task]}: превышен лимит {NEWS_FETCH_DEADLINE} с")
+    await asyncio.gather(*pending, return_exceptions=True)
+    
+    stats = {
+        "sources": len(tasks),
+        "ok": 0,
+        "not_modified": 0,
+        "failed": 0,
+        "skipped": 0,
+        "timed_out": len(pending),
+        "bytes": 0,
+        "items": 0,
     }
+    per_source = {}
+    for task in done:
+        source = tasks[task]
+        try:
+            result = task.result()
+        except CircuitOpenError:
+            # Лента отключена предохранителем, об этом уже сообщено при его открытии
+            stats["skipped"] += 1
+            continue
+        except Exception as e:
+            stats["failed"] += 1
+            logging.error(f"Error fetching news from {source}: {e}")
+            continue
+        
+        if result is None:
+            stats["not_modified"] += 1
+            continue
+        
+        size, items = result
+        stats["ok"] += 1
+        stats["bytes"] += size
+        per_source[source] = items
     
     news_items = []
     seen_titles = set()  # Для фильтрации дубликатов
     
-    async with aiohttp.ClientSession() as session:
-        for source, url in sources.items():
-            try:
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        xml = await response.text()
-                        soup = BeautifulSoup(xml, 'xml')
-                        
-                        for item in soup.find_all('item')[:5]:
-                            title = item.title.text.strip()
-                            
-                            # Пропускаем дубликаты
-                            if title in seen_titles:
-                                continue
-                            seen_titles.add(title)
-                            
-                            link = item.link.text
-                            pub_date = item.pubDate.text if item.pubDate else ""
-                            
-                            # Обработка даты
-                            try:
-                                timestamp = datetime.strptime(pub_date, '%a, %d %b %Y %H:%M:%S %Z').replace(tzinfo=timezone.utc)
-                            except:
-                                timestamp = datetime.now(timezone.utc)
-                            
-                            # Определяем важность новости
-                            importance = "❗️"
-                            keywords = [
-                                "hack", "exploit", "vulnerability", "critical", 
-                                "emergency", "vitalik", "upgrade", "hard fork",
-                                "security", "exploit", "bug", "attack"
-                            ]
-                            if any(kw in title.lower() for kw in keywords):
-                                importance = "❗️❗️❗️"
-                            
-                            # Добавляем эмодзи для разных источников
-                            source_emoji = {
-                                "CoinDesk": "📰",
-                                "The Block": "🔗",
-                                "CoinTelegraph": "📢",
-                                "Decrypt": "🔓",
-                                "CryptoSlate": "🧩",
-                                "ETHHub": "⚙️"
-                            }
-                            
-                            news_items.append({
-                                "source": f"{source_emoji.get(source, '📌')} {source}",
-                                "title": f"{importance} {title}",
-                                "link": link,
-                                "pub_date": pub_date,
-                                "timestamp": timestamp
-                            })
-            except Exception as e:
-                logging.error(f"Error fetching news from {source}: {e}")
+    # Порядок источников сохраняется, чтобы дедупликация не зависела от скорости ответа
+    for source in NEWS_SOURCES:
+        for item in per_source.get(source, []):
+            if item["title"] in seen_titles:
+                continue
+            seen_titles.add(item["title"])
+            news_items.append(item)
+    
+    stats["items"] = len(news_items)
+    stats["duration"] = round(time.monotonic() - started, 3)
+    news_stats.clear()
+    news_stats.update(stats)
+    logging.info(f"Сбор новостей: {stats}")
     
     # Сортируем новости по дате (свежие в начале)
     news_items.sort(key=lambda x: x['timestamp'], reverse=True)
     
     return news_items[:15]  # Возвращаем 15 самых свежих новостей
 
-async def get_eth_price():
-    """Получение текущей цены ETH"""
-    url = "https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT"
-    
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, timeout=10) as response:
-                data = await response.json()
-                return float(data['price'])
-        except Exception as e:
-            logging.error(f"Error fetching ETH price: {e}")
-            return None
+async def fetch_prices():
+    """Цены всех отслеживаемых пар одним запросом к Binance"""
+    url = f"{BINANCE_API_URL}/api/v3/ticker/price"
+    symbols = json.dumps([config.symbol for config in SYMBOLS], separators=(",", ":"))
+    response = await http.get(url, source="binance", params={"symbols": symbols})
+    if response.status != 200:
+        raise RuntimeError(f"Binance: статус {response.status}")
+    return {row['symbol']: float(row['price']) for row in response.json()}
 
-async def get_candles(timeframe="1d"):
+async def get_prices():
+    """Текущие цены всех пар: {symbol: цена}"""
+    try:
+        return await market_cache.get("prices", fetch_prices, ttl=PRICE_CACHE_TTL, stale_ttl=PRICE_STALE_TTL)
+    except Exception as e:
+        logging.error(f"Error fetching prices: {e}")
+        return {}
+
+async def get_candles(timeframe, symbol):
     """Получение данных свечей"""
     interval_map = {
         "1h": "1h",
@@ -171,18 +444,34 @@ async def get_candles(timeframe="1d"):
         "1w": "1w"
     }
     
-    url = f"https://api.binance.com/api/v3/klines?symbol=ETHUSDT&interval={interval_map[timeframe]}&limit=2"
+    url = f"{BINANCE_API_URL}/api/v3/klines"
+    params = {"symbol": symbol, "interval": interval_map[timeframe], "limit": 2}
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, timeout=10) as response:
-                data = await response.json()
-                return data
-        except Exception as e:
-            logging.error(f"Error fetching candles: {e}")
-            return None
+    try:
+        response = await http.get(url, source="binance", params=params)
+        if response.status != 200:
+            raise RuntimeError(f"Binance: статус {response.status}")
+        return response.json()
+    except Exception as e:
+        logging.error(f"Error fetching candles: {e}")
+        return None
+
+async def get_candle_history(timeframe, symbol):
+    """Догрузка новых свечей и чтение закрытых свечей из локального хранилища"""
+    try:
+        await candle_store.sync(symbol, timeframe)
+    except CircuitOpenError:
+        # Binance отключён предохранителем: анализ по уже сохранённым свечам
+        pass
+    except Exception as e:
+        logging.error(f"Error syncing candles {symbol} {timeframe}: {e}")
+    
+    history = candle_store.load(symbol, timeframe, limit=CANDLE_HISTORY_LIMIT)
+    if not len(history["close"]):
+        return None
+    return history
 
-def analyze_candle(candle):
+def analyze_candle(candle, indicators=None):
     """Анализ свечи и формирование прогноза"""
     open_price = float(candle[1])
     high = float(candle[2])
@@ -209,10 +498,22 @@ def analyze_candle(candle):
             scenario = "Небольшая коррекция. Тренд пока не нарушен."
     
     # Определение ключевых уровней
-    support = round(low * 0.995, 2)
-    resistance = round(high * 1.005, 2)
+    if indicators:
+        # Уровни по пивотам всей истории
+        support = round(indicators["support"], 2)
+        resistance = round(indicators["resistance"], 2)
+        
+        trend = "восходящий" if indicators["ema_fast"] > indicators["ema_slow"] else "нисходящий"
+        scenario += f" Тренд по EMA{indicators['fast']}/EMA{indicators['slow']}: {trend}."
+        if indicators["rsi"] >= 70:
+            scenario += " RSI в зоне перекупленности."
+        elif indicators["rsi"] <= 30:
+            scenario += " RSI в зоне перепроданности."
+    else:
+        support = round(low * 0.995, 2)
+        resistance = round(high * 1.005, 2)
     
-    return {
+    result = {
         "type": candle_type,
         "open": open_price,
         "high": high,
@@ -222,100 +523,106 @@ def analyze_candle(candle):
         "support": support,
         "resistance": resistance
     }
+    if indicators:
+        result.update(
+            ema_fast=indicators["ema_fast"],
+            ema_slow=indicators["ema_slow"],
+            rsi=indicators["rsi"],
+            atr=indicators["atr"],
+        )
+    return result
+
+async def fetch_market_dominance():
+    """Запрос доминирования BTC/ETH у CoinGecko"""
+    url = f"{COINGECKO_API_URL}/api/v3/global"
+    response = await http.get(url, source="coingecko")
+    if response.status != 200:
+        raise RuntimeError(f"CoinGecko: статус {response.status}")
+    data = response.json()
+    return data['data']['market_cap_percentage']['btc'], data['data']['market_cap_percentage']['eth']
 
 async def get_altseason_indicator():
     """Реальный индикатор альтсезона с CoinGecko"""
-    url = "https://api.coingecko.com/api/v3/global"
-    
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as response:
-                data = await response.json()
-                btc_dominance = data['data']['market_cap_percentage']['btc']
-                eth_dominance = data['data']['market_cap_percentage']['eth']
-                
-                # Расчет индикатора альтсезона
-                altseason_score = 100 - btc_dominance
-                
-                if altseason_score < 30:
-                    return f"🔴 {altseason_score:.1f}% - Доминирование BTC ({btc_dominance}%). Альтсезон маловероятен."
-                elif altseason_score < 60:
-                    return f"🟡 {altseason_score:.1f}% - Переходная фаза. Доминирование ETH: {eth_dominance}%"
-                else:
-                    return f"🟢 {altseason_score:.1f}% - Альтсезон! Рост альткоинов вероятен."
+        btc_dominance, eth_dominance = await market_cache.get(
+            "coingecko:global", fetch_market_dominance, ttl=GLOBAL_CACHE_TTL, stale_ttl=GLOBAL_STALE_TTL
+        )
+        
+        # Расчет индикатора альтсезона
+        altseason_score = 100 - btc_dominance
+        
+        if altseason_score < 30:
+            return f"🔴 {altseason_score:.1f}% - Доминирование BTC ({btc_dominance}%). Альтсезон маловероятен."
+        elif altseason_score < 60:
+            return f"🟡 {altseason_score:.1f}% - Переходная фаза. Доминирование ETH: {eth_dominance}%"
+        else:
+            return f"🟢 {altseason_score:.1f}% - Альтсезон! Рост альткоинов вероятен."
     except Exception as e:
         logging.error(f"Error fetching altseason indicator: {e}")
         return "🔴 Ошибка получения данных об альтсезоне"
 
 async def fetch_telegram_channel(url):
-    """Получение сообщений из публичного Telegram канала через веб-интерфейс"""
+    """Получение новых сообщений из публичного Telegram канала через веб-интерфейс"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    messages = []
-                    # Ищем все сообщения в канале
-                    for message_div in soup.find_all('div', class_='tgme_widget_message'):
-                        # Пропускаем рекламные посты
-                        if message_div.find('a', class_='tgme_widget_message_ad_label'):
-                            continue
-                            
-                        text_div = message_div.find('div', class_='tgme_widget_message_text')
-                        if text_div:
-                            message_text = text_div.get_text(strip=True)
-                            message_link = message_div.find('a', class_='tgme_widget_message_date')['href']
-                            message_time = message_div.find('time')['datetime']
-                            
-                            messages.append({
-                                'text': message_text,
-                                'link': message_link,
-                                'time': message_time
-                            })
-                    
-                    return messages
-                else:
-                    logging.error(f"Ошибка при получении канала {url}: статус {response.status}")
-                    return []
+        return await channel_scraper.fetch(url)
+    except CircuitOpenError:
+        return []
     except Exception as e:
         logging.error(f"Ошибка парсинга канала {url}: {e}")
         return []
 
 # ===== ЗАПЛАНИРОВАННЫЕ ЗАДАЧИ =====
 async def publish_eth_news():
-    """Публикация новостей о ETH"""
+    """Публикация новостей о ETH по одной на событие; возвращает число новых новостей"""
     try:
         news = await fetch_crypto_news()
-        for item in news:
-            # Проверка на дубликаты
-            cache_key = f"news_{item['link']}"
-            if cache_key in message_cache:
+        published = 0
+        for cluster in news_clusters.group(news, title=lambda item: item["headline"]):
+            # Проверка на дубликаты: по ссылкам и по похожим заголовкам прошлых публикаций
+            fresh = [item for item in cluster.items if f"news_{item['link']}" not in message_cache]
+            for item in fresh:
+                message_cache[f"news_{item['link']}"] = True
+            if cluster.known or not fresh:
                 continue
-                
-            message_cache[cache_key] = True
+            
+            item, others = fresh[0], fresh[1:]
+            news_clusters.add(cluster)
             
             message = (
                 f"{item['title']}\n\n"
                 f"📰 Источник: {item['source']}\n"
+            )
+            if others:
+                links = ", ".join(f"<a href='{other['link']}'>{other['source']}</a>" for other in others)
+                message += f"🔗 Также: {links}\n"
+            message += (
                 f"⏰ Дата: {item['pub_date']}\n"
                 f"<a href='{item['link']}'>Читать полностью</a>"
             )
-            await bot.send_message(CHANNEL_ID, message, disable_web_page_preview=True)
-            await asyncio.sleep(2)  # Пауза между сообщениями
+            send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_NEWS, disable_web_page_preview=True)
+            published += 1
+        return published
     except Exception as e:
         logging.error(f"Error publishing news: {e}")
+        raise
 
-async def send_candle_analysis(timeframe):
+async def send_candle_analysis(timeframe, symbol):
     """Анализ и отправка данных по свечам"""
     try:
-        candles = await get_candles(timeframe)
-        if not candles or len(candles) < 2:
-            return
-        
-        # Анализируем последнюю закрытую свечу
-        candle_data = analyze_candle(candles[-2])
+        history = await get_candle_history(timeframe, symbol)
+        if history is not None:
+            # Последняя закрытая свеча и индикаторы по всей истории
+            last = [history[name][-1] for name in ("open_time", "open", "high", "low", "close")]
+            # Индикаторы тянут NumPy, поэтому загружаются при первом анализе, а не при запуске
+            from indicators import compute_indicators
+            candle_data = analyze_candle(last, compute_indicators(history))
+        else:
+            candles = await get_candles(timeframe, symbol)
+            if not candles or len(candles) < 2:
+                return
+            
+            # Анализируем последнюю закрытую свечу
+            candle_data = analyze_candle(candles[-2])
         
         # Форматируем сообщение
         timeframe_emoji = {
@@ -326,7 +633,7 @@ async def send_candle_analysis(timeframe):
         }
         
         message = (
-            f"{timeframe_emoji.get(timeframe, '📊')} <b>Анализ {timeframe.upper()} свечи ETH/USDT</b>\n\n"
+            f"{timeframe_emoji.get(timeframe, '📊')} <b>Анализ {timeframe.upper()} свечи {SYMBOL_CONFIG[symbol].pair}</b>\n\n"
             f"{candle_data['type']} <b>Закрытие:</b> ${candle_data['close']:.2f}\n"
             f"▫️ High: ${candle_data['high']:.2f}\n"
             f"▫️ Low: ${candle_data['low']:.2f}\n"
@@ -334,12 +641,22 @@ async def send_candle_analysis(timeframe):
             f"📊 <b>Ключевые уровни:</b>\n"
             f"Поддержка: ${candle_data['support']:.2f}\n"
             f"Сопротивление: ${candle_data['resistance']:.2f}\n\n"
-            f"💡 <b>Сценарий:</b>\n{candle_data['scenario']}"
         )
+        if "rsi" in candle_data:
+            message += (
+                f"📈 <b>Индикаторы:</b>\n"
+                f"EMA: ${candle_data['ema_fast']:.2f} / ${candle_data['ema_slow']:.2f}\n"
+            )
+            # RSI не определён по одной свече: хранилище могло остаться без догрузки истории
+            if math.isfinite(candle_data['rsi']):
+                message += f"RSI: {candle_data['rsi']:.1f}\n"
+            message += f"ATR: ${candle_data['atr']:.2f}\n\n"
+        message += f"💡 <b>Сценарий:</b>\n{candle_data['scenario']}"
         
-        await bot.send_message(CHANNEL_ID, message)
+        send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_NORMAL)
     except Exception as e:
         logging.error(f"Error sending candle analysis: {e}")
+        raise
 
 async def send_altseason_indicator():
     """Отправка индикатора альтсезона"""
@@ -350,116 +667,560 @@ async def send_altseason_indicator():
             f"{indicator}\n\n"
             "ℹ️ Рассчитано на основе доминирования BTC с CoinGecko"
         )
-        await bot.send_message(CHANNEL_ID, message)
+        send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_NORMAL)
     except Exception as e:
         logging.error(f"Error sending altseason indicator: {e}")
+        raise
 
-async def monitor_price_changes():
-    """Мониторинг резких изменений цены"""
-    global PREVIOUS_PRICE
+def describe_window(seconds):
+    """Человекочитаемая длительность окна"""
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600} ч"
+    if seconds % 60 == 0:
+        return f"{seconds // 60} мин"
+    return f"{seconds} с"
+
+async def send_price_alert(alert):
+    """Отправка сигнала о резком изменении цены"""
+    direction = "📈" if alert.change > 0 else "📉"
+    message = (
+        f"{direction * 3} <b>РЕЗКОЕ ИЗМЕНЕНИЕ ЦЕНЫ {SYMBOL_CONFIG[alert.symbol].asset}!</b> {direction * 3}\n\n"
+        f"▫️ Текущая цена: <b>${alert.price:,.2f}</b>\n"
+        f"▫️ Изменение: <b>{alert.change:.2f}%</b> за последние {describe_window(alert.seconds)}\n\n"
+        f"⚠️ Возможны повышенные колебания рынка"
+    )
     
-    try:
-        current_price = await get_eth_price()
-        if not current_price:
-            return
+    # Проверка на дубликаты
+    cache_key = f"price_{alert.symbol}_{alert.window}_{alert.change > 0}_{int(alert.timestamp // alert.seconds)}"
+    if cache_key in message_cache:
+        return
         
-        if PREVIOUS_PRICE is None:
-            PREVIOUS_PRICE = current_price
+    message_cache[cache_key] = True
+    send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_ALERT)
+
+# Проверка порога в скользящих окнах для каждой пары
+price_engines = {
+    config.symbol: PriceEngine(
+        http,
+        config.symbol,
+        windows=config.windows,
+        threshold=config.threshold,
+        on_alert=send_price_alert,
+        rest_url=BINANCE_API_URL,
+        history_size=PRICE_HISTORY_SIZE,
+    )
+    for config in SYMBOLS
+}
+
+# Одно WebSocket-подключение на цены и закрытые свечи всех пар
+price_stream = PriceStream(
+    http,
+    BINANCE_WS_URL,
+    price_engines,
+    kline_intervals={config.symbol: config.timeframes for config in SYMBOLS},
+    on_kline=candle_store.append_closed,
+)
+
+async def monitor_price_changes():
+    """Мониторинг резких изменений цены через REST, пока поток цен недоступен"""
+    try:
+        if price_stream.connected:
             return
-            
-        # Расчет реального изменения
-        change = ((current_price - PREVIOUS_PRICE) / PREVIOUS_PRICE) * 100
-        PREVIOUS_PRICE = current_price
         
-        if abs(change) > 3:
-            direction = "📈" if change > 0 else "📉"
-            message = (
-                f"{direction * 3} <b>РЕЗКОЕ ИЗМЕНЕНИЕ ЦЕНЫ ETH!</b> {direction * 3}\n\n"
-                f"▫️ Текущая цена: <b>${current_price:,.2f}</b>\n"
-                f"▫️ Изменение: <b>{change:.2f}%</b> за последние 30 минут\n\n"
-                f"⚠️ Возможны повышенные колебания рынка"
-            )
-            
-            # Проверка на дубликаты
-            cache_key = f"price_{current_price:.2f}_{change:.2f}"
-            if cache_key in message_cache:
-                return
-                
-            message_cache[cache_key] = True
-            await bot.send_message(CHANNEL_ID, message)
+        # Один пакетный запрос на все пары
+        prices = await get_prices()
+        for symbol, engine in price_engines.items():
+            if prices.get(symbol):
+                await engine.feed(prices[symbol])
     except Exception as e:
         logging.error(f"Error monitoring price changes: {e}")
+        raise
+
+async def send_liquidation(liq):
+    """Немедленная публикация крупной ликвидации"""
+    message = (
+        f"📉 <b>ЛИКВИДАЦИЯ {liq.symbol} НА BINANCE!</b>\n\n"
+        f"{liq.text}\n\n"
+        f"<a href='{liq.link}'>Источник</a> | {liq.time}"
+    )
+    send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_NORMAL, disable_web_page_preview=True)
+
+async def send_liquidation_digest(events):
+    """Сводка ликвидаций за окно"""
+    symbols = sorted({e.symbol for e in events})
+    lines = []
+    for symbol in symbols:
+        # Заголовок пары нужен, только если в окне их несколько
+        if len(symbols) > 1:
+            lines.append(f"<b>{symbol}</b>")
+        for side, title in (("long", "Лонги"), ("short", "Шорты")):
+            side_events = [e for e in events if e.symbol == symbol and e.side == side]
+            if not side_events:
+                continue
+            total = sum(e.size_usd for e in side_events)
+            largest = max(side_events, key=lambda e: e.size_usd)
+            lines.append(
+                f"▫️ {title}: {len(side_events)}, всего <b>{format_usd(total)}</b>, "
+                f"крупнейшая <a href='{largest.link}'>{format_usd(largest.size_usd)}</a>"
+            )
+    
+    message = (
+        f"📉 <b>ЛИКВИДАЦИИ {', '.join(symbols)} ЗА {describe_window(DIGEST_INTERVAL).upper()}</b>\n\n"
+        + "\n".join(lines) + "\n\n"
+        f"Всего: {len(events)} на {format_usd(sum(e.size_usd for e in events))}"
+    )
+    send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_NORMAL, disable_web_page_preview=True)
+
+async def send_whale_alert(whale):
+    """Немедленная публикация крупного перевода"""
+    message = (
+        "🐋 <b>WHALE ALERT!</b>\n\n"
+        f"{whale.text}\n\n"
+        f"<a href='{whale.link}'>Источник</a> | {whale.time}"
+    )
+    send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_NORMAL, disable_web_page_preview=True)
+
+async def send_whale_digest(events):
+    """Сводка whale-переводов за окно"""
+    total = sum(e.size_usd for e in events)
+    amounts = {}
+    for e in events:
+        amounts[e.symbol] = amounts.get(e.symbol, 0) + e.amount
+    top = sorted(events, key=lambda e: e.size_usd, reverse=True)[:3]
+    lines = [
+        f"▫️ <a href='{e.link}'>{format_usd(e.size_usd)}</a>: "
+        f"{e.sender or '?'} → {e.receiver or '?'}"
+        for e in top
+    ]
+    message = (
+        f"🐋 <b>WHALE ALERT ЗА {describe_window(DIGEST_INTERVAL).upper()}</b>\n\n"
+        f"Переводов: {len(events)}, "
+        f"{', '.join(f'{amount:,.0f} {symbol}' for symbol, amount in sorted(amounts.items()))} "
+        f"на <b>{format_usd(total)}</b>\n\n"
+        "Крупнейшие:\n" + "\n".join(lines)
+    )
+    send_queue.enqueue(CHANNEL_ID, message, priority=PRIORITY_NORMAL, disable_web_page_preview=True)
+
+# Окна для сводок: мелкие события копятся, крупные уходят сразу
+liquidation_digest = DigestAggregator(
+    DIGEST_INTERVAL, DIGEST_MAX_EVENTS, LIQUIDATION_IMMEDIATE_USD,
+    on_single=send_liquidation, on_digest=send_liquidation_digest,
+)
+whale_digest = DigestAggregator(
+    DIGEST_INTERVAL, DIGEST_MAX_EVENTS, WHALE_IMMEDIATE_USD,
+    on_single=send_whale_alert, on_digest=send_whale_digest,
+)
+
+# Тег монеты в сообщениях каналов: 'Liquidated on #ETH', '1,500 #ETH (...)'
+LIQUIDATION_TAG = re.compile(r"Liquidated on #([A-Z0-9]+)")
+ASSET_TAG = re.compile(r"#([A-Z0-9]+)\b")
+
+async def handle_liquidation_message(msg):
+    """Фильтрация одного сообщения о ликвидации и передача в сводку"""
+    match = LIQUIDATION_TAG.search(msg['text'])
+    if not match or match.group(1) not in TRACKED_ASSETS:
+        return
+    
+    # Проверка на дубликаты
+    cache_key = f"liq_{msg['link']}"
+    if cache_key in message_cache:
+        return
+        
+    message_cache[cache_key] = True
+    
+    liq = parse_liquidation(msg)
+    if liq is None:
+        # Нераспознанный формат публикуется как есть
+        await send_liquidation(parse_fallback(msg, match.group(1)))
+        return
+    await liquidation_digest.add(liq)
+
+async def handle_whale_message(msg):
+    """Фильтрация одного whale-сообщения и передача в сводку"""
+    if "USD" not in msg['text']:
+        return
+    asset = next((tag for tag in ASSET_TAG.findall(msg['text']) if tag in TRACKED_ASSETS), None)
+    if asset is None:
+        return
+    
+    # Проверка на дубликаты
+    cache_key = f"whale_{msg['link']}"
+    if cache_key in message_cache:
+        return
+        
+    message_cache[cache_key] = True
+    
+    whale = parse_whale(msg)
+    if whale is None:
+        await send_whale_alert(parse_fallback(msg, asset))
+        return
+    await whale_digest.add(whale)
+
+def parse_fallback(msg, symbol):
+    """Запись с полями symbol/text/link/time для сообщений без распознанной структуры"""
+    return SimpleNamespace(symbol=symbol, text=msg['text'], link=msg['link'], time=msg['time'])
+
+async def flush_digests():
+    """Публикация сводок с истёкшим окном"""
+    for digest in (liquidation_digest, whale_digest):
+        try:
+            await digest.tick()
+        except Exception as e:
+            logging.error(f"Ошибка публикации сводки: {e}")
 
 async def publish_liquidations():
-    """Публикация данных о ликвидациях"""
+    """Публикация данных о ликвидациях; возвращает число новых постов канала"""
     try:
+        # При активной MTProto-подписке сообщения приходят сами
+        if channel_ingest.is_live("liquidations"):
+            return 0
+        
         messages = await fetch_telegram_channel(LIQUIDATIONS_CHANNEL_URL)
         for msg in messages:
-            if "Liquidated on #ETH" in msg['text']:
-                # Проверка на дубликаты
-                cache_key = f"liq_{msg['link']}"
-                if cache_key in message_cache:
-                    continue
-                    
-                message_cache[cache_key] = True
-                
-                # Форматируем сообщение
-                message = (
-                    "📉 <b>ЛИКВИДАЦИЯ ETH НА BINANCE!</b>\n\n"
-                    f"{msg['text']}\n\n"
-                    f"<a href='{msg['link']}'>Источник</a> | {msg['time']}"
-                )
-                await bot.send_message(CHANNEL_ID, message, disable_web_page_preview=True)
-                await asyncio.sleep(1)  # Пауза между сообщениями
+            await handle_liquidation_message(msg)
+        return len(messages)
     except Exception as e:
         logging.error(f"Ошибка публикации ликвидаций: {e}")
+        raise
 
 async def publish_whale_alerts():
-    """Публикация whale-транзакций"""
+    """Публикация whale-транзакций; возвращает число новых постов канала"""
     try:
+        if channel_ingest.is_live("whale_alert"):
+            return 0
+        
         messages = await fetch_telegram_channel(WHALE_ALERT_CHANNEL_URL)
         for msg in messages:
-            if "#ETH" in msg['text'] and "USD" in msg['text']:
-                # Проверка на дубликаты
-                cache_key = f"whale_{msg['link']}"
-                if cache_key in message_cache:
-                    continue
-                    
-                message_cache[cache_key] = True
-                
-                # Форматируем сообщение
-                message = (
-                    "🐋 <b>WHALE ALERT!</b>\n\n"
-                    f"{msg['text']}\n\n"
-                    f"<a href='{msg['link']}'>Источник</a> | {msg['time']}"
-                )
-                await bot.send_message(CHANNEL_ID, message, disable_web_page_preview=True)
-                await asyncio.sleep(1)  # Пауза между сообщениями
+            await handle_whale_message(msg)
+        return len(messages)
     except Exception as e:
         logging.error(f"Ошибка публикации whale alerts: {e}")
+        raise
+
+def channel_handler(url, handler):
+    """Обработчик push-сообщений, сдвигающий курсор скрапера канала"""
+    async def on_message(msg):
+        if msg['id'] > channel_scraper.cursors.get(url, 0):
+            channel_scraper.cursors[url] = msg['id']
+        await handler(msg)
+    return on_message
+
+def setup_channel_ingest():
+    """Подключение MTProto-подписок на каналы ликвидаций и whale alert"""
+    if CHANNEL_INGEST_MODE != "mtproto":
+        return
+    
+    try:
+        api_id = int(os.environ['TELEGRAM_API_ID'])
+        api_hash = os.environ['TELEGRAM_API_HASH']
+    except (KeyError, ValueError) as e:
+        logging.error(f"MTProto-режим отключен, нет TELEGRAM_API_ID/TELEGRAM_API_HASH: {e}")
+        return
+    
+    subscriptions = [
+        ("liquidations", LIQUIDATIONS_CHANNEL_URL, "LIQUIDATIONS_SESSION", handle_liquidation_message),
+        ("whale_alert", WHALE_ALERT_CHANNEL_URL, "WHALE_ALERT_SESSION", handle_whale_message),
+    ]
+    for name, url, session_env, handler in subscriptions:
+        session = os.environ.get(session_env)
+        if not session:
+            logging.warning(f"Нет {session_env}, канал {name} остаётся на скрапинге")
+            continue
+        channel = url.rstrip("/").rsplit("/", 1)[-1]
+        source = TelethonChannelSource(channel, session, api_id, api_hash)
+        channel_ingest.add(name, source, channel_handler(url, handler))
+
+async def compact_message_cache():
+    """Компактизация индекса дубликатов"""
+    try:
+        message_cache.compact()
+        news_clusters.compact()
+    except Exception as e:
+        logging.error(f"Ошибка компактизации индекса дубликатов: {e}")
+        raise
+
+# ===== МЕТРИКИ ЗАДАЧ =====
+JOB_DURATION = Histogram("bot_job_duration_seconds", "Длительность выполнения задачи", ["job"])
+JOB_RUNS = Counter("bot_job_runs_total", "Запуски задач по результату", ["job", "result"])
+
+# Подряд идущие сбои, после которых /health сообщает о проблеме
+JOB_MAX_FAILURES = 3
+
+# Задача без успеха дольше стольких своих интервалов считается остановившейся
+JOB_STALE_INTERVALS = 3
+
+# Время, с которого задачи этой реплики должны выполняться (None — пока не должны)
+jobs_active_since = None
+
+# Состояние задач для /health: метка -> последний успех и число сбоев подряд
+job_health = {}
+
+def track_job(func):
+    """Обёртка задачи планировщика: бюджет времени, длительность, успехи и сбои.
+
+    Возвращает результат задачи или None при сбое.
+    """
+    budget = JOB_BUDGETS.get(func.__name__, JOB_BUDGET_DEFAULT)
+    
+    @functools.wraps(func)
+    async def wrapper(*args):
+        label = ":".join([func.__name__, *map(str, args)])
+        state = job_health.setdefault(label, {"last_success": None, "failures": 0})
+        started = time.perf_counter()
+        value = None
+        try:
+            with deadline(budget):
+                value = await asyncio.wait_for(func(*args), budget + JOB_BUDGET_GRACE)
+        except asyncio.TimeoutError:
+            # Задача не уложилась даже с запасом: прерываем, чтобы не занимать слот планировщика
+            if time.perf_counter() - started >= budget + JOB_BUDGET_GRACE:
+                logging.error(f"Задача {label} прервана: превышен бюджет {budget} с")
+            result = "timeout"
+            state["failures"] += 1
+        except Exception:
+            # Ошибка уже записана в лог самой задачей
+            result = "failure"
+            state["failures"] += 1
+        else:
+            result = "success"
+            state["failures"] = 0
+            state["last_success"] = time.time()
+        JOB_DURATION.observe(time.perf_counter() - started, job=label)
+        JOB_RUNS.inc(job=label, result=result)
+        return value
+    return wrapper
+
+def failing_jobs():
+    """Задачи, не завершившиеся успешно JOB_MAX_FAILURES раз подряд"""
+    return [label for label, state in job_health.items() if state["failures"] >= JOB_MAX_FAILURES]
+
+def job_interval(job, now):
+    """Ожидаемый интервал между запусками задачи, сек"""
+    poller = pollers.get(job.id)
+    if poller is not None:
+        return poller.interval.interval
+    if isinstance(job.trigger, IntervalTrigger):
+        return job.trigger.interval.total_seconds()
+    # cron: промежуток между двумя ближайшими срабатываниями
+    first = job.trigger.get_next_fire_time(None, now)
+    second = job.trigger.get_next_fire_time(first, first + timedelta(seconds=1))
+    return (second - first).total_seconds() if first and second else None
+
+def stale_jobs(now=None):
+    """Задачи без успешного выполнения дольше JOB_STALE_INTERVALS своих интервалов.
+
+    Ловит остановившийся планировщик и задачи, оставшиеся на паузе, чего
+    счётчик сбоев подряд не видит: задача, которая не запускается, не сбоит.
+    """
+    if jobs_active_since is None or (leader is not None and not leader.is_leader):
+        return []
+    now = time.time() if now is None else now
+    moment = datetime.fromtimestamp(now, timezone.utc)
+    stale = []
+    for job in scheduler.get_jobs():
+        poller = pollers.get(job.id)
+        func, args = (poller.func, ()) if poller is not None else (job.func, job.args)
+        func = getattr(func, "__wrapped__", None)
+        interval = job_interval(job, moment)
+        if func is None or not interval:
+            continue
+        label = ":".join([func.__name__, *map(str, args)])
+        last_success = job_health.get(label, {}).get("last_success") or 0
+        budget = JOB_BUDGETS.get(func.__name__, JOB_BUDGET_DEFAULT)
+        if now - max(last_success, jobs_active_since) > JOB_STALE_INTERVALS * interval + budget:
+            stale.append(label)
+    return stale
+
+def format_breakers():
+    """Незакрытые предохранители источников, по строке на каждый"""
+    lines = []
+    for name, breaker in sorted(http.breakers.items()):
+        state = breaker.state
+        if state == "open":
+            lines.append(f"{name}: открыт, проба через {breaker.retry_in:.0f} с")
+        elif state == "half_open":
+            lines.append(f"{name}: пробный запрос")
+    return lines
+
+# Значения, которые считываются из компонентов в момент запроса /metrics
+REGISTRY.collector(
+    "bot_dedup_lookups_total", "Проверки индекса дубликатов", "counter",
+    lambda: [((), message_cache.stats["lookups"])],
+)
+REGISTRY.collector(
+    "bot_dedup_hits_total", "Найденные дубликаты", "counter",
+    lambda: [((), message_cache.stats["hits"])],
+)
+REGISTRY.collector(
+    "bot_dedup_hit_ratio", "Доля проверок, нашедших дубликат", "gauge",
+    lambda: [((), message_cache.hit_ratio)],
+)
+REGISTRY.collector(
+    "bot_send_queue_depth", "Сообщений в очереди отправки", "gauge",
+    lambda: [((), send_queue.depth)],
+)
+REGISTRY.collector(
+    "bot_http_connections_total", "Соединения HTTP-клиента", "counter",
+    lambda: [(("created",), http.stats["connections_created"]), (("reused",), http.stats["connections_reused"])],
+    labelnames=["kind"],
+)
+REGISTRY.collector(
+    "bot_price_stream_connected", "Подключен ли поток цен Binance", "gauge",
+    lambda: [((), int(price_stream.connected))],
+)
+REGISTRY.collector(
+    "bot_leader", "Является ли реплика ведущей (1 без координации)", "gauge",
+    lambda: [((), int(leader is None or leader.is_leader))],
+)
+REGISTRY.collector(
+    "bot_job_last_success_timestamp_seconds", "Время последнего успешного выполнения задачи", "gauge",
+    lambda: [((label,), state["last_success"]) for label, state in job_health.items()],
+    labelnames=["job"],
+)
 
 # ===== ИНИЦИАЛИЗАЦИЯ ПЛАНИРОВЩИКА =====
-def setup_scheduler():
+# Адаптивные задачи опроса: id задачи -> AdaptivePoller
+pollers = {}
+
+def setup_polling_jobs():
+    """Задачи опроса новостей и каналов: постоянные интервалы или адаптивные"""
+    if SCHEDULER_MODE == "adaptive":
+        for func in (publish_eth_news, publish_liquidations, publish_whale_alerts):
+            poller = AdaptivePoller(scheduler, func.__name__, track_job(func), POLL_POLICIES[func.__name__])
+            pollers[func.__name__] = poller
+            poller.start()
+        return
+    
     # Новости каждые 2 часа
-    scheduler.add_job(publish_eth_news, 'interval', hours=2)
+    scheduler.add_job(track_job(publish_eth_news), 'interval', hours=2, id="publish_eth_news")
     
-    # Анализ свечей
-    scheduler.add_job(send_candle_analysis, 'cron', hour='*/1', args=["1h"])  # Каждый час
-    scheduler.add_job(send_candle_analysis, 'cron', hour='*/4', args=["4h"])  # Каждые 4 часа
-    scheduler.add_job(send_candle_analysis, 'cron', hour=0, minute=5, args=["1d"])  # Ежедневно в 00:05 UTC
-    scheduler.add_job(send_candle_analysis, 'cron', day_of_week='sun', hour=23, minute=55, args=["1w"])  # Воскресенье 23:55 UTC
+    # Парсинг данных
+    scheduler.add_job(track_job(publish_liquidations), 'interval', minutes=10, id="publish_liquidations")
+    scheduler.add_job(track_job(publish_whale_alerts), 'interval', minutes=15, id="publish_whale_alerts")
+
+def setup_scheduler():
+    global jobs_active_since
+    # Новости и каналы
+    setup_polling_jobs()
+    
+    # Анализ свечей: задача на каждую пару и каждый её таймфрейм
+    for config in SYMBOLS:
+        for timeframe in config.timeframes:
+            scheduler.add_job(
+                track_job(send_candle_analysis), 'cron', args=[timeframe, config.symbol],
+                **CANDLE_SCHEDULES[timeframe],
+            )
     
     # Индикатор альтсезона ежедневно в 11:00 UTC
-    scheduler.add_job(send_altseason_indicator, 'cron', hour=11, minute=0)
+    scheduler.add_job(track_job(send_altseason_indicator), 'cron', hour=11, minute=0)
     
-    # Мониторинг цены каждые 15 минут
-    scheduler.add_job(monitor_price_changes, 'interval', minutes=15)
+    # Резервный мониторинг цены, пока поток цен недоступен
+    scheduler.add_job(track_job(monitor_price_changes), 'interval', minutes=1)
     
-    # Парсинг данных
-    scheduler.add_job(publish_liquidations, 'interval', minutes=10)
-    scheduler.add_job(publish_whale_alerts, 'interval', minutes=15)
+    # Сводки ликвидаций и whale-переводов
+    scheduler.add_job(track_job(flush_digests), 'interval', seconds=30)
     
-    scheduler.start()
+    # Очистка просроченных ключей дедупликации
+    scheduler.add_job(track_job(compact_message_cache), 'interval', hours=1)
+    
+    # При нескольких репликах задачи выполняются только на ведущей
+    scheduler.start(paused=leader is not None)
+    if leader is None:
+        jobs_active_since = time.time()
+
+# ===== КООРДИНАЦИЯ РЕПЛИК =====
+async def on_elected():
+    """Реплика стала ведущей: ключи прежней ведущей, подписки, задачи"""
+    global jobs_active_since
+    merged = message_cache.merge(await leader.load_seen())
+    logging.info(f"Получено ключей дедупликации от прежней ведущей реплики: {merged}")
+    await channel_ingest.start()
+    scheduler.resume()
+    jobs_active_since = time.time()
+    if UPDATES_MODE == "webhook":
+        await set_webhook()
+
+async def on_demoted():
+    """Реплика перестала быть ведущей: задачи и подписки останавливаются"""
+    if scheduler.running:
+        scheduler.pause()
+    await channel_ingest.stop()
+
+if leader is not None:
+    leader.on_elected = on_elected
+    leader.on_demoted = on_demoted
+    message_cache.on_add = leader.record_seen
+
+async def run_polling():
+    """Обработка команд; при нескольких репликах — только пока реплика ведущая"""
+    if leader is None:
+        # getUpdates не работает, пока установлен webhook от прежнего запуска
+        await bot.delete_webhook()
+        await dp.start_polling(bot, close_bot_session=False)
+        return
+    
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    
+    stop_task = asyncio.create_task(stopping.wait())
+    try:
+        while not stopping.is_set():
+            elected = asyncio.create_task(leader.wait_elected())
+            await asyncio.wait({elected, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+            elected.cancel()
+            if stopping.is_set():
+                break
+            
+            await bot.delete_webhook()
+            polling = asyncio.create_task(
+                dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+            )
+            demoted = asyncio.create_task(leader.wait_demoted())
+            await asyncio.wait({polling, demoted, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+            demoted.cancel()
+            if not polling.done():
+                await dp.stop_polling()
+            await polling
+    finally:
+        stop_task.cancel()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+
+# ===== WEBHOOK =====
+# Обновления обрабатываются в фоновых задачах: Telegram сразу получает ответ,
+# а следующие обновления не ждут завершения обработчиков предыдущих
+webhook_handler = SimpleRequestHandler(dp, bot, handle_in_background=True, secret_token=WEBHOOK_SECRET)
+
+async def set_webhook():
+    """Регистрация адреса webhook с секретом в Bot API"""
+    await bot.set_webhook(
+        f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logging.info(f"Webhook установлен: {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+
+async def run_webhook():
+    """Обновления приходят на HTTP-сервер; ожидание сигнала остановки.
+
+    При нескольких репликах webhook устанавливает ведущая (см. on_elected),
+    а команды обрабатывает любая реплика, получившая запрос.
+    """
+    if leader is None:
+        await set_webhook()
+    
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    try:
+        await stopping.wait()
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
 
 # ===== ОСНОВНЫЕ КОМАНДЫ =====
 @dp.message(Command("start"))
@@ -475,19 +1236,75 @@ async def cmd_start(message: types.Message):
         "Все публикации отправляются в указанный канал."
     )
 
+def format_volatility(engine):
+    """Волатильность по окнам из локальной истории цен, без сетевых запросов"""
+    history = engine.history
+    lines = []
+    for seconds in engine.windows.values():
+        spread = history.range_pct(seconds)
+        if spread is None:
+            continue
+        change = history.change_since(seconds)
+        change_text = f"{change:+.2f}%" if change is not None else "N/A"
+        lines.append(
+            f"  {describe_window(seconds)}: размах {spread:.2f}%, "
+            f"изменение {change_text}, от максимума {history.drawdown(seconds):.2f}%"
+        )
+    return "\n".join(lines) if lines else "  нет данных"
+
+def format_send_latency():
+    """Задержка отправки из очереди"""
+    latency = send_queue.latency_summary()
+    if not latency:
+        return ""
+    return f", задержка p50 {latency['p50']:.1f} с / p95 {latency['p95']:.1f} с"
+
 @dp.message(Command("status"))
 async def cmd_status(message: types.Message):
     """Проверка статуса бота"""
-    eth_price = await get_eth_price()
+    # Цены из потока, иначе из кэша (устаревшее значение обновляется в фоне)
+    if price_stream.connected:
+        prices = {symbol: engine.last_price for symbol, engine in price_engines.items()}
+    else:
+        prices = await get_prices()
+    price_lines = "\n".join(
+        f"  {config.pair}: {f'${prices[config.symbol]:,.2f}' if prices.get(config.symbol) else 'N/A'}"
+        for config in SYMBOLS
+    )
     jobs = scheduler.get_jobs()
+    liquidations_job = scheduler.get_job("publish_liquidations")
+    whales_job = scheduler.get_job("publish_whale_alerts")
+    # Волатильность — по первой паре из конфигурации
+    primary = SYMBOLS[0]
     
     status = (
         f"🟢 Бот активен\n"
-        f"▫️ Текущая цена ETH: ${eth_price:,.2f if eth_price else 'N/A'}\n"
+        f"▫️ Текущие цены:\n{price_lines}\n"
         f"▫️ Активных задач: {len(jobs)}\n"
-        f"▫️ След. ликвидации: {jobs[5].next_run_time if len(jobs) > 5 else 'N/A'}\n"
-        f"▫️ След. whale alert: {jobs[6].next_run_time if len(jobs) > 6 else 'N/A'}"
+        f"▫️ След. ликвидации: {liquidations_job.next_run_time if liquidations_job else 'N/A'}\n"
+        f"▫️ След. whale alert: {whales_job.next_run_time if whales_job else 'N/A'}\n"
+        f"▫️ HTTP: {http.stats['requests']} запросов, "
+        f"повторное использование соединений {http.reuse_ratio:.0%}\n"
+        f"▫️ Очередь отправки: {send_queue.depth}, отправлено {send_queue.stats['sent']}, "
+        f"flood wait {send_queue.stats['flood_waits']}{format_send_latency()}\n"
+        f"▫️ Волатильность {primary.asset}:\n{format_volatility(price_engines[primary.symbol])}"
     )
+    if startup.total is not None:
+        status += f"\n▫️ Запуск: {startup.total:.1f} с"
+    breakers = format_breakers()
+    status += f"\n▫️ Источники: {'все доступны' if not breakers else ''}"
+    for line in breakers:
+        status += f"\n  {line}"
+    if pollers:
+        intervals = ", ".join(
+            f"{job_id} {poller.interval.interval / 60:.0f} мин" for job_id, poller in pollers.items()
+        )
+        status += f"\n▫️ Интервалы опроса: {intervals}"
+    if leader is not None:
+        status += (
+            f"\n▫️ Реплика {INSTANCE_ID}: {'ведущая' if leader.is_leader else 'ведомая'}, "
+            f"отброшено по токену {send_queue.stats['fenced']}"
+        )
     
     await message.answer(status)
 
@@ -504,12 +1321,102 @@ async def cmd_ping_admin(message: types.Message):
 
 # ===== HTTP SERVER FOR HEALTH CHECKS =====
 async def health_handler(request):
-    return web.Response(text="Bot is running")
+    failing = failing_jobs()
+    stale = stale_jobs()
+    # Отключённый источник не делает бота неработоспособным: задачи деградируют сами
+    breakers = "".join(f"\nBreaker {line}" for line in format_breakers())
+    problems = []
+    if failing:
+        problems.append(f"Failing jobs: {', '.join(failing)}")
+    if stale:
+        problems.append(f"Stale jobs: {', '.join(stale)}")
+    if problems:
+        return web.Response(status=503, text="\n".join(problems) + breakers)
+    return web.Response(text=f"Bot is running{breakers}")
+
+async def metrics_handler(request):
+    return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Prometheus-Format": "0.0.4"})
+
+# Текущий сеанс профилирования и отладочный режим asyncio для /debug/profile
+profiler = None
+slow_callbacks = SlowCallbackMonitor()
+
+def format_profile(result, seconds, limit):
+    busy = 1 - result.idle / result.samples if result.samples else 0.0
+    lines = [f"# {result.samples} снимков за {seconds:g} с, event loop занят {busy:.0%}", "# Собственное время:"]
+    lines += [f"#   {count / result.samples:6.1%} {function}" for function, count in result.top_functions()]
+    return "\n".join(lines) + "\n\n" + result.collapsed(limit) + "\n"
+
+def format_debug_status():
+    lines = [f"Запуск: {startup.summary()}"]
+    if slow_callbacks.threshold is None:
+        lines.append("Отладочный режим asyncio выключен")
+    else:
+        lines.append(f"Отладочный режим asyncio: порог {slow_callbacks.threshold} с, "
+                     f"медленных callback {slow_callbacks.log.count}")
+        lines += list(slow_callbacks.log.records)[-20:]
+    lines.append(f"Задач event loop: {len(asyncio.all_tasks())}")
+    lines.append(f"Профилирование: {'идёт' if profiler is not None and profiler.running else 'нет'}")
+    return "\n".join(lines) + "\n"
+
+async def debug_profile_handler(request):
+    """Профилирование на ходу, только с заголовком Authorization: Bearer DEBUG_TOKEN.
+
+    GET ?mode=status — фазы запуска, медленные callback'и, число задач
+    GET ?mode=cpu&seconds=10&interval=0.005&threads=all&limit=200&format=collapsed — свёрнутые стеки
+    GET ?mode=tasks&depth=10 — задачи event loop со стеками
+    POST ?mode=slow&threshold=0.1 — отладочный режим asyncio с порогом; threshold=0 выключает
+    """
+    global profiler
+    token = request.headers.get("Authorization", "").encode()
+    if not hmac.compare_digest(token, f"Bearer {DEBUG_TOKEN}".encode()):
+        logging.warning(f"Отклонён запрос /debug/profile от {request.remote}")
+        raise web.HTTPUnauthorized()
+
+    query = request.query
+    mode = query.get("mode", "status")
+    try:
+        if mode == "cpu":
+            seconds = min(float(query.get("seconds", 10)), PROFILE_MAX_SECONDS)
+            interval = max(float(query.get("interval", 0.005)), 0.001)
+            limit = int(query.get("limit", 200))
+            if profiler is not None and profiler.running:
+                raise web.HTTPConflict(text="Профилирование уже идёт\n")
+            profiler = SamplingProfiler(interval, all_threads=query.get("threads") == "all")
+            logging.info(f"Профилирование event loop на {seconds:g} с")
+            result = await profiler.profile(seconds)
+            if query.get("format") == "collapsed":
+                return web.Response(text=result.collapsed(limit) + "\n")
+            return web.Response(text=format_profile(result, seconds, limit))
+        if mode == "tasks":
+            return web.Response(text=dump_tasks(limit=int(query.get("depth", 10))) + "\n")
+        if mode == "slow":
+            if request.method != "POST":
+                raise web.HTTPMethodNotAllowed(request.method, ["POST"])
+            threshold = float(query.get("threshold", 0.1))
+            if threshold > 0:
+                slow_callbacks.enable(threshold)
+            else:
+                slow_callbacks.disable()
+            return web.Response(text=format_debug_status())
+        if mode == "status":
+            return web.Response(text=format_debug_status())
+    except ValueError:
+        raise web.HTTPBadRequest(text="Некорректные параметры\n")
+    raise web.HTTPBadRequest(text=f"Неизвестный режим: {mode}\n")
 
 async def start_http_server():
-    """Запуск HTTP-сервера для health checks"""
+    """Запуск HTTP-сервера для health checks, метрик, webhook и профилирования"""
     app = web.Application()
     app.router.add_get('/health', health_handler)
+    app.router.add_get('/metrics', metrics_handler)
+    if DEBUG_TOKEN:
+        app.router.add_get('/debug/profile', debug_profile_handler)
+        app.router.add_post('/debug/profile', debug_profile_handler)
+    if UPDATES_MODE == "webhook":
+        # Без webhook_handler.register(): он закрывает сессию бота при остановке сервера
+        app.router.add_post(WEBHOOK_PATH, webhook_handler.handle)
     runner = web.AppRunner(app)
     await runner.setup()
     
@@ -524,6 +1431,8 @@ async def on_startup():
     
     # Проверка обязательных переменных
     required_envs = ['API_TOKEN', 'ADMIN_CHAT_ID', 'CHANNEL_ID']
+    if UPDATES_MODE == "webhook":
+        required_envs += ['WEBHOOK_URL', 'WEBHOOK_SECRET']
     missing = [var for var in required_envs if not os.getenv(var)]
     
     if missing:
@@ -533,42 +1442,98 @@ async def on_startup():
     
     setup_scheduler()
     
-    # Проверка доступности администратора
-    try:
-        me = await bot.get_me()
+    # Проверки бота и доступности администратора независимы и идут параллельно
+    me, chat_action = await asyncio.gather(
+        bot.get_me(),
+        bot.send_chat_action(ADMIN_CHAT_ID, "typing"),
+        return_exceptions=True,
+    )
+    if isinstance(me, Exception):
+        logging.error(f"Ошибка проверки бота: {me}")
+    else:
         logging.info(f"Бот @{me.username} успешно запущен")
-        
-        # ПРОВЕРКА: Бот может отправлять сообщения администратору?
-        await bot.send_chat_action(ADMIN_CHAT_ID, "typing")
-        logging.info(f"Администратор {ADMIN_CHAT_ID} доступен")
-    except TelegramForbiddenError:
+    
+    # ПРОВЕРКА: Бот может отправлять сообщения администратору?
+    if isinstance(chat_action, TelegramForbiddenError):
         logging.warning(f"Бот не может отправить сообщение администратору {ADMIN_CHAT_ID}. "
                         "Убедитесь, что администратор запустил бота командой /start")
-    except Exception as e:
-        logging.error(f"Ошибка проверки администратора: {e}")
+    elif isinstance(chat_action, Exception):
+        logging.error(f"Ошибка проверки администратора: {chat_action}")
+    else:
+        logging.info(f"Администратор {ADMIN_CHAT_ID} доступен")
 
 async def on_shutdown():
     logging.info("Stopping scheduler...")
     scheduler.shutdown()
+    await price_stream.stop()
+    await channel_ingest.stop()
+    for digest in (liquidation_digest, whale_digest):
+        await digest.flush()
+    await send_queue.stop()
+    if leader is not None:
+        # Аренда освобождается после отправки очереди, другая реплика подхватит её сразу
+        await leader.stop()
+        await leader.backend.close()
+    await http.close()
+    parse_pool.close()
+    candle_store.close()
+    message_cache.close()
+    news_clusters.close()
     try:
         await bot.send_message(ADMIN_CHAT_ID, "🔴 Ethereum Tracker Bot остановлен!")
     except TelegramForbiddenError:
         logging.warning("Не удалось отправить сообщение администратору при остановке")
     except Exception as e:
         logging.error(f"Ошибка при остановке: {e}")
+    await bot.session.close()
 
 # ===== ГЛАВНАЯ ФУНКЦИЯ =====
 async def main():
-    # Запуск HTTP-сервера
-    await start_http_server()
+    # Создание клиентов, хранилищ и обработчиков при импорте модуля
+    startup.mark("init")
     
-    # Инициализация бота
-    await on_startup()
+    # Общий пул соединений для всех источников данных
+    with startup.phase("http_client"):
+        await http.start()
     
-    # Запуск обработки сообщений
-    await dp.start_polling(bot)
+    # Измерение задержки event loop
+    loop_lag_task = asyncio.create_task(monitor_loop_lag())
+    
+    # Отправка сообщений в канал
+    await send_queue.start()
+    
+    # MTProto-подписки на каналы (при нескольких репликах — после избрания ведущей)
+    setup_channel_ingest()
+    
+    # Независимые шаги запуска идут параллельно. on_startup первым: проверка
+    # переменных окружения и планировщик выполняются до первого await остальных
+    phases = [
+        startup.run("startup_checks", on_startup()),
+        startup.run("http_server", start_http_server()),
+    ]
+    # Поток цен и свечей Binance
+    if PRICE_STREAM_ENABLED:
+        phases.append(startup.run("price_stream", price_stream.start()))
+    if leader is None:
+        phases.append(startup.run("channel_ingest", channel_ingest.start()))
+    await asyncio.gather(*phases)
+    
+    # Участие в выборе ведущей реплики
+    if leader is not None:
+        with startup.phase("leader"):
+            await leader.start()
+    
+    startup.finish()
+    logging.info(f"Запуск за {startup.total:.2f} с: {startup.summary()}")
+    
+    # Запуск обработки сообщений: webhook на HTTP-сервере или long polling
+    if UPDATES_MODE == "webhook":
+        await run_webhook()
+    else:
+        await run_polling()
     
     # Остановка
+    loop_lag_task.cancel()
     await on_shutdown()
 
 if __name__ == "__main__":
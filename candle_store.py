@@ -0,0 +1,134 @@
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("open_time", "open", "high", "low", "close", "volume", "close_time")
+
+# Длительность интервалов Binance фиксированной длины, мс
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000,
+    "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    open_time INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    volume REAL NOT NULL,
+    close_time INTEGER NOT NULL,
+    PRIMARY KEY (symbol, interval, open_time)
+) WITHOUT ROWID
+"""
+
+
+class CandleStore:
+    """Локальное хранилище свечей Binance в SQLite.
+
+    Хранятся только закрытые свечи. Первый sync() загружает backfill_limit
+    последних свечей, следующие запрашивают свечи начиная с последней
+    сохранённой и не обращаются к REST, пока новая свеча не закрылась.
+    Закрытые свечи из потока Binance добавляются через append_closed().
+    """
+
+    def __init__(self, path, http, rest_url, backfill_limit=1000, page_limit=1000):
+        self.path = path
+        self.http = http
+        self.rest_url = rest_url.rstrip("/")
+        self.backfill_limit = backfill_limit
+        self.page_limit = page_limit
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def last_open_time(self, symbol, interval):
+        row = self._db.execute(
+            "SELECT MAX(open_time) FROM candles WHERE symbol = ? AND interval = ?",
+            (symbol, interval),
+        ).fetchone()
+        return row[0]
+
+    def upsert(self, symbol, interval, klines):
+        """Сохранение свечей в формате ответа /api/v3/klines"""
+        rows = [
+            (symbol, interval, int(k[0]), float(k[1]), float(k[2]), float(k[3]),
+             float(k[4]), float(k[5]), int(k[6]))
+            for k in klines
+        ]
+        self._db.executemany(
+            "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        self._db.commit()
+        return len(rows)
+
+    async def _fetch(self, symbol, interval, start_time=None, limit=None):
+        params = {"symbol": symbol, "interval": interval, "limit": limit or self.page_limit}
+        if start_time is not None:
+            params["startTime"] = start_time
+        response = await self.http.get(f"{self.rest_url}/api/v3/klines", source="binance", params=params)
+        if response.status != 200:
+            raise RuntimeError(f"статус {response.status}")
+        return response.json()
+
+    def append_closed(self, symbol, interval, kline):
+        """Закрытая свеча из потока; сохраняется, только если продолжает историю без разрыва"""
+        step = INTERVAL_MS.get(interval)
+        last = self.last_open_time(symbol, interval)
+        if step is None or last is None or int(kline[0]) - last > step:
+            # Пропуск дозагрузит sync()
+            return False
+        self.upsert(symbol, interval, [kline])
+        return True
+
+    async def sync(self, symbol, interval, now=None):
+        """Загрузка только новых закрытых свечей; возвращает число сохранённых строк"""
+        now_ms = int((now if now is not None else time.time()) * 1000)
+        last = self.last_open_time(symbol, interval)
+        if last is None:
+            klines = await self._fetch(symbol, interval, limit=self.backfill_limit)
+            saved = self.upsert(symbol, interval, [k for k in klines if int(k[6]) < now_ms])
+            logger.info(f"Свечи {symbol} {interval}: первичная загрузка {saved} шт.")
+            return saved
+
+        # Следующая за сохранённой свеча ещё не закрылась — запрашивать нечего
+        step = INTERVAL_MS.get(interval)
+        if step is not None and last + 2 * step > now_ms:
+            return 0
+
+        saved = 0
+        while True:
+            klines = await self._fetch(symbol, interval, start_time=last)
+            saved += self.upsert(symbol, interval, [k for k in klines if int(k[6]) < now_ms])
+            if len(klines) < self.page_limit:
+                return saved
+            last = int(klines[-1][0])
+
+    def load(self, symbol, interval, limit=None, closed_only=True, now=None):
+        """Свечи в виде словаря NumPy-массивов по колонкам, от старых к новым"""
+        query = "SELECT open_time, open, high, low, close, volume, close_time FROM candles " \
+                "WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if closed_only:
+            query += " AND close_time < ?"
+            params.append(int((now if now is not None else time.time()) * 1000))
+        query += " ORDER BY open_time DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        rows = self._db.execute(query, params).fetchall()
+        # NumPy нужен только анализу свечей; загружается при первом обращении
+        import numpy as np
+        data = np.array(rows[::-1], dtype=float).reshape(-1, len(COLUMNS))
+        return {name: data[:, i] for i, name in enumerate(COLUMNS)}
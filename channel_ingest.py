@@ -0,0 +1,95 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def message_to_dict(channel, message):
+    """Сообщение Telethon в формате fetch_telegram_channel"""
+    return {
+        'id': message.id,
+        'text': message.message or "",
+        'link': f"https://t.me/{channel}/{message.id}",
+        'time': message.date.isoformat() if message.date else "",
+    }
+
+
+class TelethonChannelSource:
+    """Новые сообщения публичного канала по MTProto через пользовательскую сессию Telethon"""
+
+    def __init__(self, channel, session, api_id, api_hash):
+        self.channel = channel
+        self.session = session
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self._client = None
+
+    @property
+    def connected(self):
+        return self._client is not None and self._client.is_connected()
+
+    async def start(self, callback):
+        # Telethon нужен только в этом режиме
+        from telethon import TelegramClient, events
+        from telethon.sessions import StringSession
+
+        client = TelegramClient(StringSession(self.session), self.api_id, self.api_hash)
+        await client.connect()
+        if not await client.is_user_authorized():
+            await client.disconnect()
+            raise RuntimeError(f"сессия для {self.channel} не авторизована, запустите generate_sessions.py")
+
+        async def on_new_message(event):
+            await callback(message_to_dict(self.channel, event.message))
+
+        client.add_event_handler(on_new_message, events.NewMessage(chats=self.channel))
+        self._client = client
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.disconnect()
+            self._client = None
+
+
+class ChannelIngest:
+    """Push-подписки на каналы с обработчиками, общими со скрапингом.
+
+    Источник — любой объект с async start(callback), async stop() и
+    свойством connected, поэтому в тестах Telethon подменяется заглушкой.
+    Пока источник канала не подключен, задачи опроса продолжают скрапинг.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        self.stats = {"events": 0, "errors": 0}
+
+    def add(self, name, source, handler):
+        self._sources[name] = (source, handler)
+
+    def is_live(self, name):
+        entry = self._sources.get(name)
+        return entry is not None and entry[0].connected
+
+    async def start(self):
+        for name, (source, handler) in self._sources.items():
+            try:
+                await source.start(self._wrap(name, handler))
+                logger.info(f"MTProto-подписка {name} активна")
+            except Exception as e:
+                logger.error(f"MTProto-подписка {name} недоступна, используется скрапинг: {e}")
+
+    async def stop(self):
+        for name, (source, _) in self._sources.items():
+            try:
+                await source.stop()
+            except Exception as e:
+                logger.error(f"Ошибка остановки подписки {name}: {e}")
+
+    def _wrap(self, name, handler):
+        async def callback(msg):
+            self.stats["events"] += 1
+            try:
+                await handler(msg)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Ошибка обработки сообщения {name}: {e}")
+        return callback
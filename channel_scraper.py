@@ -0,0 +1,143 @@
+import functools
+import logging
+
+from parse_pool import ParsePool
+
+logger = logging.getLogger(__name__)
+
+
+def _class_xpath(tag, name):
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+
+
+@functools.cache
+def _queries():
+    """XPath-выражения разметки t.me/s: (посты, метка рекламы, текст, ссылка, время).
+
+    Компилируются при первом разборе, чтобы lxml не загружался при запуске бота.
+    """
+    from lxml import etree
+    return (
+        etree.XPath("//" + _class_xpath("div", "tgme_widget_message") + "[@data-post]"),
+        etree.XPath(".//" + _class_xpath("a", "tgme_widget_message_ad_label")),
+        etree.XPath(".//" + _class_xpath("div", "tgme_widget_message_text")),
+        etree.XPath(".//" + _class_xpath("a", "tgme_widget_message_date") + "/@href"),
+        etree.XPath(".//time/@datetime"),
+    )
+
+
+def post_id(data_post):
+    """'BinanceLiquidations/12345' -> 12345"""
+    try:
+        return int(data_post.rsplit("/", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def parse_channel_page(page, after_id=None):
+    """Разбор страницы t.me/s: (сообщения новее after_id от старых к новым, максимальный ID).
+
+    Посты на странице идут от старых к новым, поэтому обход идёт с конца и
+    останавливается на первом уже известном ID.
+    """
+    if not page:
+        return [], None
+    from lxml import html as lxml_html
+    messages_query, ad_label_query, text_query, date_link_query, time_query = _queries()
+    root = lxml_html.fromstring(page)
+    messages = []
+    max_id = None
+
+    for div in reversed(messages_query(root)):
+        message_id = post_id(div.get("data-post"))
+        if message_id is None:
+            continue
+        if after_id is not None and message_id <= after_id:
+            break
+        if max_id is None or message_id > max_id:
+            max_id = message_id
+
+        # Пропускаем рекламные посты
+        if ad_label_query(div):
+            continue
+
+        text_divs = text_query(div)
+        links = date_link_query(div)
+        times = time_query(div)
+        if not text_divs or not links or not times:
+            continue
+
+        messages.append({
+            'id': message_id,
+            'text': "".join(part.strip() for part in text_divs[0].itertext()),
+            'link': links[0],
+            'time': times[0],
+        })
+
+    messages.reverse()
+    return messages, max_id
+
+
+class ChannelScraper:
+    """Инкрементальный сбор постов публичного канала через t.me/s.
+
+    Для каждого канала запоминается наибольший ID поста; следующие опросы
+    запрашивают только ?after=ID и листают дальше, пока страницы полные.
+    Если за max_pages страниц канал не догнать, промежуток пропускается и
+    сбор продолжается с последней страницы.
+    """
+
+    def __init__(self, http, parse_pool=None, max_pages=5, full_page=15):
+        self.http = http
+        self.parse_pool = parse_pool or ParsePool(kind="inline")
+        self.max_pages = max_pages
+        self.full_page = full_page
+        self.cursors = {}
+        self.stats = {"requests": 0, "posts": 0, "skipped": 0}
+
+    async def _get(self, url, params=None):
+        self.stats["requests"] += 1
+        response = await self.http.get(url, source="telegram", params=params)
+        if response.status != 200:
+            raise RuntimeError(f"статус {response.status}")
+        return response.body
+
+    async def fetch(self, url):
+        """Новые сообщения канала от старых к новым"""
+        cursor = self.cursors.get(url)
+        if cursor is None:
+            # Первый опрос: последняя страница канала целиком
+            page = await self._get(url)
+            messages, max_id = await self.parse_pool.run("channel", parse_channel_page, page)
+            if max_id is not None:
+                self.cursors[url] = max_id
+            self.stats["posts"] += len(messages)
+            return messages
+
+        messages = []
+        for _ in range(self.max_pages):
+            page = await self._get(url, {"after": cursor})
+            batch, max_id = await self.parse_pool.run("channel", parse_channel_page, page, cursor)
+            if max_id is None:
+                break
+            messages.extend(batch)
+            # Разрыв ID — оценка числа постов; удалённые посты дадут лишь лишнюю страницу
+            fetched = max_id - cursor
+            cursor = self.cursors[url] = max_id
+            if fetched < self.full_page:
+                break
+        else:
+            # Страницы кончились, а канал ушёл дальше: переход на последнюю страницу,
+            # иначе курсор застревает на старых постах и отставание только растёт
+            page = await self._get(url)
+            batch, max_id = await self.parse_pool.run("channel", parse_channel_page, page, cursor)
+            if max_id is not None and max_id > cursor:
+                skipped = (batch[0]["id"] if batch else max_id + 1) - cursor - 1
+                self.stats["skipped"] += skipped
+                self.cursors[url] = max_id
+                messages.extend(batch)
+                logger.warning(f"Канал {url}: отставание больше {self.max_pages} страниц, "
+                               f"пропущено около {skipped} постов")
+
+        self.stats["posts"] += len(messages)
+        return messages
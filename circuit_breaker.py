@@ -0,0 +1,142 @@
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+BREAKER_STATE = Gauge("bot_breaker_state", "Состояние предохранителя источника: 0 закрыт, 1 полуоткрыт, 2 открыт", ["breaker"])
+BREAKER_REJECTED = Counter("bot_breaker_rejected_total", "Запросы, отклонённые открытым предохранителем", ["breaker"])
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Источник временно отключён предохранителем"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name}: предохранитель открыт, повтор через {retry_in:.0f} с")
+        self.name = name
+        self.retry_in = retry_in
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """Пороги предохранителя по последним window вызовам источника"""
+    window: int = 20
+    min_calls: int = 5            # Меньше вызовов в окне — недостаточно данных для решения
+    failure_rate: float = 0.5
+    slow_call: float = 5.0        # Вызов дольше этого, сек, считается медленным
+    slow_rate: float = 0.8
+    cool_down: float = 30.0
+    max_cool_down: float = 600.0  # Каждая неудачная проба удваивает паузу до этого предела
+    half_open_calls: int = 1
+
+
+class CircuitBreaker:
+    """Предохранитель источника: закрыт, открыт, полуоткрыт.
+
+    В закрытом состоянии вызовы проходят, а их исходы копятся в окне; при
+    доле сбоев или медленных вызовов выше порога предохранитель открывается
+    и на время cool_down отклоняет вызовы без обращения к источнику. Затем
+    пропускается half_open_calls пробных вызовов: их успех закрывает
+    предохранитель, сбой снова открывает его с удвоенной паузой.
+    """
+
+    def __init__(self, name, policy, clock=time.monotonic):
+        self.name = name
+        self.policy = policy
+        self.clock = clock
+
+        self._state = CLOSED
+        self._outcomes = deque(maxlen=policy.window)  # (сбой, медленный)
+        self._opened_at = 0.0
+        self._cool_down = policy.cool_down
+        self._probes = 0
+        self._probe_successes = 0
+        self.stats = {"calls": 0, "failures": 0, "slow": 0, "rejected": 0, "opened": 0}
+        BREAKER_STATE.set(0, breaker=name)
+
+    @property
+    def state(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self._cool_down:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @property
+    def retry_in(self):
+        """Сколько секунд осталось до пробного вызова"""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._cool_down - self.clock())
+
+    def check(self):
+        """Разрешение на вызов; CircuitOpenError, если источник отключён"""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and self._probes < self.policy.half_open_calls:
+            self._probes += 1
+            return
+        self.stats["rejected"] += 1
+        BREAKER_REJECTED.inc(breaker=self.name)
+        raise CircuitOpenError(self.name, self.retry_in)
+
+    def record(self, success, duration):
+        """Исход разрешённого вызова"""
+        slow = duration >= self.policy.slow_call
+        self.stats["calls"] += 1
+        self.stats["failures"] += not success
+        self.stats["slow"] += slow
+
+        if self._state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            if not success or slow:
+                self._cool_down = min(self._cool_down * 2, self.policy.max_cool_down)
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.policy.half_open_calls:
+                self._cool_down = self.policy.cool_down
+                self._transition(CLOSED)
+            return
+        if self._state == OPEN:
+            # Вызов начался до открытия предохранителя
+            return
+
+        self._outcomes.append((not success, slow))
+        calls = len(self._outcomes)
+        if calls < self.policy.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._outcomes)
+        slow_calls = sum(is_slow for _, is_slow in self._outcomes)
+        if failures / calls >= self.policy.failure_rate or slow_calls / calls >= self.policy.slow_rate:
+            self._open()
+
+    def release(self):
+        """Разрешённый вызов завершился без исхода, который можно отнести к источнику"""
+        if self._state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+    def _open(self):
+        self._opened_at = self.clock()
+        self.stats["opened"] += 1
+        self._transition(OPEN)
+        logger.warning(f"Предохранитель {self.name} открыт на {self._cool_down:.0f} с")
+
+    def _transition(self, state):
+        if state == self._state:
+            return
+        if state == CLOSED:
+            logger.info(f"Предохранитель {self.name} закрыт, источник снова доступен")
+        self._state = state
+        self._outcomes.clear()
+        self._probes = 0
+        self._probe_successes = 0
+        BREAKER_STATE.set(_STATE_VALUES[state], breaker=self.name)
@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    token INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteLockBackend:
+    """Аренды в общем SQLite-файле для нескольких процессов на одном хосте.
+
+    Каждый новый захват аренды увеличивает токен (fencing token), поэтому
+    прежний владелец, потерявший аренду, не пройдёт validate(). Там же
+    хранятся ключи опубликованных сообщений для новой ведущей реплики.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        # isolation_level=None: транзакции открываются явно через BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, timeout=1, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SQLITE_SCHEMA)
+
+    async def acquire(self, name, holder, ttl):
+        """Токен аренды или None, если её держит другой владелец"""
+        now = self.clock()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT holder, token, expires_at FROM leases WHERE name = ?", (name,)
+            ).fetchone()
+            if row is not None and row[2] > now:
+                if row[0] != holder:
+                    self._db.execute("ROLLBACK")
+                    return None
+                token = row[1]
+            else:
+                token = (row[1] if row else 0) + 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO leases VALUES (?, ?, ?, ?)", (name, holder, token, now + ttl)
+            )
+            self._db.execute("COMMIT")
+            return token
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    async def renew(self, name, holder, token, ttl):
+        now = self.clock()
+        cursor = self._db.execute(
+            "UPDATE leases SET expires_at = ? WHERE name = ? AND holder = ? AND token = ? AND expires_at > ?",
+            (now + ttl, name, holder, token, now),
+        )
+        return cursor.rowcount == 1
+
+    async def release(self, name, holder, token):
+        self._db.execute(
+            "UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ? AND token = ?",
+            (name, holder, token),
+        )
+
+    async def validate(self, name, token):
+        """Действует ли ещё аренда с этим токеном"""
+        row = self._db.execute(
+            "SELECT token, expires_at FROM leases WHERE name = ?", (name,)
+        ).fetchone()
+        return row is not None and row[0] == token and row[1] > self.clock()
+
+    async def record_seen(self, entries):
+        """Сохранение ключей [(ключ, срок истечения)] опубликованных сообщений"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany("INSERT OR REPLACE INTO seen VALUES (?, ?)", entries)
+            self._db.execute("DELETE FROM seen WHERE expires <= ?", (self.clock(),))
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    async def load_seen(self):
+        return self._db.execute("SELECT key, expires FROM seen WHERE expires > ?", (self.clock(),)).fetchall()
+
+    async def close(self):
+        self._db.close()
+
+
+# Значение ключа аренды: "<токен>:<владелец>"; счётчик токенов живёт отдельно и не истекает
+_REDIS_ACQUIRE = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local sep = string.find(current, ':', 1, true)
+    if string.sub(current, sep + 1) ~= ARGV[1] then
+        return false
+    end
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return tonumber(string.sub(current, 1, sep - 1))
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], token .. ':' .. ARGV[1], 'PX', ARGV[2])
+return token
+"""
+
+_REDIS_RENEW = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_REDIS_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLockBackend:
+    """Аренды в Redis для реплик на разных хостах.
+
+    client — любой клиент с интерфейсом redis.asyncio (eval, get, aclose),
+    в том числе локальная заглушка вроде fakeredis.
+    """
+
+    def __init__(self, client, prefix="ethbot:lease"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        # redis нужен только в этом режиме
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _keys(self, name):
+        return f"{self.prefix}:{name}", f"{self.prefix}:{name}:token"
+
+    async def acquire(self, name, holder, ttl):
+        token = await self.client.eval(_REDIS_ACQUIRE, 2, *self._keys(name), holder, int(ttl * 1000))
+        return int(token) if token else None
+
+    async def renew(self, name, holder, token, ttl):
+        key, _ = self._keys(name)
+        return bool(await self.client.eval(_REDIS_RENEW, 1, key, f"{token}:{holder}", int(ttl * 1000)))
+
+    async def release(self, name, holder, token):
+        key, _ = self._keys(name)
+        await self.client.eval(_REDIS_RELEASE, 1, key, f"{token}:{holder}")
+
+    async def validate(self, name, token):
+        key, _ = self._keys(name)
+        value = await self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value is not None and value.split(":", 1)[0] == str(token)
+
+    async def record_seen(self, entries):
+        # Ключи — в сортированном множестве с временем истечения в качестве веса
+        key = f"{self.prefix}:seen"
+        await self.client.zadd(key, dict(entries))
+        await self.client.zremrangebyscore(key, "-inf", time.time())
+
+    async def load_seen(self):
+        return await self.client.zrangebyscore(f"{self.prefix}:seen", time.time(), "+inf", withscores=True)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def open_backend(url):
+    """'sqlite:///path/locks.db' или 'redis://host:6379/0'"""
+    if url.startswith("sqlite:///"):
+        return SQLiteLockBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisLockBackend.from_url(url)
+    raise ValueError(f"Неизвестный бэкенд координации: {url}")
+
+
+class LeaderElector:
+    """Выбор ведущей реплики через аренду с периодическим продлением.
+
+    Ведущая реплика выполняет задачи и отправляет сообщения; токен её
+    аренды передаётся в очередь отправки и проверяется перед каждой
+    отправкой. Если продлить аренду не удалось, реплика сразу считает
+    себя ведомой; другая реплика захватит аренду после истечения ttl.
+    Ключи дедупликации ведущей реплики копируются в бэкенд, чтобы
+    следующая ведущая не повторила уже опубликованное.
+    """
+
+    def __init__(self, backend, name, holder, ttl=10.0, renew_interval=None,
+                 on_elected=None, on_demoted=None):
+        self.backend = backend
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self.renew_interval = renew_interval or ttl / 3
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+
+        self.token = None
+        self._elected = asyncio.Event()
+        self._demoted = asyncio.Event()
+        self._demoted.set()
+        self._task = None
+        self._seen = []
+        self._seen_task = None
+        self.stats = {"elections": 0, "demotions": 0, "errors": 0}
+
+    @property
+    def is_leader(self):
+        return self.token is not None
+
+    async def wait_elected(self):
+        await self._elected.wait()
+
+    async def wait_demoted(self):
+        await self._demoted.wait()
+
+    async def validate(self, token):
+        """Проверка fencing-токена сообщения перед отправкой"""
+        if token is None or token != self.token:
+            return False
+        try:
+            return await self.backend.validate(self.name, token)
+        except Exception as e:
+            logger.error(f"Ошибка проверки аренды {self.name}: {e}")
+            return False
+
+    def record_seen(self, key, expires):
+        """Фоновое копирование ключа опубликованного сообщения в бэкенд"""
+        if self.token is None:
+            return
+        self._seen.append((key, expires))
+        if self._seen_task is None or self._seen_task.done():
+            self._seen_task = asyncio.create_task(self._flush_seen())
+
+    async def _flush_seen(self):
+        while self._seen:
+            entries, self._seen = self._seen, []
+            try:
+                await self.backend.record_seen(entries)
+            except Exception as e:
+                logger.error(f"Ошибка сохранения ключей дедупликации: {e}")
+                return
+
+    async def load_seen(self):
+        """Ключи, опубликованные любой ведущей репликой: [(ключ, срок истечения)]"""
+        return await self.backend.load_seen()
+
+    async def start(self):
+        if self._task is None:
+            await self._step()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._seen_task is not None:
+            await asyncio.gather(self._seen_task, return_exceptions=True)
+        if self.token is not None:
+            token = self.token
+            await self._demote()
+            try:
+                # Освобождение аренды ускоряет переход на другую реплику
+                await self.backend.release(self.name, self.holder, token)
+            except Exception as e:
+                logger.error(f"Ошибка освобождения аренды {self.name}: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self._step()
+
+    async def _step(self):
+        try:
+            if self.token is None:
+                token = await self.backend.acquire(self.name, self.holder, self.ttl)
+                if token is not None:
+                    await self._elect(token)
+            elif not await self.backend.renew(self.name, self.holder, self.token, self.ttl):
+                logger.warning(f"Аренда {self.name} потеряна")
+                await self._demote()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Ошибка координации {self.name}: {e}")
+            # Без подтверждённой аренды нельзя продолжать как ведущая реплика
+            if self.token is not None:
+                await self._demote()
+
+    async def _elect(self, token):
+        self.token = token
+        self.stats["elections"] += 1
+        self._demoted.clear()
+        self._elected.set()
+        logger.info(f"{self.holder} стал ведущим ({self.name}, токен {token})")
+        if self.on_elected is not None:
+            await self.on_elected()
+
+    async def _demote(self):
+        self.token = None
+        self.stats["demotions"] += 1
+        self._elected.clear()
+        self._demoted.set()
+        logger.warning(f"{self.holder} больше не ведущий ({self.name})")
+        if self.on_demoted is not None:
+            await self.on_demoted()
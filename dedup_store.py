@@ -0,0 +1,175 @@
+import logging
+import math
+import sqlite3
+import time
+
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+# Сроки хранения ключей по пространствам имён (префикс до первого "_")
+DEFAULT_TTLS = {
+    "news": 7 * DAY,
+    "liq": 2 * DAY,
+    "whale": 2 * DAY,
+    "price": DAY,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class BloomFilter:
+    """Фильтр Блума в памяти процесса.
+
+    Использует встроенный hash() строк: он кэшируется в объекте строки и
+    стабилен в пределах процесса, а фильтр всё равно пересобирается из
+    базы при каждом запуске.
+    """
+    __slots__ = ("size", "hashes", "bits", "count")
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Двойное хеширование: вторая функция — старшие биты того же 64-битного хеша
+        h = hash(key)
+        h2 = (h >> 32) | 1
+        size = self.size
+        return [(h + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        h = hash(key)
+        h2 = (h >> 32) | 1
+        size, bits = self.size, self.bits
+        for i in range(self.hashes):
+            pos = (h + i * h2) % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class DedupStore:
+    """Постоянный индекс уже опубликованных ключей (news_/liq_/whale_/price_).
+
+    Ключи хранятся в SQLite (WAL) со сроком жизни по пространству имён и
+    переживают перезапуск. Перед базой стоит фильтр Блума, поэтому
+    проверка нового ключа не обращается к диску; подтверждённые ключи
+    кэшируются в ограниченном LRU. compact() удаляет просроченные записи и
+    пересобирает фильтр. Интерфейс совместим с прежним TTLCache:
+    `key in store` и `store[key] = True`. Если задан on_add(key, expires),
+    он вызывается для каждого нового ключа.
+    """
+
+    def __init__(self, path, ttls=None, default_ttl=DAY, capacity=200_000,
+                 error_rate=0.001, hot_keys=4096):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._hot = LRUCache(maxsize=hot_keys)
+        self.on_add = None
+        self.stats = {"lookups": 0, "hits": 0, "bloom_rejects": 0, "writes": 0}
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+        self._rebuild()
+
+    def ttl_for(self, key):
+        namespace = key.split("_", 1)[0]
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def _rebuild(self, now=None):
+        now = time.time() if now is None else now
+        keys = [row[0] for row in self._db.execute("SELECT key FROM seen WHERE expires > ?", (now,))]
+        # Фильтр с запасом, чтобы доля ложных срабатываний не росла до следующей компактизации
+        capacity = max(self.capacity, len(keys) * 2)
+        self.bloom = BloomFilter(capacity, self.error_rate)
+        for key in keys:
+            self.bloom.add(key)
+        self._hot.clear()
+        return len(keys)
+
+    def __contains__(self, key):
+        stats = self.stats
+        stats["lookups"] += 1
+        if key not in self.bloom:
+            stats["bloom_rejects"] += 1
+            return False
+
+        now = time.time()
+        expires = self._hot.get(key)
+        if expires is None:
+            row = self._db.execute("SELECT expires FROM seen WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False
+            expires = self._hot[key] = row[0]
+
+        if expires <= now:
+            return False
+        stats["hits"] += 1
+        return True
+
+    def __setitem__(self, key, value):
+        self.add(key)
+
+    def add(self, key, ttl=None):
+        expires = time.time() + (self.ttl_for(key) if ttl is None else ttl)
+        self._db.execute("INSERT OR REPLACE INTO seen (key, expires) VALUES (?, ?)", (key, expires))
+        self._db.commit()
+        self.bloom.add(key)
+        self._hot[key] = expires
+        self.stats["writes"] += 1
+        if self.on_add is not None:
+            self.on_add(key, expires)
+
+    def merge(self, entries, now=None):
+        """Добавление ключей [(ключ, срок истечения)], опубликованных другой репликой"""
+        now = time.time() if now is None else now
+        entries = [(key, expires) for key, expires in entries if expires > now]
+        self._db.executemany("INSERT OR REPLACE INTO seen (key, expires) VALUES (?, ?)", entries)
+        self._db.commit()
+        for key, expires in entries:
+            self.bloom.add(key)
+            self._hot[key] = expires
+        return len(entries)
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    @property
+    def hit_ratio(self):
+        lookups = self.stats["lookups"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def compact(self, now=None):
+        """Удаление просроченных ключей и пересборка фильтра Блума"""
+        now = time.time() if now is None else now
+        removed = self._db.execute("DELETE FROM seen WHERE expires <= ?", (now,)).rowcount
+        self._db.commit()
+        kept = self._rebuild(now)
+        logger.info(f"Компактизация индекса дубликатов: удалено {removed}, осталось {kept}")
+        return removed
+
+    def close(self):
+        self._db.close()
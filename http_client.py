@@ -0,0 +1,252 @@
+import asyncio
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from circuit_breaker import BreakerPolicy, CircuitBreaker
+from metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+FETCH_DURATION = Histogram("bot_fetch_duration_seconds", "Время запроса к источнику", ["source", "host"])
+FETCH_RESPONSES = Counter("bot_fetch_responses_total", "Ответы источников по статусам", ["source", "host", "status"])
+FETCH_BYTES = Counter("bot_fetch_bytes_total", "Получено байт от источника", ["source", "host"])
+
+# Статусы, при которых имеет смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Крайний срок (time.monotonic) для запросов текущей задачи, см. deadline()
+_deadline = contextvars.ContextVar("http_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Бюджет времени задачи исчерпан до запроса"""
+
+
+@contextmanager
+def deadline(seconds):
+    """Ограничение суммарного времени запросов внутри блока, включая созданные в нём задачи.
+
+    Таймауты и повторы сокращаются до оставшегося времени, после истечения
+    запросы сразу завершаются DeadlineExceeded. Вложенный блок не может
+    продлить внешний срок.
+    """
+    until = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(until if current is None else min(current, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@dataclass(frozen=True)
+class SourcePolicy:
+    """Таймаут, политика повторов и предохранитель для одного источника данных"""
+    timeout: float = 10
+    retries: int = 1
+    backoff: float = 0.5
+    max_backoff: float = 5.0
+    breaker: BreakerPolicy = BreakerPolicy()
+
+
+DEFAULT_POLICY = SourcePolicy()
+
+
+class FetchResult:
+    """Полностью прочитанный ответ сервера"""
+    __slots__ = ("url", "status", "headers", "body", "charset")
+
+    def __init__(self, url, status, headers, body, charset=None):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.charset = charset
+
+    @property
+    def ok(self):
+        """Источник ответил по существу: 2xx или 304 на условный запрос"""
+        return 200 <= self.status < 300 or self.status == 304
+
+    def text(self):
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HttpClient:
+    """Долгоживущая сессия aiohttp с пулом соединений, DNS-кэшем и повторами"""
+
+    def __init__(self, policies=None, limit=100, limit_per_host=8,
+                 keepalive_timeout=60, dns_ttl=300, user_agent=None):
+        self.policies = dict(policies or {})
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.user_agent = user_agent or "Mozilla/5.0 (compatible; EthTrackerBot/1.0)"
+        self._session = None
+        self.breakers = {}
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+
+    @property
+    def started(self):
+        return self._session is not None and not self._session.closed
+
+    def policy(self, source):
+        return self.policies.get(source, DEFAULT_POLICY)
+
+    def breaker(self, source, host):
+        """Предохранитель пары источник/хост: отказ одной ленты не отключает остальные"""
+        name = f"{source or 'default'}:{host}"
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            policy = self.policy(source)
+            if policy.breaker is None:
+                return None
+            breaker = self.breakers[name] = CircuitBreaker(name, policy.breaker)
+        return breaker
+
+    async def start(self):
+        if self.started:
+            return
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_ttl,
+            use_dns_cache=True,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[trace],
+            headers={"User-Agent": self.user_agent},
+        )
+        logger.info(f"HTTP-клиент запущен (limit={self.limit}, limit_per_host={self.limit_per_host})")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            logger.info(f"HTTP-клиент остановлен: {self.stats}")
+
+    async def _on_connection_created(self, session, ctx, params):
+        self.stats["connections_created"] += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self.stats["connections_reused"] += 1
+
+    @property
+    def reuse_ratio(self):
+        total = self.stats["connections_created"] + self.stats["connections_reused"]
+        return self.stats["connections_reused"] / total if total else 0.0
+
+    async def ws_connect(self, url, heartbeat=20):
+        """Открытие WebSocket-соединения через общий пул"""
+        await self.start()
+        return await self._session.ws_connect(url, heartbeat=heartbeat)
+
+    async def get(self, url, source=None, headers=None, params=None):
+        return await self.request("GET", url, source=source, headers=headers, params=params)
+
+    async def request(self, method, url, source=None, headers=None, params=None):
+        """Выполнение запроса с политикой источника.
+
+        Сетевые ошибки и статусы из RETRY_STATUSES повторяются с
+        экспоненциальной задержкой; после исчерпания попыток сетевая ошибка
+        пробрасывается, а ответ с ошибочным статусом возвращается как есть.
+        Для предохранителя сбой — любой ответ кроме 2xx и 304, в том числе
+        неповторяемый 404 от исчезнувшей ленты. Пока предохранитель открыт,
+        запрос сразу завершается CircuitOpenError.
+        """
+        await self.start()
+        policy = self.policy(source)
+        host = urlsplit(url).hostname or ""
+        labels = {"source": source or "default", "host": host}
+        breaker = self.breaker(source, host)
+        until = _deadline.get()
+        if until is not None and until <= time.monotonic():
+            raise DeadlineExceeded(f"{labels['source']}: бюджет времени задачи исчерпан")
+        if breaker is not None:
+            breaker.check()
+
+        call_started = time.monotonic()
+        success = False
+        # Сбой из-за сокращённого бюджетом таймаута не говорит о проблеме источника
+        blame_source = True
+        attempt = 0
+        try:
+            while True:
+                self.stats["requests"] += 1
+                timeout = policy.timeout
+                if until is not None:
+                    timeout = min(timeout, until - time.monotonic())
+                    blame_source = timeout >= policy.timeout
+                started = time.perf_counter()
+                try:
+                    async with self._session.request(method, url, headers=headers, params=params,
+                                                     timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        body = await response.read()
+                        result = FetchResult(str(response.url), response.status, response.headers,
+                                             body, response.charset)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    FETCH_DURATION.observe(time.perf_counter() - started, **labels)
+                    FETCH_RESPONSES.inc(status=type(e).__name__, **labels)
+                    delay = self._backoff(policy, attempt)
+                    if attempt >= policy.retries or not self._can_wait(until, delay):
+                        self.stats["errors"] += 1
+                        raise
+                else:
+                    FETCH_DURATION.observe(time.perf_counter() - started, **labels)
+                    FETCH_RESPONSES.inc(status=str(result.status), **labels)
+                    FETCH_BYTES.inc(len(body), **labels)
+                    success = result.ok
+                    delay = self._retry_after(result) or self._backoff(policy, attempt)
+                    if (result.status not in RETRY_STATUSES or attempt >= policy.retries
+                            or not self._can_wait(until, delay)):
+                        return result
+
+                attempt += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+        finally:
+            if breaker is not None:
+                if success or blame_source:
+                    breaker.record(success, time.monotonic() - call_started)
+                else:
+                    breaker.release()
+
+    @staticmethod
+    def _can_wait(until, delay):
+        """Хватит ли бюджета на паузу перед повтором"""
+        return until is None or time.monotonic() + delay < until
+
+    @staticmethod
+    def _backoff(policy, attempt):
+        delay = min(policy.max_backoff, policy.backoff * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    @staticmethod
+    def _retry_after(result):
+        try:
+            return min(float(result.headers.get("Retry-After", "")), 30.0)
+        except ValueError:
+            return None
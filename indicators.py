@@ -0,0 +1,123 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _ewm(values, alpha):
+    """Экспоненциальное сглаживание y[t] = (1 - alpha) * y[t-1] + alpha * x[t], y[0] = x[0].
+
+    Рекурсия раскрыта в кумулятивные суммы по блокам: внутри блока веса
+    (1 - alpha) ** -k растут не более чем до 1e6, поэтому точность float64
+    сохраняется на истории любой длины.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.empty_like(values)
+    if not len(values):
+        return result
+    decay = 1.0 - alpha
+    if decay <= 0:
+        result[:] = values
+        return result
+
+    result[0] = values[0]
+    block = max(1, int(6 / -math.log10(decay)))
+    powers = decay ** np.arange(1, block + 1)
+    carry = values[0]
+
+    for start in range(1, len(values), block):
+        chunk = values[start:start + block]
+        size = len(chunk)
+        scale = powers[:size]
+        out = scale * (carry + alpha * np.cumsum(chunk / scale))
+        result[start:start + size] = out
+        carry = out[-1]
+    return result
+
+
+def ema(values, period):
+    """Экспоненциальная скользящая средняя"""
+    return _ewm(values, 2.0 / (period + 1))
+
+
+def rsi(close, period=14):
+    """RSI по Уайлдеру; первое значение — NaN"""
+    close = np.asarray(close, dtype=float)
+    result = np.full(len(close), np.nan)
+    if len(close) < 2:
+        return result
+
+    diff = np.diff(close)
+    avg_gain = _ewm(np.clip(diff, 0, None), 1.0 / period)
+    avg_loss = _ewm(np.clip(-diff, 0, None), 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        values = 100 - 100 / (1 + rs)
+    values[avg_loss == 0] = 100.0
+    values[(avg_loss == 0) & (avg_gain == 0)] = 50.0
+    result[1:] = values
+    return result
+
+
+def atr(high, low, close, period=14):
+    """Средний истинный диапазон по Уайлдеру"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    if not len(close):
+        return np.empty(0)
+
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    true_range = np.maximum.reduce([
+        high - low,
+        np.abs(high - prev_close),
+        np.abs(low - prev_close),
+    ])
+    return _ewm(true_range, 1.0 / period)
+
+
+def pivots(high, low, width=3):
+    """Индексы локальных максимумов и минимумов (width свечей с каждой стороны)"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    size = 2 * width + 1
+    if len(high) < size:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+    centers = np.arange(width, len(high) - width)
+    pivot_highs = centers[sliding_window_view(high, size).max(axis=1) == high[centers]]
+    pivot_lows = centers[sliding_window_view(low, size).min(axis=1) == low[centers]]
+    return pivot_highs, pivot_lows
+
+
+def support_resistance(high, low, close, width=3):
+    """Ближайшие к последнему закрытию уровни по пивотам"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    last = float(close[-1])
+    pivot_highs, pivot_lows = pivots(high, low, width)
+
+    above = high[pivot_highs]
+    above = above[above > last]
+    below = low[pivot_lows]
+    below = below[below < last]
+
+    resistance = float(above.min()) if len(above) else float(high.max())
+    support = float(below.max()) if len(below) else float(low.min())
+    return support, resistance
+
+
+def compute_indicators(candles, fast=21, slow=50, period=14, pivot_width=3):
+    """Все индикаторы по истории свечей за один проход; значения на последней свече"""
+    high, low, close = candles["high"], candles["low"], candles["close"]
+    support, resistance = support_resistance(high, low, close, pivot_width)
+    return {
+        "ema_fast": float(ema(close, fast)[-1]),
+        "ema_slow": float(ema(close, slow)[-1]),
+        "rsi": float(rsi(close, period)[-1]),
+        "atr": float(atr(high, low, close, period)[-1]),
+        "support": support,
+        "resistance": resistance,
+        "fast": fast,
+        "slow": slow,
+    }
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value, fetched_at):
+        self.value = value
+        self.fetched_at = fetched_at
+
+
+class MarketDataCache:
+    """Кэш рыночных данных: single-flight, stale-while-revalidate, последнее удачное значение.
+
+    Одновременные запросы одного ключа ждут один и тот же вызов загрузчика.
+    Свежее значение (моложе ttl) отдаётся сразу; устаревшее, но моложе
+    stale_ttl, тоже отдаётся сразу, а обновление запускается в фоне. Если
+    загрузчик упал (429/5xx, таймаут), остаётся последнее удачное значение.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._entries = {}
+        self._inflight = {}
+        self._background = set()
+        self.stats = {"hits": 0, "stale": 0, "misses": 0, "loads": 0, "coalesced": 0, "errors": 0}
+
+    def peek(self, key):
+        """Последнее удачное значение без загрузки"""
+        entry = self._entries.get(key)
+        return entry.value if entry else None
+
+    def age(self, key):
+        entry = self._entries.get(key)
+        return self.clock() - entry.fetched_at if entry else None
+
+    async def get(self, key, loader, ttl, stale_ttl=None):
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self.clock() - entry.fetched_at
+            if age < ttl:
+                self.stats["hits"] += 1
+                return entry.value
+            if stale_ttl is not None and age < stale_ttl:
+                self.stats["stale"] += 1
+                self._refresh_in_background(key, loader)
+                return entry.value
+
+        self.stats["misses"] += 1
+        try:
+            return await self._load(key, loader)
+        except Exception as e:
+            if entry is not None:
+                logger.warning(f"{key}: используется последнее значение, обновление не удалось: {e}")
+                return entry.value
+            raise
+
+    def _refresh_in_background(self, key, loader):
+        if key in self._inflight:
+            return
+        task = asyncio.create_task(self._load(key, loader))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Фоновое обновление не удалось: {task.exception()}")
+
+    async def _load(self, key, loader):
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.stats["loads"] += 1
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            # Ошибку получат ожидающие; помечаем её обработанной, если их нет
+            future.exception()
+            raise
+        else:
+            self._entries[key] = CacheEntry(value, self.clock())
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
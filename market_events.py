@@ -0,0 +1,166 @@
+import re
+import time
+
+_MULTIPLIERS = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9}
+
+_USD = r"\$\s?([\d,]+(?:\.\d+)?)\s?([KMB]?)\b"
+_PRICE = re.compile(r"\bat\s+" + _USD, re.IGNORECASE)
+_AMOUNT_USD = re.compile(_USD, re.IGNORECASE)
+_SIDE = re.compile(r"\b(long|short|buy|sell)\b", re.IGNORECASE)
+_SYMBOL = re.compile(r"#([A-Z0-9]{2,10})\b")
+# Название биржи в начале сообщения; эмодзи перед ним пропускаются, хэштеги — нет
+_EXCHANGE = re.compile(r"^[^\w#]*([A-Za-z][\w .]{1,20}?)\s*:")
+
+_WHALE = re.compile(
+    r"([\d,]+(?:\.\d+)?)\s+#([A-Z0-9]{2,10})\s*\(\s*([\d,]+(?:\.\d+)?)\s*USD\s*\)\s*(\w+)",
+    re.IGNORECASE,
+)
+_FROM = re.compile(r"\bfrom\s+(.+?)(?=\s+to\b|$)", re.IGNORECASE)
+_TO = re.compile(r"\bto\s+(.+?)(?=\s*(?:https?://|\n|$))", re.IGNORECASE)
+
+
+def _number(value, suffix=""):
+    return float(value.replace(",", "")) * _MULTIPLIERS[suffix.upper()]
+
+
+def format_usd(value):
+    """1234567 -> '$1.2M'"""
+    for suffix, size in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if value >= size:
+            return f"${value / size:.3g}{suffix}"
+    return f"${value:,.0f}"
+
+
+class Liquidation:
+    """Ликвидация позиции на бирже"""
+    __slots__ = ("symbol", "side", "size_usd", "price", "exchange", "link", "time", "text")
+
+    def __init__(self, symbol, side, size_usd, price, exchange, link, time, text):
+        self.symbol = symbol
+        self.side = side
+        self.size_usd = size_usd
+        self.price = price
+        self.exchange = exchange
+        self.link = link
+        self.time = time
+        self.text = text
+
+
+class WhaleTransfer:
+    """Крупный перевод из Whale Alert"""
+    __slots__ = ("symbol", "amount", "size_usd", "action", "sender", "receiver", "link", "time", "text")
+
+    def __init__(self, symbol, amount, size_usd, action, sender, receiver, link, time, text):
+        self.symbol = symbol
+        self.amount = amount
+        self.size_usd = size_usd
+        self.action = action
+        self.sender = sender
+        self.receiver = receiver
+        self.link = link
+        self.time = time
+        self.text = text
+
+
+def parse_liquidation(msg, default_exchange="Binance"):
+    """Разбор текста ликвидации; None, если размер или сторона не распознаны.
+
+    Ожидается текст вида 'Binance: Liquidated on #ETH Long $125.3K at $3,012.5'.
+    Buy/Sell трактуются как принудительная сделка: Buy закрывает шорт, Sell — лонг.
+    """
+    text = msg['text']
+    side_match = _SIDE.search(text)
+    symbol_match = _SYMBOL.search(text)
+    if not side_match or not symbol_match:
+        return None
+
+    side = side_match.group(1).lower()
+    side = {"buy": "short", "sell": "long"}.get(side, side)
+
+    price_match = _PRICE.search(text)
+    price = _number(*price_match.groups()) if price_match else None
+
+    size_usd = None
+    for match in _AMOUNT_USD.finditer(text):
+        if price_match and match.start() >= price_match.start() and match.end() <= price_match.end():
+            continue
+        size_usd = _number(*match.groups())
+        break
+    if size_usd is None:
+        return None
+
+    exchange = default_exchange
+    exchange_match = _EXCHANGE.search(text)
+    if exchange_match:
+        name = exchange_match.group(1).strip()
+        # "Liquidated Long:" — начало самого сообщения, а не биржа
+        if not _SIDE.search(name) and "liquidat" not in name.lower():
+            exchange = name
+
+    return Liquidation(symbol_match.group(1), side, size_usd, price, exchange,
+                       msg['link'], msg['time'], text)
+
+
+def parse_whale(msg):
+    """Разбор текста Whale Alert вида '1,500 #ETH (4,512,345 USD) transferred from #Binance to unknown wallet'"""
+    text = msg['text']
+    match = _WHALE.search(text)
+    if not match:
+        return None
+    amount, symbol, size_usd, action = match.groups()
+
+    tail = text[match.end():]
+    sender = _FROM.search(tail)
+    receiver = _TO.search(tail)
+    return WhaleTransfer(
+        symbol, _number(amount), _number(size_usd), action.lower(),
+        sender.group(1).strip() if sender else None,
+        receiver.group(1).strip() if receiver else None,
+        msg['link'], msg['time'], text,
+    )
+
+
+class DigestAggregator:
+    """Окно событий, публикуемое одной сводкой.
+
+    Сводка уходит по истечении interval секунд с первого события окна или
+    при накоплении max_events событий; событие размером от immediate_usd
+    публикуется сразу и в сводку не попадает.
+    """
+
+    def __init__(self, interval, max_events, immediate_usd, on_single, on_digest, clock=time.monotonic):
+        self.interval = interval
+        self.max_events = max_events
+        self.immediate_usd = immediate_usd
+        self.on_single = on_single
+        self.on_digest = on_digest
+        self.clock = clock
+        self.events = []
+        self.window_start = None
+        self.stats = {"events": 0, "immediate": 0, "digests": 0}
+
+    async def add(self, event):
+        self.stats["events"] += 1
+        if event.size_usd >= self.immediate_usd:
+            self.stats["immediate"] += 1
+            await self.on_single(event)
+            return
+
+        if not self.events:
+            self.window_start = self.clock()
+        self.events.append(event)
+        if len(self.events) >= self.max_events:
+            await self.flush()
+
+    async def tick(self):
+        """Публикация сводки, если окно истекло"""
+        if self.events and self.clock() - self.window_start >= self.interval:
+            await self.flush()
+
+    async def flush(self):
+        if not self.events:
+            return
+        events, self.events = self.events, []
+        self.window_start = None
+        self.stats["digests"] += 1
+        await self.on_digest(events)
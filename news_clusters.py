@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+import struct
+import time
+from array import array
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+# Простое число Мерсенна 2^61 - 1 для универсального хеширования
+_PRIME = (1 << 61) - 1
+
+_WORD = re.compile(r"\w+")
+
+# Тема лент: слово есть почти в каждом заголовке и сближает разные события
+TOPIC_WORDS = frozenset({"ethereum", "eth", "ether"})
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or over says that the this to
+up was were will with after amid new news report reports just now today
+""".split()) | TOPIC_WORDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news_stories (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    expires REAL NOT NULL
+)
+"""
+
+
+def title_tokens(title):
+    """Нормализованные слова заголовка: нижний регистр, без служебных слов и окончания множественного числа"""
+    tokens = set()
+    for word in _WORD.findall(title.lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.add(word)
+    return tokens or {title.lower().strip()}
+
+
+def _token_hash(token):
+    # Стабильный между запусками хеш: встроенный hash() строк меняется от процесса к процессу
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+
+
+class NewsCluster:
+    """Новости об одном событии из разных источников; items[0] публикуется, остальные — дополнительные ссылки"""
+    __slots__ = ("signature", "items", "story_id")
+
+    def __init__(self, signature, item, story_id=None):
+        self.signature = signature
+        self.items = [item]
+        self.story_id = story_id
+
+    @property
+    def known(self):
+        """Событие уже опубликовано в одном из прошлых запусков"""
+        return self.story_id is not None
+
+
+class NewsClusterIndex:
+    """Индекс похожих заголовков: MinHash по словам заголовка и LSH по полосам сигнатуры.
+
+    Сигнатура из num_perm минимальных хешей оценивает коэффициент Жаккара
+    между наборами слов. Она делится на bands полос, и заголовки с
+    совпадающей полосой становятся кандидатами. Поэтому поиск просматривает
+    только несколько корзин, а не всю историю. Кандидат принимается, если
+    оценка сходства не ниже threshold. Опубликованные события хранятся в
+    SQLite ttl секунд и переживают перезапуск; дольше опубликованное событие
+    не подавляет новые, иначе ошибочное совпадение скрывало бы новость надолго.
+    """
+
+    def __init__(self, path, threshold=0.7, num_perm=128, bands=32, ttl=DAY / 2, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ttl = ttl
+        # Коэффициенты фиксированы seed: сигнатуры в базе должны совпадать с новыми
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._stories = {}  # id -> сигнатура
+        self._expires = {}  # id -> момент, после которого событие не подавляет похожие
+        self._buckets = {}  # ключ полосы -> [id]
+        self.stats = {"lookups": 0, "candidates": 0, "matches": 0}
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+        self._rebuild()
+
+    def signature(self, title):
+        hashes = [_token_hash(token) for token in title_tokens(title)]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms)
+
+    def similarity(self, left, right):
+        """Оценка коэффициента Жаккара по доле совпавших позиций сигнатур"""
+        return sum(x == y for x, y in zip(left, right)) / self.num_perm
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [
+            hashlib.blake2b(struct.pack(f"<{rows + 1}Q", band, *signature[band * rows:(band + 1) * rows]),
+                            digest_size=8).digest()
+            for band in range(self.bands)
+        ]
+
+    def _best(self, signature, candidates, lookup):
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            score = self.similarity(signature, lookup(candidate))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def find(self, signature, now=None):
+        """ID опубликованного события, похожего на сигнатуру, или None"""
+        now = time.time() if now is None else now
+        self.stats["lookups"] += 1
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        # Просроченные события удаляет compact(), а до тех пор они не учитываются
+        candidates = {story_id for story_id in candidates if self._expires[story_id] > now}
+        self.stats["candidates"] += len(candidates)
+        story_id = self._best(signature, candidates, self._stories.__getitem__)
+        if story_id is not None:
+            self.stats["matches"] += 1
+        return story_id
+
+    def group(self, items, title=lambda item: item["title"], now=None):
+        """Разбиение новостей на события с сохранением порядка первых упоминаний"""
+        clusters = []
+        local = {}  # ключ полосы -> индексы событий этой пачки
+        for item in items:
+            signature = self.signature(title(item))
+            keys = self._band_keys(signature)
+            candidates = {index for key in keys for index in local.get(key, ())}
+            index = self._best(signature, candidates, lambda i: clusters[i].signature)
+            if index is not None:
+                clusters[index].items.append(item)
+                continue
+
+            clusters.append(NewsCluster(signature, item, self.find(signature, now)))
+            for key in keys:
+                local.setdefault(key, []).append(len(clusters) - 1)
+        return clusters
+
+    def add(self, cluster, now=None):
+        """Запоминание опубликованного события"""
+        now = time.time() if now is None else now
+        item = cluster.items[0]
+        cursor = self._db.execute(
+            "INSERT INTO news_stories (title, link, signature, expires) VALUES (?, ?, ?, ?)",
+            (item["title"], item["link"], array("Q", cluster.signature).tobytes(), now + self.ttl),
+        )
+        self._db.commit()
+        cluster.story_id = cursor.lastrowid
+        self._index(cluster.story_id, cluster.signature, now + self.ttl)
+        return cluster.story_id
+
+    def _index(self, story_id, signature, expires):
+        self._stories[story_id] = signature
+        self._expires[story_id] = expires
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(story_id)
+
+    def _rebuild(self, now=None):
+        now = time.time() if now is None else now
+        self._stories.clear()
+        self._expires.clear()
+        self._buckets.clear()
+        rows = self._db.execute("SELECT id, signature, expires FROM news_stories WHERE expires > ?", (now,))
+        for story_id, blob, expires in rows:
+            signature = array("Q")
+            signature.frombytes(blob)
+            # Сигнатуры другой длины остались от прежних параметров индекса
+            if len(signature) == self.num_perm:
+                self._index(story_id, tuple(signature), expires)
+        return len(self._stories)
+
+    def __len__(self):
+        return len(self._stories)
+
+    def compact(self, now=None):
+        """Удаление событий старше ttl и пересборка корзин"""
+        now = time.time() if now is None else now
+        removed = self._db.execute("DELETE FROM news_stories WHERE expires <= ?", (now,)).rowcount
+        self._db.commit()
+        kept = self._rebuild(now)
+        logger.info(f"Компактизация индекса новостей: удалено {removed}, осталось {kept}")
+        return removed
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metrics import PARSE_DURATION, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+PARSE_TASKS = Counter("bot_parse_tasks_total", "Разборы ответов по способу выполнения", ["parser", "mode"])
+PARSE_QUEUE_WAIT = Histogram(
+    "bot_parse_queue_wait_seconds", "Ожидание свободного места в пуле разбора", ["parser"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+PARSE_PENDING = Gauge("bot_parse_pending", "Разборов в пуле, включая ожидающие исполнителя")
+
+KINDS = ("thread", "process", "inline")
+
+
+class ParsePool:
+    """Разбор HTML/XML вне event loop.
+
+    func получает сырые байты и возвращает простые структуры (списки,
+    словари), поэтому подходит и для пула процессов. Ответы меньше
+    inline_below байт разбираются прямо в event loop: передача в пул стоит
+    дороже самого разбора. Одновременно в пуле не больше max_pending
+    разборов; остальные вызывающие ждут, что притормаживает сбор данных,
+    пока пул не разгрузится. kind="inline" отключает пул.
+    """
+
+    def __init__(self, kind="thread", workers=2, max_pending=None, inline_below=16 * 1024):
+        if kind not in KINDS:
+            raise ValueError(f"Неизвестный тип пула разбора: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending or workers * 2
+        self.inline_below = inline_below
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._pending = 0
+        self.stats = {"inline": 0, "pooled": 0, "waited": 0}
+
+    def start(self):
+        if self._executor is not None or self.kind == "inline":
+            return
+        if self.kind == "process":
+            # spawn: дочерние процессы не наследуют event loop и открытые соединения
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="parse")
+        logger.info(f"Пул разбора запущен ({self.kind}, workers={self.workers}, max_pending={self.max_pending})")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info(f"Пул разбора остановлен: {self.stats}")
+
+    async def run(self, parser, func, data, *args):
+        """Результат func(data, *args); parser — метка для метрик"""
+        if self.kind == "inline" or len(data) < self.inline_below:
+            self.stats["inline"] += 1
+            PARSE_TASKS.inc(parser=parser, mode="inline")
+            with PARSE_DURATION.time(parser=parser):
+                return func(data, *args)
+
+        self.start()
+        if self._slots.locked():
+            self.stats["waited"] += 1
+        waited = time.perf_counter()
+        async with self._slots:
+            PARSE_QUEUE_WAIT.observe(time.perf_counter() - waited, parser=parser)
+            self._pending += 1
+            PARSE_PENDING.set(self._pending)
+            self.stats["pooled"] += 1
+            PARSE_TASKS.inc(parser=parser, mode=self.kind)
+            try:
+                with PARSE_DURATION.time(parser=parser):
+                    return await asyncio.get_running_loop().run_in_executor(self._executor, func, data, *args)
+            finally:
+                self._pending -= 1
+                PARSE_PENDING.set(self._pending)
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+
+from price_history import PriceHistory
+
+logger = logging.getLogger(__name__)
+
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_windows(spec):
+    """'1m,5m,15m,1h' -> {'1m': 60, '5m': 300, ...}"""
+    windows = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if part[-1] not in WINDOW_UNITS or not part[:-1].isdigit():
+            raise ValueError(f"Некорректное окно: {part}")
+        windows[part] = int(part[:-1]) * WINDOW_UNITS[part[-1]]
+    return windows
+
+
+class PriceAlert:
+    """Срабатывание порога изменения цены в одном окне"""
+    __slots__ = ("symbol", "window", "seconds", "price", "reference", "change", "timestamp")
+
+    def __init__(self, symbol, window, seconds, price, reference, change, timestamp):
+        self.symbol = symbol
+        self.window = window
+        self.seconds = seconds
+        self.price = price
+        self.reference = reference
+        self.change = change
+        self.timestamp = timestamp
+
+
+class PriceEngine:
+    """Проверка порога изменения цены одной пары в скользящих окнах.
+
+    Цены приходят из общего потока PriceStream или резервного REST-опроса
+    через feed(); после переподключения потока пропущенный интервал
+    дозаполняется минутными свечами через REST.
+    """
+
+    def __init__(self, http, symbol, windows, threshold, on_alert, rest_url,
+                 backfill_after=60, history_size=86400, clock=time.time):
+        self.http = http
+        self.symbol = symbol
+        self.windows = dict(windows)
+        self.threshold = threshold
+        self.on_alert = on_alert
+        self.rest_url = rest_url.rstrip("/")
+        self.backfill_after = backfill_after
+        self.clock = clock
+
+        self.history = PriceHistory(history_size, windows=self.windows.values())
+        self._alerted = {}
+        self.stats = {"ticks": 0, "backfilled": 0, "alerts": 0}
+
+    @property
+    def last_price(self):
+        last = self.history.last
+        return last[1] if last else None
+
+    @property
+    def last_tick(self):
+        last = self.history.last
+        return last[0] if last else None
+
+    # ===== Оценка окон =====
+    def record(self, price, ts):
+        """Добавление цены в историю без проверки порога"""
+        return self.history.append(ts, price)
+
+    def evaluate(self, price, ts):
+        """Добавление цены и проверка порога во всех окнах"""
+        if not self.record(price, ts):
+            return []
+        self.stats["ticks"] += 1
+        alerts = []
+
+        for window, seconds in self.windows.items():
+            low, high = self.history.low(seconds), self.history.high(seconds)
+
+            # Сравнение с экстремумами окна ловит и движения, развернувшиеся внутри окна
+            rise = (price - low) / low * 100
+            fall = (price - high) / high * 100
+            if rise >= abs(fall):
+                change, reference = rise, low
+            else:
+                change, reference = fall, high
+
+            if abs(change) <= self.threshold:
+                continue
+
+            # Не повторяем сигнал в том же окне и направлении, пока оно не сменится
+            key = (window, change > 0)
+            if ts - self._alerted.get(key, float("-inf")) < seconds:
+                continue
+            self._alerted[key] = ts
+
+            alerts.append(PriceAlert(self.symbol, window, seconds, price, reference, change, ts))
+
+        self.stats["alerts"] += len(alerts)
+        return alerts
+
+    async def feed(self, price, ts=None):
+        """Обработка одной цены и отправка сигналов"""
+        ts = self.clock() if ts is None else ts
+        for alert in self.evaluate(price, ts):
+            try:
+                await self.on_alert(alert)
+            except Exception as e:
+                logger.error(f"Ошибка отправки ценового сигнала: {e}")
+
+    async def backfill(self):
+        """Дозаполнение пропуска после переподключения минутными свечами"""
+        if self.last_tick is None:
+            return
+        now = self.clock()
+        if now - self.last_tick < self.backfill_after:
+            return
+
+        start_ms = int(self.last_tick * 1000) + 1
+        url = f"{self.rest_url}/api/v3/klines"
+        params = {"symbol": self.symbol, "interval": "1m", "startTime": start_ms, "limit": 1000}
+        try:
+            response = await self.http.get(url, source="binance", params=params)
+            klines = response.json()
+        except Exception as e:
+            logger.error(f"Ошибка дозаполнения цен {self.symbol}: {e}")
+            return
+
+        for kline in klines:
+            close_ts = kline[6] / 1000
+            if close_ts > now:
+                break
+            self.record(float(kline[4]), close_ts)
+            self.stats["backfilled"] += 1
+
+
+class PriceStream:
+    """Общее подключение к combined stream Binance для всех отслеживаемых пар.
+
+    miniTicker каждой пары передаётся в её PriceEngine, закрытые свечи
+    подписанных таймфреймов — в on_kline(symbol, interval, kline) в формате
+    REST /api/v3/klines. Одно соединение вместо отдельного на каждую пару.
+    """
+
+    def __init__(self, http, ws_url, engines, kline_intervals=None, on_kline=None,
+                 reconnect_delay=1.0, max_reconnect_delay=60.0):
+        self.http = http
+        self.ws_url = ws_url
+        self.engines = engines
+        self.kline_intervals = kline_intervals or {}
+        self.on_kline = on_kline
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.connected = False
+        self._task = None
+        self.stats = {"messages": 0, "klines": 0, "reconnects": 0}
+
+    @property
+    def streams(self):
+        streams = [f"{symbol.lower()}@miniTicker" for symbol in self.engines]
+        for symbol, intervals in self.kline_intervals.items():
+            streams.extend(f"{symbol.lower()}@kline_{interval}" for interval in intervals)
+        return streams
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.connected = False
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                ws = await self.http.ws_connect(self.ws_url)
+                try:
+                    # Подписка одним сообщением вместо длинного URL с сотнями потоков
+                    await ws.send_json({"method": "SUBSCRIBE", "params": self.streams, "id": 1})
+                    self.connected = True
+                    delay = self.reconnect_delay
+                    logger.info(f"Поток цен подключен: {self.ws_url}, пар: {len(self.engines)}")
+                    await asyncio.gather(*(engine.backfill() for engine in self.engines.values()))
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._handle_message(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+                finally:
+                    await ws.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка потока цен: {e}")
+
+            self.connected = False
+            self.stats["reconnects"] += 1
+            logger.warning(f"Поток цен отключен, переподключение через {delay:.0f} с")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _handle_message(self, raw):
+        try:
+            payload = json.loads(raw)
+            # Combined stream: {"stream": ..., "data": {...}}
+            data = payload.get("data", payload)
+            symbol = data["s"]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # Ответы на SUBSCRIBE и прочие служебные сообщения
+            return
+        self.stats["messages"] += 1
+
+        if data.get("e") == "kline":
+            kline = data.get("k") or {}
+            if kline.get("x") and self.on_kline is not None:
+                self.stats["klines"] += 1
+                row = [kline["t"], kline["o"], kline["h"], kline["l"], kline["c"], kline["v"], kline["T"]]
+                try:
+                    self.on_kline(symbol, kline["i"], row)
+                except Exception as e:
+                    logger.error(f"Ошибка сохранения свечи {symbol} {kline['i']}: {e}")
+            return
+
+        engine = self.engines.get(symbol)
+        if engine is None:
+            return
+        try:
+            # miniTicker: c/E, trade: p/T
+            price = float(data.get("c") or data["p"])
+            ts = (data.get("E") or data["T"]) / 1000
+        except (ValueError, KeyError, TypeError):
+            return
+        await engine.feed(price, ts)
@@ -0,0 +1,145 @@
+from array import array
+from collections import deque
+
+
+class _WindowExtremes:
+    """Монотонные очереди индексов для минимума и максимума одного окна"""
+    __slots__ = ("seconds", "mins", "maxs")
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.mins = deque()
+        self.maxs = deque()
+
+
+class PriceHistory:
+    """Кольцевой буфер тиков фиксированного размера.
+
+    Время и цена хранятся в двух array('d'), поэтому сутки секундных тиков
+    занимают около 1.4 МБ. Для отслеживаемых окон минимум и максимум
+    поддерживаются монотонными очередями: добавление тика — амортизированно
+    O(1), запрос экстремума — O(1), цена на момент времени — бинарный поиск.
+    """
+
+    def __init__(self, capacity=86400, windows=()):
+        if capacity <= 0:
+            raise ValueError("capacity должен быть положительным")
+        self.capacity = capacity
+        self._ts = array('d', bytes(8 * capacity))
+        self._px = array('d', bytes(8 * capacity))
+        self._next = 0  # Абсолютный индекс следующей записи
+        self._windows = {}
+        for seconds in windows:
+            self.track(seconds)
+
+    def __len__(self):
+        return min(self._next, self.capacity)
+
+    @property
+    def nbytes(self):
+        return (self._ts.itemsize + self._px.itemsize) * self.capacity
+
+    @property
+    def _first(self):
+        return max(0, self._next - self.capacity)
+
+    def _time(self, index):
+        return self._ts[index % self.capacity]
+
+    def _price(self, index):
+        return self._px[index % self.capacity]
+
+    @property
+    def last(self):
+        """(время, цена) последнего тика или None"""
+        if not self._next:
+            return None
+        index = self._next - 1
+        return self._time(index), self._price(index)
+
+    def track(self, seconds):
+        """Начать отслеживание экстремумов окна (разовый проход по уже накопленной истории)"""
+        if seconds in self._windows:
+            return
+        window = _WindowExtremes(seconds)
+        self._windows[seconds] = window
+        if self._next:
+            horizon = self._time(self._next - 1) - seconds
+            for index in range(self._first, self._next):
+                if self._time(index) >= horizon:
+                    self._push(window, index, self._price(index))
+
+    def append(self, ts, price):
+        """Добавление тика; тики старше последнего отбрасываются"""
+        if self._next and ts < self._time(self._next - 1):
+            return False
+
+        index = self._next
+        slot = index % self.capacity
+        self._ts[slot] = ts
+        self._px[slot] = price
+        self._next += 1
+
+        first = self._first
+        for window in self._windows.values():
+            self._push(window, index, price)
+            horizon = ts - window.seconds
+            for queue in (window.mins, window.maxs):
+                while queue[0] < first or self._time(queue[0]) < horizon:
+                    queue.popleft()
+        return True
+
+    def _push(self, window, index, price):
+        maxs, mins = window.maxs, window.mins
+        while maxs and self._price(maxs[-1]) <= price:
+            maxs.pop()
+        maxs.append(index)
+        while mins and self._price(mins[-1]) >= price:
+            mins.pop()
+        mins.append(index)
+
+    # ===== Запросы =====
+    def high(self, seconds):
+        window = self._windows[seconds]
+        return self._price(window.maxs[0]) if window.maxs else None
+
+    def low(self, seconds):
+        window = self._windows[seconds]
+        return self._price(window.mins[0]) if window.mins else None
+
+    def price_at(self, ts):
+        """Цена последнего тика не позже ts или None"""
+        lo, hi = self._first, self._next
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time(mid) <= ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._first:
+            return None
+        return self._price(lo - 1)
+
+    def change_since(self, seconds):
+        """Изменение последней цены относительно цены seconds назад, %"""
+        last = self.last
+        if last is None:
+            return None
+        reference = self.price_at(last[0] - seconds)
+        if not reference:
+            return None
+        return (last[1] - reference) / reference * 100
+
+    def drawdown(self, seconds):
+        """Просадка последней цены от максимума окна, %"""
+        last, high = self.last, self.high(seconds)
+        if last is None or not high:
+            return None
+        return (last[1] - high) / high * 100
+
+    def range_pct(self, seconds):
+        """Размах окна (максимум к минимуму), %"""
+        low, high = self.low(seconds), self.high(seconds)
+        if not low:
+            return None
+        return (high - low) / low * 100
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PHASE = Gauge("bot_startup_phase_seconds", "Длительность фаз запуска бота", ["phase"])
+
+# Вершина стека, на которой event loop ждёт ввода-вывода, а не работает
+_IDLE_FRAME = ("selectors.py", "select")
+
+
+class StartupTimer:
+    """Длительность фаз запуска: импорты, инициализация, проверки, подключения"""
+
+    def __init__(self, started=None, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock() if started is None else started
+        self._last = self.started
+        self.phases = {}
+        self.total = None
+
+    def record(self, phase, seconds):
+        self.phases[phase] = seconds
+        STARTUP_PHASE.set(round(seconds, 4), phase=phase)
+
+    def mark(self, phase):
+        """Последовательная фаза: от предыдущей отметки до текущего момента"""
+        now = self.clock()
+        self.record(phase, now - self._last)
+        self._last = now
+
+    @contextmanager
+    def phase(self, name):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, self.clock() - started)
+
+    async def run(self, name, coro):
+        """Замер корутины; для параллельных фаз через asyncio.gather"""
+        with self.phase(name):
+            return await coro
+
+    def finish(self):
+        self.total = self.clock() - self.started
+        self.record("total", self.total)
+        return self.total
+
+    def summary(self):
+        return ", ".join(f"{phase} {seconds:.2f} с" for phase, seconds in self.phases.items())
+
+
+class SamplingProfiler:
+    """Статистический профилировщик: поток раз в interval снимает стек потока event loop.
+
+    Результат — свёрнутые стеки ("a;b;c число") для flamegraph.pl или
+    speedscope. Код бота не инструментируется, поэтому профилировщик
+    можно включать в работе. Нагрузка — один снимок стека за interval.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None, all_threads=False):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.all_threads = all_threads
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("Профилирование уже запущено")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.all_threads:
+                if len(names) != threading.active_count():
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                selected = [(names.get(ident, str(ident)), frame) for ident, frame in frames.items() if ident != own]
+            else:
+                frame = frames.get(self.thread_id)
+                selected = [(None, frame)] if frame is not None else []
+            for thread_name, frame in selected:
+                self._sample(thread_name, frame)
+
+    def _sample(self, thread_name, frame):
+        stack = []
+        top = frame
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        if thread_name is not None:
+            stack.append(thread_name)
+        stack.reverse()
+        self.samples += 1
+        self.idle += (os.path.basename(top.f_code.co_filename), top.f_code.co_name) == _IDLE_FRAME
+        self.stacks[";".join(stack)] += 1
+
+    async def profile(self, seconds):
+        """Сбор стеков в течение seconds без блокировки event loop"""
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop()
+        return self
+
+    def collapsed(self, limit=None):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common(limit))
+
+    def top_functions(self, limit=20):
+        """Функции по доле снимков, в которых они на вершине стека (собственное время)"""
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        return own.most_common(limit)
+
+
+class SlowCallbackLog(logging.Handler):
+    """Последние сообщения asyncio о медленных callback'ах ("Executing ... took ...")"""
+
+    def __init__(self, size=100):
+        super().__init__(logging.WARNING)
+        self.records = deque(maxlen=size)
+        self.count = 0
+
+    def emit(self, record):
+        message = record.getMessage()
+        if message.startswith("Executing "):
+            self.count += 1
+            self.records.append(f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {message}")
+
+
+class SlowCallbackMonitor:
+    """Отладочный режим asyncio с порогом медленного callback'а, включаемый на ходу.
+
+    В отладочном режиме event loop логирует каждый callback дольше
+    threshold секунд вместе с корутиной, которая его выполняла. У режима
+    заметная нагрузка, поэтому он выключен, пока его не включат.
+    """
+
+    def __init__(self, loop=None, size=100):
+        self.loop = loop
+        self.log = SlowCallbackLog(size)
+        self.threshold = None
+
+    def enable(self, threshold):
+        loop = self.loop or asyncio.get_running_loop()
+        loop.slow_callback_duration = threshold
+        loop.set_debug(True)
+        if self.threshold is None:
+            logging.getLogger("asyncio").addHandler(self.log)
+        self.threshold = threshold
+        logger.warning(f"Отладочный режим asyncio включён, порог медленного callback {threshold} с")
+
+    def disable(self):
+        if self.threshold is None:
+            return
+        loop = self.loop or asyncio.get_running_loop()
+        loop.set_debug(False)
+        logging.getLogger("asyncio").removeHandler(self.log)
+        self.threshold = None
+        logger.info("Отладочный режим asyncio выключен")
+
+
+def dump_tasks(limit=10):
+    """Текстовый снимок задач event loop со стеками"""
+    tasks = sorted(asyncio.all_tasks(), key=lambda task: task.get_name())
+    lines = [f"Задач: {len(tasks)}"]
+    for task in tasks:
+        coro = task.get_coro()
+        name = getattr(coro, "__qualname__", repr(coro))
+        lines.append(f"\n{task.get_name()} {name}{' (завершена)' if task.done() else ''}")
+        for frame in task.get_stack(limit=limit):
+            code = frame.f_code
+            lines.append(f"    {code.co_filename}:{frame.f_lineno} {code.co_name}")
+    return "\n".join(lines)
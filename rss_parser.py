@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+CHUNK_SIZE = 16 * 1024
+
+# Форматы pubDate, встречающиеся в лентах; удачный формат запоминается для источника
+PUB_DATE_FORMATS = (
+    '%a, %d %b %Y %H:%M:%S %Z',
+    '%a, %d %b %Y %H:%M:%S %z',
+    '%d %b %Y %H:%M:%S %z',
+    '%Y-%m-%dT%H:%M:%S%z',
+)
+
+_format_cache = {}
+
+
+def parse_pub_date(pub_date, source=None):
+    """Разбор pubDate с кэшированием подошедшего формата для источника"""
+    if not pub_date:
+        return None
+
+    cached = _format_cache.get(source)
+    if cached:
+        try:
+            return _with_tz(datetime.strptime(pub_date, cached))
+        except ValueError:
+            pass
+
+    for fmt in PUB_DATE_FORMATS:
+        if fmt == cached:
+            continue
+        try:
+            timestamp = _with_tz(datetime.strptime(pub_date, fmt))
+        except ValueError:
+            continue
+        _format_cache[source] = fmt
+        return timestamp
+
+    try:
+        return _with_tz(parsedate_to_datetime(pub_date))
+    except (TypeError, ValueError):
+        return None
+
+
+def _with_tz(timestamp):
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def iter_feed_items(data, limit):
+    """Потоковый разбор RSS: выдаёт (title, link, pub_date) по мере закрытия <item>.
+
+    Чтение прекращается, как только набрано limit записей, поэтому тела
+    статей в хвосте большой ленты не разбираются вовсе.
+    """
+    if limit <= 0:
+        return
+
+    # lxml загружается при первом разборе, а не при запуске бота
+    from lxml import etree
+
+    parser = etree.XMLPullParser(
+        events=("end",), tag="item",
+        recover=True, resolve_entities=False, no_network=True,
+    )
+    count = 0
+    view = memoryview(data)
+
+    for offset in range(0, len(view), CHUNK_SIZE):
+        parser.feed(bytes(view[offset:offset + CHUNK_SIZE]))
+        for _, element in parser.read_events():
+            title = (element.findtext("title") or "").strip()
+            link = (element.findtext("link") or "").strip()
+            pub_date = (element.findtext("pubDate") or "").strip()
+
+            # Освобождаем уже разобранные элементы
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+            if not title:
+                continue
+
+            yield title, link, pub_date
+            count += 1
+            if count >= limit:
+                return
+
+
+def parse_feed(data, limit, source=None):
+    """Разбор ленты в список словарей title/link/pub_date/timestamp (timestamp — None, если дата не разобрана).
+
+    Результат состоит только из простых типов и может вернуться из пула процессов.
+    """
+    return [
+        {"title": title, "link": link, "pub_date": pub_date, "timestamp": parse_pub_date(pub_date, source)}
+        for title, link, pub_date in iter_feed_items(data, limit)
+    ]
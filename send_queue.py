@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+
+from metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+SEND_LATENCY = Histogram(
+    "bot_send_latency_seconds", "Время от постановки в очередь до отправки", ["priority"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+SEND_DURATION = Histogram("bot_send_duration_seconds", "Длительность вызова sendMessage")
+SEND_RESULTS = Counter("bot_send_total", "Результаты отправки сообщений", ["result"])
+FLOOD_WAITS = Counter("bot_flood_waits_total", "Ответы TelegramRetryAfter")
+
+# Приоритеты: меньше — раньше
+PRIORITY_ALERT = 0
+PRIORITY_NORMAL = 5
+PRIORITY_NEWS = 10
+
+
+class TokenBucket:
+    """Ограничитель скорости: rate токенов в секунду, не более capacity подряд"""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """Сколько ждать до появления токена"""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        """Опустошение ведра на время flood wait"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class OutgoingMessage:
+    __slots__ = ("chat_id", "text", "kwargs", "priority", "enqueued_at", "attempts", "token", "not_before")
+
+    def __init__(self, chat_id, text, kwargs, priority, token=None):
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+        self.token = token
+        self.not_before = 0.0  # Повтор не раньше этого момента (time.monotonic)
+
+
+class SendQueue:
+    """Единая очередь исходящих сообщений с приоритетами и лимитами Telegram.
+
+    Производители вызывают enqueue() и сразу продолжают работу; отправкой
+    занимается один фоновый обработчик, соблюдающий общий лимит бота и
+    лимит на каждый чат, а также паузы TelegramRetryAfter.
+
+    Сообщения лежат в полосах по приоритету. Обработчик каждый раз берёт
+    самое приоритетное сообщение, которое можно отправить сейчас: сообщение,
+    ожидающее повтора или лимита своего чата, остаётся в своей полосе и не
+    задерживает остальные.
+
+    fence — объект с атрибутом token и async validate(token): сообщение
+    получает токен при постановке и отбрасывается, если перед отправкой
+    токен уже недействителен (реплика перестала быть ведущей).
+    """
+
+    def __init__(self, bot, global_rate=25, global_burst=25, chat_rate=20 / 60, chat_burst=3,
+                 max_attempts=3, fence=None):
+        self.bot = bot
+        self.fence = fence
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self._chat_buckets = {}
+        self._lanes = {}  # приоритет -> deque сообщений в порядке постановки
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._worker = None
+        self.latencies = deque(maxlen=1000)
+        self.stats = {"enqueued": 0, "sent": 0, "failed": 0, "retries": 0, "flood_waits": 0, "fenced": 0}
+
+    @property
+    def depth(self):
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def enqueue(self, chat_id, text, priority=PRIORITY_NORMAL, **kwargs):
+        """Постановка сообщения в очередь без ожидания отправки"""
+        token = self.fence.token if self.fence is not None else None
+        message = OutgoingMessage(chat_id, text, kwargs, priority, token)
+        self._put(message)
+        self.stats["enqueued"] += 1
+        return message
+
+    def _put(self, message):
+        lane = self._lanes.get(message.priority)
+        if lane is None:
+            lane = self._lanes[message.priority] = deque()
+        lane.append(message)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def _remove(self, message):
+        self._lanes[message.priority].remove(message)
+        if not self.depth:
+            self._idle.set()
+
+    def _next_ready(self):
+        """Самое приоритетное сообщение, готовое к отправке, или (None, сколько ждать)"""
+        delay = self.global_bucket.wait_time()
+        if delay > 0:
+            return None, delay
+        now = time.monotonic()
+        delay = None
+        for priority in sorted(self._lanes):
+            for message in self._lanes[priority]:
+                wait = max(message.not_before - now, self._chat_bucket(message.chat_id).wait_time(now))
+                if wait <= 0:
+                    return message, None
+                delay = wait if delay is None else min(delay, wait)
+        return None, delay
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def join(self):
+        """Ожидание отправки всех сообщений, поставленных в очередь"""
+        await self._idle.wait()
+
+    async def stop(self, timeout=10):
+        """Остановка с попыткой дослать накопленные сообщения"""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Очередь отправки остановлена, не отправлено: {self.depth}")
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    async def _run(self):
+        while True:
+            message, delay = self._next_ready()
+            if message is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if await self._deliver(message):
+                self._remove(message)
+
+    def _retry_later(self, message, delay, error):
+        """Повтор через delay сек; False, если попытки кончились"""
+        if message.attempts >= self.max_attempts:
+            self.stats["failed"] += 1
+            SEND_RESULTS.inc(result="failed")
+            logger.error(f"Сообщение в {message.chat_id} не отправлено: {error}")
+            return False
+        self.stats["retries"] += 1
+        message.not_before = time.monotonic() + delay
+        return True
+
+    async def _deliver(self, message):
+        """Одна попытка отправки; True, если сообщение можно убрать из очереди"""
+        if self.fence is not None and not await self.fence.validate(message.token):
+            self.stats["fenced"] += 1
+            SEND_RESULTS.inc(result="fenced")
+            logger.warning(f"Сообщение в {message.chat_id} отброшено: токен {message.token} недействителен")
+            return True
+
+        chat_bucket = self._chat_bucket(message.chat_id)
+        self.global_bucket.consume()
+        chat_bucket.consume()
+        message.attempts += 1
+        started = time.monotonic()
+        try:
+            await self.bot.send_message(message.chat_id, message.text, **message.kwargs)
+        except TelegramRetryAfter as e:
+            # Flood wait относится к одному чату: остальные чаты продолжают отправку
+            self.stats["flood_waits"] += 1
+            FLOOD_WAITS.inc()
+            logger.warning(f"Flood wait {e.retry_after} с для чата {message.chat_id}")
+            chat_bucket.pause(e.retry_after)
+            return not self._retry_later(message, e.retry_after, e)
+        except TelegramNetworkError as e:
+            return not self._retry_later(message, 2 ** message.attempts, e)
+        except Exception as e:
+            self.stats["failed"] += 1
+            SEND_RESULTS.inc(result="failed")
+            logger.error(f"Ошибка отправки в {message.chat_id}: {e}")
+            return True
+
+        finished = time.monotonic()
+        self.stats["sent"] += 1
+        self.latencies.append(finished - message.enqueued_at)
+        SEND_DURATION.observe(finished - started)
+        SEND_LATENCY.observe(finished - message.enqueued_at, priority=str(message.priority))
+        SEND_RESULTS.inc(result="sent")
+        return True
+
+    def latency_summary(self):
+        """p50 / p95 / максимум задержки от постановки до отправки, сек"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return {
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
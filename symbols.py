@@ -0,0 +1,71 @@
+import json
+from dataclasses import dataclass, field
+
+from price_engine import parse_windows
+
+# Таймфреймы, для которых в планировщике есть расписание анализа свечей
+TIMEFRAMES = ("1h", "4h", "1d", "1w")
+
+QUOTE_ASSETS = ("USDT", "USDC", "FDUSD", "TUSD", "BUSD", "BTC", "ETH", "BNB")
+
+
+def base_asset(symbol):
+    """'ETHUSDT' -> 'ETH'"""
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)]
+    return symbol
+
+
+@dataclass
+class SymbolConfig:
+    """Отслеживаемая пара: порог ценового сигнала, окна и таймфреймы анализа свечей"""
+    symbol: str
+    asset: str
+    threshold: float
+    windows: dict = field(default_factory=dict)
+    timeframes: tuple = TIMEFRAMES
+
+    @property
+    def pair(self):
+        """'ETH/USDT'"""
+        return f"{self.asset}/{self.symbol[len(self.asset):]}" if self.symbol != self.asset else self.symbol
+
+
+def load_symbols(spec, path=None, threshold=3.0, windows=None, timeframes=TIMEFRAMES):
+    """Список пар из JSON-файла path или строки вида 'ETHUSDT,BTCUSDT'.
+
+    Элемент файла: {"symbol": "BTCUSDT", "threshold": 2, "windows": "5m,1h",
+    "timeframes": ["4h", "1d"]}; отсутствующие поля берутся из аргументов.
+    """
+    if path:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    else:
+        entries = [{"symbol": part.strip()} for part in spec.split(",") if part.strip()]
+
+    symbols = []
+    seen = set()
+    for entry in entries:
+        symbol = entry["symbol"].upper()
+        if symbol in seen:
+            raise ValueError(f"Пара {symbol} указана дважды")
+        seen.add(symbol)
+
+        entry_timeframes = tuple(entry.get("timeframes", timeframes))
+        unknown = set(entry_timeframes) - set(TIMEFRAMES)
+        if unknown:
+            raise ValueError(f"{symbol}: нет расписания для таймфреймов {', '.join(sorted(unknown))}")
+
+        entry_windows = entry.get("windows")
+        symbols.append(SymbolConfig(
+            symbol=symbol,
+            asset=entry.get("asset", base_asset(symbol)).upper(),
+            threshold=float(entry.get("threshold", threshold)),
+            windows=parse_windows(entry_windows) if entry_windows else dict(windows or {}),
+            timeframes=entry_timeframes,
+        ))
+
+    if not symbols:
+        raise ValueError("Не задано ни одной пары")
+    return symbols
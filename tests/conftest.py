@@ -0,0 +1,25 @@
+import logging
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def bot_module(tmp_path_factory):
+    """bot.py с фиктивными учётными данными и базами во временном каталоге"""
+    workdir = tmp_path_factory.mktemp("bot")
+    os.environ.update({
+        "API_TOKEN": "123456:test",
+        "ADMIN_CHAT_ID": "1",
+        "CHANNEL_ID": "-1001",
+        "CANDLE_DB_PATH": str(workdir / "candles.db"),
+        "DEDUP_DB_PATH": str(workdir / "dedup.db"),
+        "PRICE_STREAM": "0",
+        "CHANNEL_INGEST_MODE": "scrape",
+    })
+    import bot
+    logging.getLogger().setLevel(logging.WARNING)
+    yield bot
+    bot.candle_store.close()
+    bot.message_cache.close()
+    bot.news_clusters.close()
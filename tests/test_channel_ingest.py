@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from channel_ingest import ChannelIngest, message_to_dict
+
+
+class StubSource:
+    """Заглушка TelethonChannelSource: сообщения подаются через emit()"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.callback = None
+        self.stopped = False
+
+    @property
+    def connected(self):
+        return self.callback is not None and not self.stopped
+
+    async def start(self, callback):
+        if self.fail:
+            raise RuntimeError("сессия не авторизована")
+        self.callback = callback
+
+    async def stop(self):
+        self.stopped = True
+
+    async def emit(self, message_id, text):
+        await self.callback({"id": message_id, "text": text, "link": f"https://t.me/c/{message_id}", "time": ""})
+
+
+def test_message_to_dict():
+    message = SimpleNamespace(id=42, message="Binance: Liquidated on #ETH Long $52.1K at $2,987.12",
+                              date=datetime(2024, 3, 4, 12, tzinfo=timezone.utc))
+    assert message_to_dict("BinanceLiquidations", message) == {
+        "id": 42,
+        "text": "Binance: Liquidated on #ETH Long $52.1K at $2,987.12",
+        "link": "https://t.me/BinanceLiquidations/42",
+        "time": "2024-03-04T12:00:00+00:00",
+    }
+    assert message_to_dict("c", SimpleNamespace(id=1, message=None, date=None))["text"] == ""
+
+
+def test_push_messages_reach_handler_and_errors_are_isolated():
+    async def scenario():
+        ingest = ChannelIngest()
+        source = StubSource()
+        received = []
+
+        async def handler(msg):
+            if msg["text"] == "boom":
+                raise ValueError("не разобрано")
+            received.append(msg["id"])
+
+        ingest.add("liquidations", source, handler)
+        await ingest.start()
+        assert ingest.is_live("liquidations")
+        await source.emit(1, "first")
+        await source.emit(2, "boom")
+        await source.emit(3, "third")
+        await ingest.stop()
+        return ingest, source, received
+
+    ingest, source, received = asyncio.run(scenario())
+    assert received == [1, 3]
+    assert ingest.stats == {"events": 3, "errors": 1}
+    assert source.stopped and not ingest.is_live("liquidations")
+
+
+def test_failed_source_falls_back_to_scraping():
+    async def scenario():
+        ingest = ChannelIngest()
+        ingest.add("whale_alert", StubSource(fail=True), None)
+        ingest.add("liquidations", StubSource(), None)
+        await ingest.start()
+        return ingest
+
+    ingest = asyncio.run(scenario())
+    assert not ingest.is_live("whale_alert")
+    assert ingest.is_live("liquidations")
+    assert not ingest.is_live("unknown")
+
+
+def test_live_subscription_moves_scraper_cursor_and_skips_polling(bot_module, monkeypatch):
+    ingest = ChannelIngest()
+    monkeypatch.setattr(bot_module, "channel_ingest", ingest)
+    url = bot_module.LIQUIDATIONS_CHANNEL_URL
+    monkeypatch.setitem(bot_module.channel_scraper.cursors, url, 100)
+    received = []
+    polled = []
+
+    async def handler(msg):
+        received.append(msg["id"])
+
+    async def fetch(url):
+        polled.append(url)
+        return []
+
+    monkeypatch.setattr(bot_module, "fetch_telegram_channel", fetch)
+    source = StubSource()
+    ingest.add("liquidations", source, bot_module.channel_handler(url, handler))
+
+    async def scenario():
+        await ingest.start()
+        await source.emit(101, "new")
+        await source.emit(99, "late")
+        await bot_module.publish_liquidations()
+
+    asyncio.run(scenario())
+    # При живой подписке канал не скрапится
+    assert polled == []
+    assert received == [101, 99]
+    # Курсор только растёт: после отключения подписки скрапинг продолжит с 101
+    assert bot_module.channel_scraper.cursors[url] == 101
@@ -0,0 +1,91 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from benchmarks.fixtures import ChannelFixture, liquidation_post
+from channel_scraper import ChannelScraper, parse_channel_page, post_id
+
+PAGE = (Path(__file__).parent / "data" / "channel_page.html").read_bytes()
+URL = "https://t.me/s/BinanceLiquidations"
+
+
+class FakeHttp:
+    """Отдаёт страницы ChannelFixture так же, как t.me/s: последние посты или ?after=ID"""
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self.requests = []
+
+    async def get(self, url, source=None, params=None):
+        after = (params or {}).get("after")
+        self.requests.append(after)
+        return SimpleNamespace(status=200, body=self.fixture.page(after))
+
+
+def channel(posts, page_size=20):
+    fixture = ChannelFixture("BinanceLiquidations", [], page_size=page_size)
+    fixture.append(liquidation_post, posts)
+    return fixture
+
+
+def test_post_id():
+    assert post_id("BinanceLiquidations/12345") == 12345
+    assert post_id("broken") is None
+
+
+def test_parse_saved_page_skips_ads():
+    messages, max_id = parse_channel_page(PAGE)
+    assert max_id == 1004
+    assert [message["id"] for message in messages] == [1001, 1002, 1004]
+    assert messages[0]["text"].startswith("Binance: Liquidated on #ETH Long $52.1K")
+    assert messages[0]["link"] == "https://t.me/BinanceLiquidations/1001"
+
+
+def test_parse_saved_page_after_cursor():
+    messages, max_id = parse_channel_page(PAGE, after_id=1002)
+    assert [message["id"] for message in messages] == [1004]
+    assert max_id == 1004
+    assert parse_channel_page(PAGE, after_id=1004) == ([], None)
+
+
+def test_cursor_pages_through_new_posts():
+    fixture = channel(30)
+    http = FakeHttp(fixture)
+    scraper = ChannelScraper(http)
+
+    first = asyncio.run(scraper.fetch(URL))
+    assert [message["id"] for message in first] == list(range(11, 31))
+    assert scraper.cursors[URL] == 30
+
+    assert asyncio.run(scraper.fetch(URL)) == []
+
+    # 45 новых постов: три страницы по ?after=, без повторов и пропусков
+    fixture.append(liquidation_post, 45)
+    http.requests.clear()
+    messages = asyncio.run(scraper.fetch(URL))
+    assert [message["id"] for message in messages] == list(range(31, 76))
+    assert http.requests == [30, 50, 70]
+    assert scraper.cursors[URL] == 75
+    assert scraper.stats["skipped"] == 0
+
+
+def test_backlog_beyond_page_budget_jumps_to_latest_page():
+    fixture = channel(20)
+    http = FakeHttp(fixture)
+    scraper = ChannelScraper(http, max_pages=2)
+    asyncio.run(scraper.fetch(URL))
+
+    fixture.append(liquidation_post, 100)
+    http.requests.clear()
+    messages = asyncio.run(scraper.fetch(URL))
+    ids = [message["id"] for message in messages]
+
+    # Две страницы по курсору, затем последняя страница; промежуток 61..100 пропущен
+    assert http.requests == [20, 40, None]
+    assert ids == list(range(21, 61)) + list(range(101, 121))
+    assert scraper.cursors[URL] == 120
+    assert scraper.stats["skipped"] == 40
+
+    # Следующий опрос продолжает с последнего поста, а не с пропущенного промежутка
+    fixture.append(liquidation_post, 3)
+    assert [message["id"] for message in asyncio.run(scraper.fetch(URL))] == [121, 122, 123]
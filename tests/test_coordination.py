@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import pytest
+
+from coordination import LeaderElector, RedisLockBackend, SQLiteLockBackend
+
+fakeredis = pytest.importorskip("fakeredis")
+
+# Аренда в Redis истекает по настоящему времени, поэтому ttl короткий
+TTL = 0.2
+
+
+def redis_backend(server):
+    return RedisLockBackend(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+
+
+def test_redis_lease_acquire_renew_release():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        a, b = redis_backend(server), redis_backend(server)
+
+        token = await a.acquire("jobs", "a", TTL)
+        assert token == 1
+        # Повторный захват тем же владельцем продлевает аренду с тем же токеном
+        assert await a.acquire("jobs", "a", TTL) == 1
+        assert await b.acquire("jobs", "b", TTL) is None
+        assert await b.renew("jobs", "b", token, TTL) is False
+        assert await a.renew("jobs", "a", token, TTL) is True
+        assert await b.validate("jobs", token) is True
+
+        await a.release("jobs", "a", token)
+        assert await a.validate("jobs", token) is False
+        # Счётчик токенов переживает освобождение аренды
+        assert await b.acquire("jobs", "b", TTL) == 2
+        await a.close()
+        await b.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_expired_lease_goes_to_next_holder_with_higher_token():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        a, b = redis_backend(server), redis_backend(server)
+
+        old = await a.acquire("jobs", "a", TTL)
+        await asyncio.sleep(TTL * 1.5)
+        new = await b.acquire("jobs", "b", TTL)
+        assert new > old
+        assert await a.renew("jobs", "a", old, TTL) is False
+        assert await a.validate("jobs", old) is False
+        assert await b.validate("jobs", new) is True
+
+    asyncio.run(scenario())
+
+
+def test_redis_seen_keys_skip_expired():
+    async def scenario():
+        backend = redis_backend(fakeredis.FakeServer())
+        now = time.time()
+        await backend.record_seen([("old", now - 1), ("fresh", now + 60)])
+        assert [key for key, _ in await backend.load_seen()] == ["fresh"]
+
+    asyncio.run(scenario())
+
+
+def test_leader_failover_fences_previous_leader():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        events = []
+
+        def elector(holder):
+            async def elected():
+                events.append(("elected", holder))
+
+            async def demoted():
+                events.append(("demoted", holder))
+
+            return LeaderElector(redis_backend(server), "jobs", holder, ttl=TTL,
+                                 renew_interval=TTL / 4, on_elected=elected, on_demoted=demoted)
+
+        a, b = elector("a"), elector("b")
+        await a.start()
+        await b.start()
+        assert a.is_leader and not b.is_leader
+        old = a.token
+        assert await a.validate(old)
+
+        # Ведущая реплика «зависла»: продления прекратились, аренда истекает
+        a._task.cancel()
+        await asyncio.wait_for(b.wait_elected(), TTL * 5)
+        assert b.token > old
+        assert await b.validate(b.token)
+        # Сообщения прежней ведущей отсекаются по токену
+        assert not await b.validate(old)
+        assert not await b.backend.validate("jobs", old)
+
+        # Очнувшаяся реплика не продлит чужую аренду и станет ведомой
+        a._task = None
+        await a._step()
+        assert not a.is_leader
+        assert not await a.validate(old)
+        assert events == [("elected", "a"), ("elected", "b"), ("demoted", "a")]
+
+        # Ключи опубликованных сообщений достаются следующей ведущей
+        b.record_seen("post-1", time.time() + 60)
+        await b._seen_task
+        previous = b.token
+        # Освобождённую аренду следующая реплика захватывает сразу
+        await b.stop()
+        await a.start()
+        assert a.is_leader and a.token > previous
+        assert [key for key, _ in await a.load_seen()] == ["post-1"]
+        await a.stop()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_failover_with_clock(tmp_path):
+    async def scenario():
+        now = [1000.0]
+        path = str(tmp_path / "locks.db")
+        a = LeaderElector(SQLiteLockBackend(path, clock=lambda: now[0]), "jobs", "a", ttl=10)
+        b = LeaderElector(SQLiteLockBackend(path, clock=lambda: now[0]), "jobs", "b", ttl=10)
+
+        await a._step()
+        await b._step()
+        assert a.token == 1 and not b.is_leader
+
+        now[0] += 11
+        await b._step()
+        assert b.token == 2
+        assert not await b.validate(1)
+        await a._step()
+        assert not a.is_leader
+        await a.backend.close()
+        await b.backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_failed_record_seen_does_not_break_leases(tmp_path):
+    async def scenario():
+        backend = SQLiteLockBackend(str(tmp_path / "locks.db"))
+        try:
+            with pytest.raises(Exception):
+                await backend.record_seen([("bad entry",)])
+            # Транзакция откатана: соединение снова может захватить аренду
+            assert await backend.acquire("jobs", "a", 10) == 1
+            await backend.record_seen([("post-1", time.time() + 60)])
+            assert [key for key, _ in await backend.load_seen()] == ["post-1"]
+        finally:
+            await backend.close()
+
+    asyncio.run(scenario())
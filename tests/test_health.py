@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+
+@pytest.fixture
+def health(bot_module, monkeypatch):
+    """Планировщик с одной задачей раз в минуту; задачи активны уже час"""
+    now = time.time()
+    monkeypatch.setattr(bot_module, "jobs_active_since", now - 3600)
+    monkeypatch.setattr(bot_module, "job_health", {})
+
+    async def probe_job():
+        return 1
+
+    job = bot_module.scheduler.add_job(bot_module.track_job(probe_job), "interval", minutes=1, id="probe_job")
+    yield bot_module, now
+    job.remove()
+
+
+def only_probe(labels):
+    return [label for label in labels if label.startswith("probe_job")]
+
+
+def response(bot_module):
+    return asyncio.run(bot_module.health_handler(None))
+
+
+def test_recent_success_is_healthy(health):
+    bot_module, now = health
+    bot_module.job_health["probe_job"] = {"last_success": now - 30, "failures": 0}
+    assert only_probe(bot_module.stale_jobs(now)) == []
+
+
+def test_job_that_stopped_running_is_stale(health):
+    bot_module, now = health
+    # Ни одного сбоя, но и успеха 10 минут при интервале в минуту: планировщик встал
+    bot_module.job_health["probe_job"] = {"last_success": now - 600, "failures": 0}
+    assert bot_module.failing_jobs() == []
+    assert only_probe(bot_module.stale_jobs(now)) == ["probe_job"]
+
+
+def test_job_that_never_ran_is_stale(health):
+    bot_module, now = health
+    assert only_probe(bot_module.stale_jobs(now)) == ["probe_job"]
+
+
+def test_health_reports_stale_jobs(health):
+    bot_module, _ = health
+    result = response(bot_module)
+    assert result.status == 503
+    assert "Stale jobs: " in result.text and "probe_job" in result.text
+
+
+def test_grace_after_jobs_become_active(health, monkeypatch):
+    bot_module, now = health
+    monkeypatch.setattr(bot_module, "jobs_active_since", now - 30)
+    assert only_probe(bot_module.stale_jobs(now)) == []
+
+
+def test_inactive_replica_is_not_checked(health, monkeypatch):
+    bot_module, now = health
+    monkeypatch.setattr(bot_module, "jobs_active_since", None)
+    assert bot_module.stale_jobs(now) == []
+
+
+def test_cron_interval(bot_module):
+    from datetime import datetime, timezone
+    job = bot_module.scheduler.add_job(bot_module.track_job(bot_module.send_candle_analysis), "cron",
+                                       args=["4h", "ETHUSDT"], **bot_module.CANDLE_SCHEDULES["4h"])
+    try:
+        assert bot_module.job_interval(job, datetime(2024, 3, 4, 12, tzinfo=timezone.utc)) == 4 * 3600
+    finally:
+        job.remove()
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+
+from circuit_breaker import BreakerPolicy, CircuitOpenError
+from http_client import HttpClient, SourcePolicy
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def client():
+    policy = SourcePolicy(retries=2, backoff=0.01, breaker=BreakerPolicy(window=5, min_calls=3))
+    return HttpClient({"rss": policy})
+
+
+def test_dead_feed_opens_breaker_without_retries():
+    requests = []
+
+    async def gone(request):
+        requests.append(request.path)
+        return web.Response(status=404)
+
+    async def scenario():
+        runner, base = await serve(gone)
+        http = client()
+        try:
+            statuses = [(await http.get(f"{base}/feed", source="rss")).status for _ in range(3)]
+            with pytest.raises(CircuitOpenError):
+                await http.get(f"{base}/feed", source="rss")
+            return statuses
+        finally:
+            await http.close()
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == [404, 404, 404]
+    # 404 не повторяется, а после трёх сбоев запросы к ленте прекращаются
+    assert len(requests) == 3
+
+
+def test_not_modified_counts_as_success():
+    async def not_modified(request):
+        return web.Response(status=304)
+
+    async def scenario():
+        runner, base = await serve(not_modified)
+        http = client()
+        try:
+            for _ in range(5):
+                await http.get(f"{base}/feed", source="rss")
+            return http.breakers
+        finally:
+            await http.close()
+            await runner.cleanup()
+
+    breakers = asyncio.run(scenario())
+    assert [breaker.state for breaker in breakers.values()] == ["closed"]
+
+
+def test_get_candles_rejects_error_status(bot_module, monkeypatch):
+    calls = []
+
+    class FakeHttp:
+        async def get(self, url, source=None, params=None):
+            calls.append((url, params))
+            body = {"code": -1121, "msg": "Invalid symbol."}
+            return SimpleNamespace(status=400, json=lambda: body)
+
+    monkeypatch.setattr(bot_module, "http", FakeHttp())
+    assert asyncio.run(bot_module.get_candles("1h", "ETHUSDT")) is None
+    assert calls == [(f"{bot_module.BINANCE_API_URL}/api/v3/klines",
+                      {"symbol": "ETHUSDT", "interval": "1h", "limit": 2})]
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from candle_store import CandleStore
+from indicators import atr, compute_indicators, ema, pivots, rsi, support_resistance
+
+KLINES = json.loads((Path(__file__).parent / "data" / "klines_ethusdt_1h.json").read_text())
+HOUR_MS = 3_600_000
+
+
+def columns(rows):
+    return {
+        "high": np.array([float(row[2]) for row in rows]),
+        "low": np.array([float(row[3]) for row in rows]),
+        "close": np.array([float(row[4]) for row in rows]),
+    }
+
+
+# ===== Эталон: прежний расчёт свеча за свечой =====
+def loop_ewm(values, alpha):
+    result = [values[0]]
+    for value in values[1:]:
+        result.append((1 - alpha) * result[-1] + alpha * value)
+    return result
+
+
+def loop_ema(values, period):
+    return loop_ewm(list(values), 2 / (period + 1))
+
+
+def loop_rsi(close, period):
+    gains, losses = [], []
+    for previous, current in zip(close, close[1:]):
+        gains.append(max(current - previous, 0.0))
+        losses.append(max(previous - current, 0.0))
+    result = [float("nan")]
+    for gain, loss in zip(loop_ewm(gains, 1 / period), loop_ewm(losses, 1 / period)):
+        if loss == 0:
+            result.append(50.0 if gain == 0 else 100.0)
+        else:
+            result.append(100 - 100 / (1 + gain / loss))
+    return result
+
+
+def loop_atr(high, low, close, period):
+    ranges = []
+    for i in range(len(close)):
+        previous = close[i - 1] if i else close[0]
+        ranges.append(max(high[i] - low[i], abs(high[i] - previous), abs(low[i] - previous)))
+    return loop_ewm(ranges, 1 / period)
+
+
+def loop_pivots(high, low, width):
+    highs, lows = [], []
+    for i in range(width, len(high) - width):
+        if high[i] == max(high[i - width:i + width + 1]):
+            highs.append(i)
+        if low[i] == min(low[i - width:i + width + 1]):
+            lows.append(i)
+    return highs, lows
+
+
+# ===== Сравнение на записанных свечах =====
+@pytest.fixture
+def candles():
+    return columns(KLINES)
+
+
+@pytest.mark.parametrize("period", [9, 21, 50, 200])
+def test_ema_matches_loop(candles, period):
+    np.testing.assert_allclose(ema(candles["close"], period), loop_ema(candles["close"], period), rtol=1e-12)
+
+
+def test_rsi_matches_loop(candles):
+    np.testing.assert_allclose(rsi(candles["close"], 14), loop_rsi(list(candles["close"]), 14),
+                               rtol=1e-10, equal_nan=True)
+
+
+def test_atr_matches_loop(candles):
+    expected = loop_atr(list(candles["high"]), list(candles["low"]), list(candles["close"]), 14)
+    np.testing.assert_allclose(atr(candles["high"], candles["low"], candles["close"], 14), expected, rtol=1e-12)
+
+
+def test_pivots_match_loop(candles):
+    highs, lows = pivots(candles["high"], candles["low"], 3)
+    assert (list(highs), list(lows)) == loop_pivots(list(candles["high"]), list(candles["low"]), 3)
+
+
+def test_support_below_and_resistance_above_last_close(candles):
+    support, resistance = support_resistance(candles["high"], candles["low"], candles["close"])
+    assert support < candles["close"][-1] < resistance
+
+
+def test_ema_stays_exact_on_long_history():
+    # Блочные кумулятивные суммы не должны терять точность на десятках тысяч свечей
+    rng = random.Random(3)
+    prices = [3000.0]
+    for _ in range(50_000):
+        prices.append(prices[-1] * (1 + rng.gauss(0, 0.01)))
+    np.testing.assert_allclose(ema(prices, 200)[-1000:], loop_ema(prices, 200)[-1000:], rtol=1e-9)
+
+
+def test_compute_indicators_last_values(candles):
+    result = compute_indicators(candles)
+    assert result["ema_fast"] == pytest.approx(loop_ema(candles["close"], 21)[-1])
+    assert result["ema_slow"] == pytest.approx(loop_ema(candles["close"], 50)[-1])
+    assert result["rsi"] == pytest.approx(loop_rsi(list(candles["close"]), 14)[-1])
+    assert 0 <= result["rsi"] <= 100
+
+
+def test_short_history():
+    assert np.isnan(rsi([3000.0], 14)).all()
+    assert len(atr([], [], [], 14)) == 0
+    assert [len(found) for found in pivots([1.0, 2.0], [1.0, 2.0], 3)] == [0, 0]
+
+
+# ===== Хранилище свечей =====
+class FakeBinance:
+    """/api/v3/klines по записанным свечам: последние limit или начиная со startTime"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    async def get(self, url, source=None, params=None):
+        self.requests.append(dict(params))
+        rows = self.rows
+        if "startTime" in params:
+            rows = [row for row in rows if row[0] >= params["startTime"]][:params["limit"]]
+        else:
+            rows = rows[-params["limit"]:]
+        return SimpleNamespace(status=200, json=lambda: rows)
+
+
+def test_store_backfills_once_then_fetches_only_new(tmp_path):
+    http = FakeBinance(KLINES[:250])
+    store = CandleStore(str(tmp_path / "candles.db"), http, "https://api.binance.com", backfill_limit=200)
+    try:
+        now = (KLINES[249][6] + 1) / 1000
+        assert asyncio.run(store.sync("ETHUSDT", "1h", now=now)) == 200
+        assert "startTime" not in http.requests[0]
+
+        # Следующая свеча ещё не закрылась: запроса нет
+        assert asyncio.run(store.sync("ETHUSDT", "1h", now=now + 60)) == 0
+        assert len(http.requests) == 1
+
+        # Три новых свечи: запрос с последней сохранённой, она перезаписывается
+        http.rows = KLINES[:253]
+        now = (KLINES[252][6] + 1) / 1000
+        assert asyncio.run(store.sync("ETHUSDT", "1h", now=now)) == 4
+        assert http.requests[-1]["startTime"] == KLINES[249][0]
+
+        loaded = store.load("ETHUSDT", "1h", now=now)
+        assert len(loaded["close"]) == 203
+        assert np.all(np.diff(loaded["open_time"]) == HOUR_MS)
+        assert loaded["close"][-1] == float(KLINES[252][4])
+    finally:
+        store.close()
+
+
+def test_stream_candle_appends_only_without_gap(tmp_path):
+    store = CandleStore(str(tmp_path / "candles.db"), FakeBinance([]), "https://api.binance.com")
+    try:
+        store.upsert("ETHUSDT", "1h", KLINES[:10])
+        assert store.append_closed("ETHUSDT", "1h", KLINES[10])
+        assert not store.append_closed("ETHUSDT", "1h", KLINES[12])
+        assert store.last_open_time("ETHUSDT", "1h") == KLINES[10][0]
+    finally:
+        store.close()
+
+
+def test_candle_post_skips_undefined_rsi(bot_module, monkeypatch):
+    # Одна свеча в хранилище: догрузка истории не удалась
+    history = {name: np.array([value], dtype=float) for name, value in zip(
+        ("open_time", "open", "high", "low", "close", "volume", "close_time"), map(float, KLINES[0][:7]))}
+    sent = []
+
+    async def get_candle_history(timeframe, symbol):
+        return history
+
+    monkeypatch.setattr(bot_module, "get_candle_history", get_candle_history)
+    monkeypatch.setattr(bot_module, "send_queue", SimpleNamespace(enqueue=lambda chat_id, text, **kwargs: sent.append(text)))
+    asyncio.run(bot_module.send_candle_analysis("1h", "ETHUSDT"))
+
+    assert len(sent) == 1
+    assert "nan" not in sent[0]
+    assert "RSI:" not in sent[0] and "ATR:" in sent[0]
@@ -0,0 +1,42 @@
+import pytest
+
+from market_events import parse_liquidation, parse_whale
+
+
+def message(text):
+    return {"text": text, "link": "https://t.me/BinanceLiquidations/1", "time": "2024-03-04T12:00:00+00:00"}
+
+
+@pytest.mark.parametrize("text, exchange", [
+    ("Binance: Liquidated on #ETH Long $125.3K at $3,012.5", "Binance"),
+    ("🔴 Bybit: Liquidated on #ETH Short $52.1K at $2,987.12", "Bybit"),
+    ("🔴 #ETH Liquidated Long: $52.1K at $2,987.12", "Binance"),
+    ("🟢 Liquidated Short: #ETH $12K at $3,001", "Binance"),
+    ("#ETH Long liquidated $52.1K at $2,987.12", "Binance"),
+])
+def test_liquidation_exchange(text, exchange):
+    liquidation = parse_liquidation(message(text))
+    assert liquidation.exchange == exchange
+    assert liquidation.symbol == "ETH"
+
+
+def test_liquidation_fields():
+    liquidation = parse_liquidation(message("🔴 #ETH Liquidated Long: $52.1K at $2,987.12"))
+    assert liquidation.side == "long"
+    assert liquidation.size_usd == pytest.approx(52_100)
+    assert liquidation.price == pytest.approx(2987.12)
+
+
+def test_sell_closes_long():
+    liquidation = parse_liquidation(message("OKX: #ETH Sell $1.2M at $3,000"))
+    assert (liquidation.exchange, liquidation.side, liquidation.size_usd) == ("OKX", "long", 1_200_000)
+
+
+def test_unparsable_liquidation():
+    assert parse_liquidation(message("Binance: maintenance")) is None
+
+
+def test_whale_transfer():
+    whale = parse_whale(message("🚨 1,500 #ETH (4,512,345 USD) transferred from #Binance to unknown wallet"))
+    assert (whale.symbol, whale.amount, whale.size_usd) == ("ETH", 1500, 4_512_345)
+    assert (whale.sender, whale.receiver) == ("#Binance", "unknown wallet")
@@ -0,0 +1,71 @@
+import pytest
+
+from news_clusters import NewsClusterIndex, title_tokens
+
+HOUR = 3600
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = NewsClusterIndex(str(tmp_path / "stories.db"))
+    yield index
+    index.close()
+
+
+def item(title, source="a"):
+    return {"title": title, "link": f"https://{source}.example/{title}", "source": source}
+
+
+def test_topic_words_are_ignored():
+    assert title_tokens("Ethereum ETF sees record inflows") == {"etf", "see", "record", "inflow"}
+    assert title_tokens("ETH price") == title_tokens("Ether price")
+
+
+@pytest.mark.parametrize("left, right", [
+    ("Ethereum ETF sees record inflows", "Ethereum ETF sees record outflows"),
+    ("Coinbase lists new Ethereum token", "Binance lists new Ethereum token"),
+    ("Ethereum developers delay Pectra upgrade", "Ethereum developers confirm Pectra upgrade date"),
+])
+def test_different_stories_stay_apart(index, left, right):
+    clusters = index.group([item(left), item(right, "b")])
+    assert len(clusters) == 2
+
+
+@pytest.mark.parametrize("left, right", [
+    ("SEC approves spot Ethereum ETFs", "SEC approves spot ETH ETFs"),
+    ("Ethereum price plunges 10% as long liquidations top $250M",
+     "ETH price plunges 10%, long liquidations top $250M"),
+])
+def test_near_duplicates_are_grouped(index, left, right):
+    clusters = index.group([item(left), item(right, "b")])
+    assert len(clusters) == 1
+    assert [entry["source"] for entry in clusters[0].items] == ["a", "b"]
+
+
+def test_published_story_suppresses_only_within_ttl(index):
+    now = 1_700_000_000
+    [cluster] = index.group([item("SEC approves spot Ethereum ETFs")], now=now)
+    assert not cluster.known
+    index.add(cluster, now=now)
+
+    [again] = index.group([item("SEC approves spot ETH ETFs", "b")], now=now + HOUR)
+    assert again.known
+
+    # После ttl событие не подавляет похожие даже до компактизации
+    [later] = index.group([item("SEC approves spot ETH ETFs", "b")], now=now + index.ttl + 1)
+    assert not later.known
+
+
+def test_stories_survive_reopen(tmp_path):
+    path = str(tmp_path / "stories.db")
+    index = NewsClusterIndex(path)
+    [cluster] = index.group([item("SEC approves spot Ethereum ETFs")])
+    index.add(cluster)
+    index.close()
+
+    reopened = NewsClusterIndex(path)
+    try:
+        [again] = reopened.group([item("SEC approves spot ETH ETFs", "b")])
+        assert again.story_id == cluster.story_id
+    finally:
+        reopened.close()
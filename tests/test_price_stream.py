@@ -0,0 +1,86 @@
+import asyncio
+
+from benchmarks import fixtures as fixture_data
+from benchmarks.standin import StandIn
+from http_client import HttpClient
+from price_engine import PriceEngine, PriceStream
+
+T0 = 1_700_000_040  # Начало минуты
+STREAM = "ethusdt@miniTicker"
+
+
+def minute_klines(closes):
+    """Минутные свечи с T0 с заданными ценами закрытия"""
+    rows = []
+    for i, close in enumerate(closes):
+        open_ms = (T0 + i * 60) * 1000
+        rows.append([open_ms, f"{close:.2f}", f"{close:.2f}", f"{close:.2f}", f"{close:.2f}", "1.0",
+                     open_ms + 59_999, "0", 1, "0", "0", "0"])
+    return rows
+
+
+def ticker(price, ts):
+    return {"e": "24hrMiniTicker", "E": int(ts * 1000), "s": "ETHUSDT", "c": f"{price:.2f}"}
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "условие не выполнилось"
+        await asyncio.sleep(0.01)
+
+
+async def scenario():
+    data = fixture_data.synthetic(posts_per_channel=1)
+    # Пока поток лежит, цена падает на 5%: 3000 -> 2860 за пять минут
+    data.klines["1m"] = minute_klines([3000, 2980, 2940, 2900, 2860])
+    standin = StandIn(data)
+    await standin.start()
+    http = HttpClient()
+    alerts = []
+    now = [T0 - 20]
+
+    async def on_alert(alert):
+        alerts.append(alert)
+
+    engine = PriceEngine(http, "ETHUSDT", {"5m": 300}, threshold=3.0, on_alert=on_alert,
+                         rest_url=standin.base_url, clock=lambda: now[0])
+    stream = PriceStream(http, standin.ws_url, {"ETHUSDT": engine},
+                         kline_intervals={"ETHUSDT": ("1h",)}, reconnect_delay=0.05)
+    try:
+        await stream.start()
+        await wait_for(lambda: standin.stream_clients == 1 and stream.connected)
+        for second in range(10):
+            await standin.push(STREAM, ticker(3000, T0 - 30 + second))
+        await wait_for(lambda: engine.stats["ticks"] == 10)
+
+        # Разрыв посреди потока; к переподключению прошло больше backfill_after
+        now[0] = T0 + 330
+        await standin.drop_streams()
+        await wait_for(lambda: stream.stats["reconnects"] == 1 and stream.connected)
+        await wait_for(lambda: engine.stats["backfilled"] == 5)
+
+        # Первый тик после восстановления сравнивается с ценами, пришедшими через REST
+        await standin.push(STREAM, ticker(2850, T0 + 320))
+        await wait_for(lambda: engine.stats["ticks"] == 11)
+        return standin.subscriptions, stream.stats, engine.stats, alerts
+    finally:
+        await stream.stop()
+        await http.close()
+        await standin.stop()
+
+
+def test_reconnect_resubscribes_backfills_and_alerts():
+    subscriptions, stream_stats, engine_stats, alerts = asyncio.run(scenario())
+
+    expected = ["ethusdt@miniTicker", "ethusdt@kline_1h"]
+    assert subscriptions == [expected, expected]
+    assert stream_stats["reconnects"] == 1
+    assert engine_stats["backfilled"] == 5
+
+    # Без дозаполнения окно 5m содержало бы только 2850, и падение на 5% прошло бы незамеченным
+    assert len(alerts) == 1
+    alert = alerts[0]
+    assert alert.window == "5m"
+    assert alert.reference == 3000
+    assert round(alert.change, 1) == -5.0
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from apscheduler.triggers.cron import CronTrigger
+
+START = datetime(2024, 3, 4, 12, 0, 30, tzinfo=timezone.utc)  # Понедельник
+
+
+def fire_times(schedule, count=3):
+    trigger = CronTrigger(timezone=timezone.utc, **schedule)
+    times, previous, now = [], None, START
+    for _ in range(count):
+        previous = trigger.get_next_fire_time(previous, now)
+        times.append(previous)
+        now = previous + timedelta(microseconds=1)
+    return times
+
+
+@pytest.mark.parametrize("timeframe, expected", [
+    ("1h", [datetime(2024, 3, 4, hour, 0, 10, tzinfo=timezone.utc) for hour in (13, 14, 15)]),
+    ("4h", [datetime(2024, 3, 4, 16, 0, 10, tzinfo=timezone.utc),
+            datetime(2024, 3, 4, 20, 0, 10, tzinfo=timezone.utc),
+            datetime(2024, 3, 5, 0, 0, 10, tzinfo=timezone.utc)]),
+    ("1d", [datetime(2024, 3, day, 0, 5, tzinfo=timezone.utc) for day in (5, 6, 7)]),
+    ("1w", [datetime(2024, 3, day, 23, 55, tzinfo=timezone.utc) for day in (10, 17, 24)]),
+])
+def test_candle_schedule_fires_once_per_candle(bot_module, timeframe, expected):
+    assert fire_times(bot_module.CANDLE_SCHEDULES[timeframe]) == expected
+
+
+def test_every_timeframe_has_schedule(bot_module):
+    for config in bot_module.SYMBOLS:
+        assert set(config.timeframes) <= set(bot_module.CANDLE_SCHEDULES)
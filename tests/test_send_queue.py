@@ -0,0 +1,84 @@
+import asyncio
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from send_queue import PRIORITY_ALERT, PRIORITY_NEWS, SendQueue
+
+
+class FakeBot:
+    """send_message с заданными flood wait по тексту сообщения"""
+
+    def __init__(self, flood_waits=None):
+        self.flood_waits = dict(flood_waits or {})
+        self.sent = []
+        self.attempts = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.attempts.append(text)
+        retry_after = self.flood_waits.get(text)
+        if retry_after is not None:
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Flood control", retry_after)
+        self.sent.append((chat_id, text))
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "условие не выполнилось"
+        await asyncio.sleep(0.01)
+
+
+def test_alert_overtakes_news_in_flood_wait():
+    async def scenario():
+        bot = FakeBot({"news": 1})
+        queue = SendQueue(bot, chat_rate=50)
+        await queue.start()
+        try:
+            queue.enqueue(1, "news", priority=PRIORITY_NEWS)
+            await wait_for(lambda: queue.stats["flood_waits"] == 1)
+            # Чат на паузе: сигнал ждёт её окончания, но не за новостью
+            bot.flood_waits.clear()
+            queue.enqueue(1, "alert", priority=PRIORITY_ALERT)
+            await asyncio.wait_for(queue.join(), 5)
+        finally:
+            await queue.stop()
+        return bot.sent
+
+    assert asyncio.run(scenario()) == [(1, "alert"), (1, "news")]
+
+
+def test_flood_wait_in_one_chat_does_not_stall_others():
+    async def scenario():
+        bot = FakeBot({"news": 30})
+        queue = SendQueue(bot, chat_rate=50)
+        await queue.start()
+        try:
+            queue.enqueue(1, "news", priority=PRIORITY_NEWS)
+            await wait_for(lambda: queue.stats["flood_waits"] == 1)
+            queue.enqueue(2, "other chat", priority=PRIORITY_NEWS)
+            await wait_for(lambda: queue.stats["sent"] == 1, timeout=1)
+            return bot.sent, queue.depth
+        finally:
+            await queue.stop(timeout=0)
+
+    sent, depth = asyncio.run(scenario())
+    assert sent == [(2, "other chat")]
+    assert depth == 1
+
+
+def test_flood_waits_count_against_max_attempts():
+    async def scenario():
+        bot = FakeBot({"news": 0})
+        queue = SendQueue(bot, chat_rate=50, max_attempts=3)
+        await queue.start()
+        try:
+            queue.enqueue(1, "news", priority=PRIORITY_NEWS)
+            await asyncio.wait_for(queue.join(), 5)
+        finally:
+            await queue.stop()
+        return bot.attempts, queue.stats
+
+    attempts, stats = asyncio.run(scenario())
+    assert attempts == ["news"] * 3
+    assert stats["failed"] == 1 and stats["sent"] == 0